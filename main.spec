@@ -1,5 +1,20 @@
 # -*- mode: python ; coding: utf-8 -*-
 
+import os
+import shutil
+import subprocess
+import sys
+
+# Precompile every Jinja2 template into Python modules; the frozen app loads
+# them through a ModuleLoader instead of compiling templates at launch
+compiled_templates = os.path.join('build', 'compiled_templates')
+shutil.rmtree(compiled_templates, ignore_errors=True)
+subprocess.run(
+    [sys.executable, os.path.join('spring-ftl', 'src', 'main', 'resources', 'scripts', 'template_registry.py'),
+     '--compile', compiled_templates],
+    check=True,
+)
+
 a = Analysis(
     ['spring-ftl\\src\\main\\resources\\scripts\\main.py'],
     pathex=['spring-ftl\\src\\main\\resources\\scripts'],
@@ -10,6 +25,7 @@ a = Analysis(
         ('spring-ftl\\src\\main\\java\\com\\example\\spring_ftl\\dto', 'dto'),
         ('spring-ftl\\src\\main\\java\\com\\example\\spring_ftl\\service', 'service'),
         ('spring-ftl\\src\\main\\resources\\templates', 'templates'),
+        (compiled_templates, 'compiled_templates'),
         ('*.properties', '.'),
         ('spring-ftl\\src\\main\\resources\\scripts\\combined.py', '.'),
         ('spring-ftl\\src\\main\\resources\\scripts\\mapping.py', '.'),
@@ -1,6 +1,7 @@
 import json
 from pathlib import Path
-from jinja2 import Template
+
+import template_registry
 
 JAVA_TEMPLATE = """\
 package com.linedata.chorus.std.gui;
@@ -66,7 +67,7 @@ def generate_form_service(json_path: str):
     base_path = Path(r"C:\Users\USER\Downloads\spring-ftl\.idea\demo") / functionId
     base_path.mkdir(parents=True, exist_ok=True)
 
-    template = Template(JAVA_TEMPLATE)
+    template = template_registry.from_string(JAVA_TEMPLATE)
     java_content = template.render(
         functionId=functionId,
         functionId_upper=functionId.upper()
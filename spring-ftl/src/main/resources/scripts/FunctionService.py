@@ -1,6 +1,7 @@
 import json
 from pathlib import Path
-from jinja2 import Template
+
+import template_registry
 
 JAVA_TEMPLATE = """\
 package com.linedata.chorus.std.gui.{{ functionId_lower }};
@@ -77,7 +78,7 @@ def generate_irap_function_service(json_path: str):
     base_path = Path(r"C:\Users\USER\Downloads\spring-ftl\.idea\demo") / functionId_lower
     base_path.mkdir(parents=True, exist_ok=True)
 
-    template = Template(JAVA_TEMPLATE)
+    template = template_registry.from_string(JAVA_TEMPLATE)
     java_content = template.render(
         functionId_lower=functionId_lower,
         functionId_cap=functionId_cap
@@ -1,6 +1,7 @@
 import json
 from pathlib import Path
-from jinja2 import Template
+
+import template_registry
 
 JAVA_TEMPLATE = """\
 import java.util.ArrayList;
@@ -87,7 +88,7 @@ def generate_irap_list_block_service(json_path: str):
     base_path = Path(r"C:\Users\USER\Downloads\spring-ftl\.idea\demo") / functionId_lower
     base_path.mkdir(parents=True, exist_ok=True)
 
-    template = Template(JAVA_TEMPLATE)
+    template = template_registry.from_string(JAVA_TEMPLATE)
     java_content = template.render(
         FunctionId=functionId_cap,
         functionId=functionId_lower
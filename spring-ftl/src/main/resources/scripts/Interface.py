@@ -1,6 +1,7 @@
 import json
 from pathlib import Path
-from jinja2 import Template
+
+import template_registry
 
 # === Mapping nature → Java types ===
 NATURE_TO_JAVA_TYPE = {
@@ -35,6 +36,7 @@ def generate_irap_interface(json_path: str):
     with open(json_path, "r", encoding="utf-8") as f:
         full_data = json.load(f)
 
+    template = template_registry.from_string(JAVA_TEMPLATE)
     for function_id, fields_dict in full_data.items():
         FunctionId = function_id[0].upper() + function_id[1:]
         field_entries = []
@@ -57,7 +59,6 @@ def generate_irap_interface(json_path: str):
         output_path = base_path / filename
 
         # Render Java file
-        template = Template(JAVA_TEMPLATE)
         java_code = template.render(FunctionId=FunctionId, fields=field_entries)
 
         with open(output_path, "w", encoding="utf-8") as f:
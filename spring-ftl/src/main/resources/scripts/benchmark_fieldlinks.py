@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark field link rendering in combined.py
+Renders growing numbers of conditional-visibility links with FORM_ID unset,
+so the form id has to be detected from transformed_result.json, and checks
+that the time per link stays flat, both as links and as forms are added.
+The form id itself is resolved once per generation; its cost is shown apart.
+"""
+
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import combined
+
+LINK_COUNTS = [2000, 4000, 8000, 16000, 32000]
+FORM_COUNTS = [1, 10, 100, 1000]
+LINKS_PER_FORM_CHECK = 8000
+PER_LINK_RESOLUTION_MAX = 1000  # the old behaviour gets too slow beyond this
+FIELDS_PER_FORM = 2000
+REPEAT = 5
+MAX_SPREAD = 1.5  # largest/smallest time per link still counted as flat
+
+def create_test_data(output_dir, field_count, form_count=1):
+    """Write a transformed_result.json with `form_count` forms of `field_count` fields"""
+    output_dir.mkdir(exist_ok=True)
+    fields = {
+        f"field{i}": {"nature": "string", "label": f"Field {i}", "sortNumber": str(i)}
+        for i in range(field_count)
+    }
+    forms = {"bench" if i == 0 else f"form{i}": fields for i in range(form_count)}
+    with open(output_dir / "transformed_result.json", 'w', encoding='utf-8') as f:
+        json.dump({"originalJson": forms}, f)
+
+def make_links(count):
+    """Build fieldlink.json content with `count` links"""
+    return {
+        "links": [
+            {
+                "childFieldId": f"field{i}",
+                "id": f"link{i}",
+                "methodName": f"isField{i}Visible",
+                "nature": "CONDITIONNALHIDDEN",
+                "disabled": "false",
+                "fatherFieldIds": [f"field{i + 1}"]
+            }
+            for i in range(count)
+        ]
+    }
+
+def render_per_link(fieldlinks_data):
+    """Previous behaviour: resolve the form id again for every link"""
+    for link in fieldlinks_data['links']:
+        combined.generate_fieldlinks_xml({'links': [link]}, combined.GenerationContext.resolve())
+
+def time_call(function, *args, repeat=REPEAT):
+    """Best of `repeat` runs"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function(*args)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def report_spread(per_link, what):
+    """Print whether the time per link stayed flat; per_link are seconds"""
+    spread = max(per_link) / min(per_link)
+    if spread < MAX_SPREAD:
+        print(f"✅ Time per link stays flat as {what} grows (varies by {spread:.2f}x)")
+    else:
+        print(f"⚠️ Time per link grows with {what} (varies by {spread:.2f}x)")
+
+def main():
+    """Run the benchmark"""
+    print("⏱️ Benchmarking field link rendering (FORM_ID unset)...")
+    os.environ.pop('FORM_ID', None)
+    previous_cwd = os.getcwd()
+
+    with tempfile.TemporaryDirectory() as workspace:
+        os.chdir(workspace)
+        try:
+            create_test_data(Path("output"), FIELDS_PER_FORM)
+            print(f"📋 transformed_result.json with {FIELDS_PER_FORM} fields")
+            print(f"\n{'links':>8} {'time':>10} {'per link':>10}")
+            per_link = []
+            for count in LINK_COUNTS:
+                elapsed = time_call(combined.generate_fieldlinks_xml, make_links(count))
+                per_link.append(elapsed / count)
+                print(f"{count:>8} {elapsed:>9.4f}s {elapsed / count * 1e6:>8.2f}µs")
+            report_spread(per_link, "the number of links")
+
+            # More forms make the detection of the form id slower, not the links
+            print(f"\n{'forms':>8} {'resolve':>10} {'per link':>10}   ({LINKS_PER_FORM_CHECK} links)")
+            per_link = []
+            links = make_links(LINKS_PER_FORM_CHECK)
+            for form_count in FORM_COUNTS:
+                create_test_data(Path("output"), FIELDS_PER_FORM // 10, form_count)
+                resolve = time_call(combined.GenerationContext.resolve)
+                generation = combined.GenerationContext.resolve()
+                assert generation.form_id == "bench"
+                elapsed = time_call(combined.generate_fieldlinks_xml, links, generation)
+                per_link.append(elapsed / LINKS_PER_FORM_CHECK)
+                print(f"{form_count:>8} {resolve * 1e3:>8.2f}ms {elapsed / LINKS_PER_FORM_CHECK * 1e6:>8.2f}µs")
+            report_spread(per_link, "the number of forms")
+
+            # For comparison: resolving the form id again for every link
+            create_test_data(Path("output"), FIELDS_PER_FORM)
+            count = PER_LINK_RESOLUTION_MAX
+            elapsed = time_call(render_per_link, make_links(count), repeat=1)
+            print(f"\n🐢 Re-resolving the form id per link: {count} links in {elapsed:.4f}s "
+                  f"({elapsed / count * 1e6:.2f}µs per link)")
+        finally:
+            os.chdir(previous_cwd)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark streaming form ingestion
+Writes multi-form transformed_result.json exports of growing size and
+compares the peak memory of json.load against form_stream.iter_forms, each
+measured in a fresh interpreter
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+FORM_COUNTS = [250, 1000, 4000]
+FIELDS_PER_FORM = 100
+
+CHILD = r"""
+import json, resource, sys
+sys.path.insert(0, sys.argv[3])
+import form_stream
+baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+count = 0
+if sys.argv[1] == 'json.load':
+    with open(sys.argv[2], encoding='utf-8') as f:
+        for form_id, fields in json.load(f)['originalJson'].items():
+            count += len(fields)
+else:
+    for form_id, fields in form_stream.iter_forms(sys.argv[2]):
+        count += len(fields)
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+# ru_maxrss is in KB on Linux and in bytes on macOS
+scale = 1024 if sys.platform == 'darwin' else 1
+print(count, (peak - baseline) * 1024 // scale)
+"""
+
+def create_export(path, form_count, field_count):
+    """Write an export with form_count forms, streaming it to disk form by form"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{"originalJson": {')
+        for i in range(form_count):
+            fields = {
+                f"field{j}": {"nature": "string", "label": f"Libellé {i}.{j}", "sortNumber": str(j)}
+                for j in range(field_count)
+            }
+            f.write(('' if i == 0 else ', ') + json.dumps(f"form{i}") + ': ' + json.dumps(fields, ensure_ascii=False))
+        f.write('}, "labelMappings": [], "areaConfigs": []}')
+
+def measure(mode, path):
+    """Return (fields seen, extra peak RSS in bytes) for one reading mode"""
+    scripts_dir = str(Path(__file__).parent.resolve())
+    output = subprocess.run(
+        [sys.executable, '-c', CHILD, mode, str(path), scripts_dir],
+        capture_output=True, text=True, check=True
+    ).stdout.split()
+    return int(output[0]), int(output[1])
+
+def main():
+    """Run the benchmark"""
+    try:
+        import resource  # noqa: F401
+    except ImportError:
+        print("⚠️ This benchmark needs the resource module (Linux/macOS)")
+        return
+
+    print(f"🧪 Peak memory while reading every form ({FIELDS_PER_FORM} fields per form)")
+    print(f"\n{'forms':>7} {'file':>9} {'json.load':>11} {'iter_forms':>11}")
+    streamed = []
+    with tempfile.TemporaryDirectory() as workspace:
+        for count in FORM_COUNTS:
+            path = Path(workspace) / f"export_{count}.json"
+            create_export(path, count, FIELDS_PER_FORM)
+            size = path.stat().st_size / (1024 * 1024)
+            fields_full, full = measure('json.load', path)
+            fields_stream, stream = measure('iter_forms', path)
+            if fields_full != fields_stream:
+                print(f"❌ Different number of fields: {fields_full} vs {fields_stream}")
+            streamed.append(stream)
+            print(f"{count:>7} {size:>7.1f}MB {full / 2**20:>9.1f}MB {stream / 2**20:>9.1f}MB")
+
+    growth = streamed[-1] / max(streamed[0], 1)
+    forms_growth = FORM_COUNTS[-1] / FORM_COUNTS[0]
+    print(f"\n📊 {forms_growth:.0f}x more forms, streaming peak memory x{growth:.2f}")
+    if growth < 2:
+        print("✅ Streaming peak memory stays roughly constant in the number of forms")
+    else:
+        print("⚠️ Streaming peak memory grows with the number of forms")
+
+if __name__ == "__main__":
+    main()
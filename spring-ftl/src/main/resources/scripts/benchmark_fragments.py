@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark the per-field fragment cache
+Renders the mapping XML and the combined block XML of a 5k-field form with
+the fragment cache off (one-shot runs) and on (--watch and the service),
+then moves fields one at a time (a new sortNumber, as
+/transform/updateFieldOrder does) and renders again. Compares the time and
+peak memory of a render without the cache and from an empty cache with the
+re-render after each edit, checks that every output matches a render
+without the cache and prints the cache hit ratios.
+"""
+
+import time
+import tracemalloc
+
+import combined
+import fragment_cache
+import mapping
+import template_registry
+
+FIELD_COUNT = 5000
+EDITS = (1, 10, 100)
+
+def create_form(field_count):
+    """Parsed fields and the area placement of each, for both generators"""
+    fields = {f"field{i}": {
+        'id': f"field{i}", 'nature': 'lov' if i % 3 == 0 else 'string', 'label': f"Libellé {i}",
+        'readOnly': 'false', 'hidden': 'false', 'lov': f"Lov{i}QueryServiceImpl", 'valueField': 'value',
+        'filters': [{'id': f"field{i + 1}", 'fieldId': f"field{i + 1}"}] if i % 5 == 0 else [],
+    } for i in range(field_count)}
+    placement = {f"field{i}": {'area': f"area{i % 3 + 1}", 'sortNumber': str(i), 'columnNumber': str(i % 2 + 1)}
+                 for i in range(field_count)}
+    return fields, placement
+
+def render_mapping(fields, placement):
+    """mapping.main's rendering, as one string"""
+    area_titles = {v: k for k, v in {
+        'area1': "Critères de lancement", 'area2': "Critères avancés", 'area3': "Critères de consolidation"}.items()}
+    area_map = [{'fieldId': field_id, 'area': {v: k for k, v in area_titles.items()}[entry['area']],
+                 'sortNumber': entry['sortNumber'], 'columnNumber': entry['columnNumber']}
+                for field_id, entry in placement.items()]
+    area_groups = mapping.group_fields_by_area(mapping.build_field_mapping_from_area_map(area_map, fields))
+    return template_registry.from_string(mapping.TEMPLATE).render({
+        'form_id': 'bench', 'fieldLinks': [], 'area_groups': area_groups, 'area_titles': mapping.AREA_TITLES,
+        'area_fragments': mapping.area_fragments(area_groups), 'static_fragments': mapping.static_fragments(fields),
+    })
+
+def render_combined(fields, placement):
+    """combined.main's rendering, as one string"""
+    return combined.generate_xml(placement, fields, {}, 'bench', combined.GenerationContext('bench'))
+
+def timed(render, *args):
+    """(output, seconds)"""
+    started = time.perf_counter()
+    output = render(*args)
+    return output, time.perf_counter() - started
+
+def peak_memory(render, *args):
+    """Peak bytes allocated by render"""
+    tracemalloc.start()
+    render(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+def uncached(render, *args):
+    """render(*args) with the fragment cache off"""
+    fragment_cache.disable()
+    try:
+        return render(*args)
+    finally:
+        fragment_cache.enable()
+
+def clear_caches():
+    fragment_cache.fields.clear()
+    fragment_cache.areas.clear()
+
+def main():
+    """Run the benchmark"""
+    print(f"🧪 {FIELD_COUNT:,}-field form; re-render after moving fields")
+    print(f"\n{'generator':<10} {'edit':<12} {'time':>9} {'peak':>8} {'areas reused':>13} {'fields reused':>14} {'output':>7}")
+
+    fragment_cache.enable()
+    all_identical = True
+    for name, render in (('mapping', render_mapping), ('combined', render_combined)):
+        fields, placement = create_form(FIELD_COUNT)
+        expected, seconds = timed(uncached, render, fields, placement)
+        peak = peak_memory(uncached, render, fields, placement)
+        print(f"{name:<10} {'no cache':<12} {seconds * 1000:>7.0f}ms {peak / 2**20:>6.1f}MB {'':>13} {'':>14} {'':>7}")
+        clear_caches()
+        output, cold = timed(render, fields, placement)
+        clear_caches()
+        peak = peak_memory(render, fields, placement)
+        identical = output == expected
+        all_identical &= identical
+        print(f"{'':<10} {'cold':<12} {cold * 1000:>7.0f}ms {peak / 2**20:>6.1f}MB {'':>13} {'':>14} "
+              f"{'same' if identical else 'DIFF':>7}")
+
+        moved = 0
+        for count in EDITS:
+            # Move `count` fields to the end of their area
+            for i in range(moved, moved + count):
+                placement[f"field{i * 7 % FIELD_COUNT}"] = dict(placement[f"field{i * 7 % FIELD_COUNT}"],
+                                                                sortNumber=str(FIELD_COUNT + i))
+            moved += count
+
+            before = fragment_cache.fragment_stats()
+            output, seconds = timed(render, fields, placement)
+            stats = fragment_cache.fragment_stats() - before
+
+            identical = output == uncached(render, fields, placement)
+            all_identical &= identical
+            print(f"{'':<10} {f'{count} moved':<12} {seconds * 1000:>7.0f}ms {'':>8} "
+                  f"{f'{stats.area_hits}/{stats.area_hits + stats.area_misses}':>13} "
+                  f"{f'{stats.field_hits}/{stats.field_hits + stats.field_misses}':>14} "
+                  f"{'same' if identical else 'DIFF':>7}")
+
+    print("\n✅ Cached and incremental output matches a render without the cache" if all_identical else "\n❌ Outputs differ")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark fuzzy label matching
+Matches misspelled labels against 10k config names with the trigram index
+of fuzzy_match and with difflib (a full comparison per name), and reports
+the time per lookup and how often the intended name comes first
+"""
+
+import difflib
+import random
+import time
+
+from fuzzy_match import TrigramMatcher
+from text_normalizer import normalize_label
+
+LABEL_COUNT = 10000
+QUERY_COUNT = 2000
+DIFFLIB_QUERIES = 50
+WORDS = ["Date", "début", "fin", "Compte", "Société", "Devise", "Opération", "Crédit", "Échéance",
+         "Taux", "Montant", "Référence", "Numéro", "Agence", "Intérêts", "échus", "décalés", "Option",
+         "compta", "précomptes", "immobilier", "Cours", "moyen", "Place", "cotation", "Instrument",
+         "Origine", "palier", "inventaire", "recherche", "portefeuille", "Valeur", "Code", "Type"]
+SYLLABLES = ["ca", "lo", "ré", "té", "mi", "pa", "vé", "gé", "tion", "ment", "ri", "so", "ber", "con",
+             "dé", "pré", "ta", "lu", "ne", "sa", "che", "por", "val", "fi", "do", "es", "cu", "ro"]
+VOCABULARY_SIZE = 3000
+
+def create_vocabulary(rng):
+    """The common business words plus generated French-looking words"""
+    words = set(WORDS)
+    while len(words) < VOCABULARY_SIZE:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+def create_labels(rng, count):
+    vocabulary = create_vocabulary(rng)
+    labels = set()
+    while len(labels) < count:
+        labels.add(" ".join(rng.sample(vocabulary, rng.randint(2, 4))).capitalize())
+    return sorted(labels)
+
+def misspell(rng, label):
+    """Typo, dropped accent, swapped words or a missing word"""
+    words = label.split()
+    kind = rng.randrange(4)
+    if kind == 0:
+        word = rng.randrange(len(words))
+        position = rng.randrange(len(words[word]))
+        words[word] = words[word][:position] + words[word][position + 1:]
+    elif kind == 1:
+        return normalize_label(label).capitalize()
+    elif kind == 2 and len(words) > 2:
+        words[0], words[1] = words[1], words[0]
+    elif len(words) > 2:
+        del words[rng.randrange(len(words))]
+    return " ".join(words)
+
+def main():
+    """Run the benchmark"""
+    rng = random.Random(17)
+    labels = create_labels(rng, LABEL_COUNT)
+    queries = [(label, misspell(rng, label)) for label in rng.sample(labels, QUERY_COUNT)]
+
+    started = time.perf_counter()
+    matcher = TrigramMatcher(labels)
+    build_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    results = [matcher.best(query) for _, query in queries]
+    trigram_time = (time.perf_counter() - started) / len(queries)
+    trigram_hits = sum(1 for (label, _), match in zip(queries, results) if match and match.value == label)
+
+    normalized = [normalize_label(label) for label in labels]
+    started = time.perf_counter()
+    difflib_hits = 0
+    for label, query in queries[:DIFFLIB_QUERIES]:
+        best = difflib.get_close_matches(normalize_label(query), normalized, n=1, cutoff=0)
+        difflib_hits += bool(best) and best[0] == normalize_label(label)
+    difflib_time = (time.perf_counter() - started) / DIFFLIB_QUERIES
+
+    print(f"🧪 {QUERY_COUNT:,} misspelled labels against {LABEL_COUNT:,} names")
+    print(f"   trigram index: built in {build_time * 1000:.0f}ms, {trigram_time * 1000:.3f}ms per lookup, "
+          f"{trigram_hits / len(queries):.1%} found")
+    print(f"   difflib:       {difflib_time * 1000:.1f}ms per lookup, "
+          f"{difflib_hits / DIFFLIB_QUERIES:.1%} found ({DIFFLIB_QUERIES} lookups)")
+    if trigram_time < 0.001:
+        print("✅ Sub-millisecond lookups")
+    else:
+        print("⚠️ Lookups take more than a millisecond")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark the JSON backends
+Parses a transformed_result.json (the given file, or a generated one) with
+every available backend, checks that they all return the same data and
+prints the time each one takes
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+import json_backend
+
+FIELDS = 50000
+REPEAT = 5
+
+def create_test_file(path, field_count):
+    """Write a transformed_result.json-shaped file with accents and nested lists"""
+    fields = {
+        f"field{i}": {
+            "nature": "lov" if i % 3 == 0 else "string",
+            "label": f"Libellé du champ n°{i}",
+            "label2": f"Échéance {i}",
+            "sortNumber": str(i),
+            "columnNumber": str(i % 2 + 1),
+            "readOnly": "false",
+            "controls": [{"id": "mandatory", "nature": "MANDATORY"}],
+            "maxLength": i % 40,
+            "ratio": i / 7,
+        }
+        for i in range(field_count)
+    }
+    data = {
+        "originalJson": {"bench": fields},
+        "labelMappings": [{"ancien": f"Champ {i}", "nouveau": f"Libellé {i}"} for i in range(field_count // 10)],
+        "areaConfigs": [],
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+def time_backend(name, path):
+    """Best of REPEAT parses with one backend"""
+    json_backend.set_backend(name)
+    best, result = None, None
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        result = json_backend.load_path(path)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def main():
+    """Run the benchmark"""
+    previous = json_backend.BACKEND
+    with tempfile.TemporaryDirectory() as workspace:
+        if len(sys.argv) > 1:
+            path = sys.argv[1]
+        else:
+            path = os.path.join(workspace, "transformed_result.json")
+            create_test_file(path, FIELDS)
+
+        size = os.path.getsize(path) / (1024 * 1024)
+        print(f"⏱️ Parsing {path} ({size:.1f} MB), best of {REPEAT}")
+        print(f"📋 Available backends: {', '.join(json_backend.available_backends())}")
+
+        with open(path, encoding='utf-8') as f:
+            reference = json.load(f)
+
+        baseline = None
+        for name in reversed(json_backend.available_backends()):
+            elapsed, result = time_backend(name, path)
+            baseline = baseline or elapsed
+            same = "✅ identical" if result == reference else "❌ DIFFERENT"
+            print(f"  {name:>8}: {elapsed:.4f}s ({size / elapsed:.1f} MB/s, {baseline / elapsed:.2f}x) {same}")
+
+    json_backend.set_backend(previous)
+    if 'orjson' not in json_backend.available_backends():
+        print("💡 Install orjson (pip install orjson) to enable the fast backend")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark label lookup
+Compares FieldMapper.find_field_by_label (label index) with the previous
+linear scan on a large synthetic form, and checks that both return the same
+field for exact, partial and missing labels
+"""
+
+import random
+import re
+import time
+
+from properties_ftl import FieldMapper
+
+FIELD_COUNT = 2000
+QUERY_COUNT = 300
+WORDS = ["Date", "début", "fin", "Compte", "Société", "Devise", "Opération", "Crédit",
+         "Échéance", "Taux", "Montant", "Référence", "Numéro", "Agence", "Option", "Intérêts"]
+
+def normalize_text(text):
+    """The previous normalization"""
+    if not text:
+        return ""
+    text = text.lower()
+    text = re.sub(r'[éèêë]', 'e', text)
+    text = re.sub(r'[àâä]', 'a', text)
+    text = re.sub(r'[ïî]', 'i', text)
+    text = re.sub(r'[ôö]', 'o', text)
+    text = re.sub(r'[ùûü]', 'u', text)
+    text = re.sub(r'[ç]', 'c', text)
+    return text
+
+def linear_find(search_label, form_data):
+    """The previous implementation: two scans over every field"""
+    search_label_norm = normalize_text(search_label)
+    for field_id, field_data in form_data.items():
+        if isinstance(field_data, dict):
+            for label_key in ['label2', 'label']:
+                if label_key in field_data:
+                    if normalize_text(field_data[label_key]) == search_label_norm:
+                        return field_id
+    for field_id, field_data in form_data.items():
+        if isinstance(field_data, dict):
+            for label_key in ['label2', 'label']:
+                if label_key in field_data:
+                    field_label = normalize_text(field_data[label_key])
+                    if search_label_norm in field_label or field_label in search_label_norm:
+                        return field_id
+    return None
+
+def create_form(rng, field_count):
+    form_data = {}
+    for i in range(field_count):
+        field = {"nature": "string"}
+        label = " ".join(rng.sample(WORDS, rng.randint(2, 4))) + f" {i}"
+        field["label"] = label
+        if rng.random() < 0.3:
+            field["label2"] = label.upper()
+        form_data[f"field{i}"] = field
+    form_data["flag"] = "not a field"
+    return form_data
+
+def create_queries(rng, form_data, count):
+    labels = [field["label"] for field in form_data.values() if isinstance(field, dict)]
+    queries = []
+    for _ in range(count):
+        label = rng.choice(labels)
+        kind = rng.randrange(5)
+        if kind == 0:
+            queries.append(label)                               # exact
+        elif kind == 1:
+            start = rng.randrange(len(label) - 3)
+            queries.append(label[start:start + rng.randint(1, 8)])  # part of a label
+        elif kind == 2:
+            queries.append(f"Libellé {label} (ancien)")         # contains a label
+        elif kind == 3:
+            queries.append(" ".join(rng.sample(WORDS, 3)))       # words only
+        else:
+            queries.append(f"absent{rng.random()}")              # no match
+    return queries + ["", "e", "zz"]
+
+def main():
+    """Run the benchmark"""
+    rng = random.Random(12)
+    form_data = create_form(rng, FIELD_COUNT)
+    queries = create_queries(rng, form_data, QUERY_COUNT)
+    mapper = FieldMapper({})
+
+    print(f"🧪 {len(queries):,} label lookups on a {FIELD_COUNT:,}-field form")
+    started = time.perf_counter()
+    expected = [linear_find(query, form_data) for query in queries]
+    linear_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    found = [mapper.find_field_by_label(query, form_data) for query in queries]
+    index_time = time.perf_counter() - started
+
+    print(f"   linear scan: {linear_time:.2f}s")
+    print(f"   label index: {index_time:.2f}s (including building the index)")
+    mismatches = [(q, e, f) for q, e, f in zip(queries, expected, found) if e != f]
+    if mismatches:
+        print(f"❌ {len(mismatches)} different results, e.g. {mismatches[0]}")
+        return
+    print(f"✅ Same field for every label, {linear_time / max(index_time, 1e-9):.0f}x faster")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark the layout engine
+Lays out every field of many forms in one batch with each policy, with and
+without NumPy, and compares with the previous per-field loops
+"""
+
+import random
+import time
+
+import layout_engine
+from layout_engine import LayoutBatch, layout, order
+
+FORM_COUNT = 1000
+FIELDS_PER_FORM = 100
+
+def create_rows(rng):
+    return [
+        (f"form{form}", f"field{field}", rng.choice(layout_engine.AREAS), str(rng.randint(1, 50)), rng.randint(1, 2))
+        for form in range(FORM_COUNT) for field in range(FIELDS_PER_FORM)
+    ]
+
+def previous_counter(rows):
+    """combine_with_temp's correct_area_sort_numbers_and_readonly before the layout engine, one form at a time"""
+    counters, results = {}, []
+    for form, _, area, sort_number, _ in rows:
+        if area != 'area1':
+            results.append(sort_number)
+            continue
+        counter = counters.setdefault(form, {'count': 0, 'current': 0})
+        if counter['count'] == 0:
+            try:
+                counter['current'] = int(sort_number)
+            except (ValueError, TypeError):
+                counter['current'] = 1
+        else:
+            counter['current'] += 10
+        counter['count'] += 1
+        results.append(str(counter['current']))
+    return results
+
+def previous_scaled(rows):
+    """data_loader / render_jinja2 before the layout engine"""
+    return [str(int(sort_number) * 10) if area == 'area1' else sort_number for _, _, area, sort_number, _ in rows]
+
+def previous_order(rows):
+    """Sorting each area of each form by int(sortNumber)"""
+    groups = {}
+    for row, (form, _, area, _, _) in enumerate(rows):
+        groups.setdefault((form, area), []).append(row)
+    result = []
+    for form in dict.fromkeys(row[0] for row in rows):
+        for area in layout_engine.AREAS:
+            result.extend(sorted(groups.get((form, area), []), key=lambda row: int(rows[row][3])))
+    return result
+
+def timed(function, *args, **kwargs):
+    started = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+def main():
+    """Run the benchmark"""
+    rows = create_rows(random.Random(18))
+    batch = LayoutBatch()
+    for row in rows:
+        batch.add(*row)
+
+    print(f"🧪 {len(rows):,} fields in {FORM_COUNT:,} forms")
+    print(f"\n{'step':<12} {'previous':>10} {'python':>9} {'numpy':>9}")
+    numpy = layout_engine.np
+    identical = True
+    for name, previous, run in (
+        ('counter', previous_counter, lambda: layout(batch, 'counter').sort_numbers),
+        ('scaled', previous_scaled, lambda: layout(batch, 'scaled').sort_numbers),
+        ('order', previous_order, lambda: order(batch)),
+    ):
+        expected, previous_time = timed(previous, rows)
+        layout_engine.np = None
+        python_result, python_time = timed(run)
+        layout_engine.np = numpy
+        numpy_result, numpy_time = timed(run) if numpy is not None else (python_result, float('nan'))
+        identical &= expected == python_result == numpy_result
+        print(f"{name:<12} {previous_time * 1000:>8.0f}ms {python_time * 1000:>7.0f}ms {numpy_time * 1000:>7.0f}ms")
+
+    if numpy is None:
+        print("\nℹ️ NumPy is not installed; only the pure Python columns were measured")
+    print("\n✅ Same layout as the previous code" if identical else "\n❌ Layouts differ")
+
+if __name__ == "__main__":
+    main()
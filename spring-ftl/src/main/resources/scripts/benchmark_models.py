@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark field models
+Builds the mapped fields of a large synthetic form the old way (a full dict
+copy per field and stage) and with models.Field overlays over the shared
+parsed attributes, and compares the memory they hold and the time to build them
+"""
+
+import time
+import tracemalloc
+
+import combined
+import mapping
+from form_model import freeze
+from models import Field
+
+FIELD_COUNT = 50000
+
+def create_form(field_count):
+    """Parsed fields with the attributes a real export carries"""
+    fields = {}
+    for i in range(field_count):
+        fields[f"field{i}"] = {
+            "nature": "string",
+            "label": f"Field {i}",
+            "sortNumber": str(i),
+            "columnNumber": "1",
+            "readOnly": "false",
+            "hidden": "false",
+            "required": "false",
+            "length": "30",
+            "lovId": None,
+            "controls": [],
+        }
+    area_map = {
+        f"field{i}": {"area": f"area{i % 8 + 1}", "sortNumber": str(i), "columnNumber": "1", "label": f"Field {i}"}
+        for i in range(0, field_count, 2)
+    }
+    return freeze(fields), area_map
+
+def copy_fields(fields, area_map):
+    """The previous implementation: every stage copies every field"""
+    mapped = {}
+    for field_id, field_data in fields.items():
+        mapping_data = area_map.get(field_id, {'area': 'area1', 'sortNumber': '1', 'columnNumber': '1'})
+        mapped[field_id] = {
+            **field_data,
+            'area': mapping_data['area'],
+            'sortNumber': mapping_data['sortNumber'],
+            'columnNumber': mapping_data['columnNumber']
+        }
+    return mapped
+
+def overlay_fields(fields, area_map):
+    """Same result with Field overlays"""
+    mapped = {}
+    for field_id, field_data in fields.items():
+        mapping_data = area_map.get(field_id, {'area': 'area1', 'sortNumber': '1', 'columnNumber': '1'})
+        mapped[field_id] = Field(field_data, {
+            'area': mapping_data['area'],
+            'sortNumber': mapping_data['sortNumber'],
+            'columnNumber': mapping_data['columnNumber']
+        })
+    return mapped
+
+def measure(build, *args):
+    """Return (result, bytes still allocated by the result, seconds)"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    result = build(*args)
+    elapsed = time.perf_counter() - started
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return result, held, elapsed
+
+def main():
+    """Run the benchmark"""
+    fields, area_map = create_form(FIELD_COUNT)
+    mapping_area_map = [{"fieldId": field_id, **entry, "area": "Critères avancés"} for field_id, entry in area_map.items()]
+
+    print(f"🧪 Building the mapped fields of a {FIELD_COUNT:,}-field form")
+    print(f"\n{'builder':<28} {'memory':>10} {'time':>9}")
+    copied, copy_bytes, copy_time = measure(copy_fields, fields, area_map)
+    overlaid, overlay_bytes, overlay_time = measure(overlay_fields, fields, area_map)
+    print(f"{'dict copies':<28} {copy_bytes / 2**20:>8.1f}MB {copy_time * 1000:>7.1f}ms")
+    print(f"{'Field overlays':<28} {overlay_bytes / 2**20:>8.1f}MB {overlay_time * 1000:>7.1f}ms")
+
+    for name, build, args in (
+        ('combined (Field)', combined.build_field_mapping_from_area_map, (area_map, fields)),
+        ('mapping (Field)', mapping.build_field_mapping_from_area_map, (mapping_area_map, fields)),
+    ):
+        _, held, elapsed = measure(build, *args)
+        print(f"{name:<28} {held / 2**20:>8.1f}MB {elapsed * 1000:>7.1f}ms")
+
+    if any(dict(overlaid[field_id]) != copied[field_id] for field_id in copied):
+        print("\n❌ Field overlays differ from the dict copies")
+        return
+    print(f"\n✅ Same fields, {copy_bytes / max(overlay_bytes, 1):.1f}x less memory held with overlays")
+
+if __name__ == "__main__":
+    main()
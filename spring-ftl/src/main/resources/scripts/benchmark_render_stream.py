@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Benchmark streaming rendering
+Renders the mapping template of a 20k-field form the previous way (render()
+to one string, then write_text) and with template_registry.render_to_file,
+checks that the files are byte-identical and compares the peak memory
+allocated while rendering
+"""
+
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import mapping
+import template_registry
+from benchmark_models import create_form
+
+FIELD_COUNT = 20000
+
+def render_then_write(template, path, data):
+    """The previous implementation"""
+    path.write_text(template.render(data), encoding="utf-8")
+
+def measure(write, *args):
+    """Return (peak bytes allocated, seconds)"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    write(*args)
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak, elapsed
+
+def main():
+    """Run the benchmark"""
+    fields, area_map = create_form(FIELD_COUNT)
+    mapping_area_map = [{"fieldId": field_id, **entry, "area": "Critères avancés"} for field_id, entry in area_map.items()]
+    area_groups = mapping.group_fields_by_area(mapping.build_field_mapping_from_area_map(mapping_area_map, fields))
+    data = {
+        "form_id": "bench",
+        "fieldLinks": [],
+        "area_groups": area_groups,
+        "area_titles": mapping.AREA_TITLES,
+        "area_fragments": mapping.area_fragments(area_groups),
+        "static_fragments": mapping.static_fragments(fields),
+    }
+    template = template_registry.from_string(mapping.TEMPLATE)
+
+    with tempfile.TemporaryDirectory() as directory:
+        previous_path, streamed_path = Path(directory) / "previous.xml", Path(directory) / "streamed.xml"
+        previous_peak, previous_time = measure(render_then_write, template, previous_path, data)
+        streamed_peak, streamed_time = measure(template_registry.render_to_file, template, streamed_path, data)
+        size = previous_path.stat().st_size
+        identical = previous_path.read_bytes() == streamed_path.read_bytes()
+
+    print(f"🧪 Mapping XML of a {FIELD_COUNT:,}-field form ({size / 2**20:.1f}MB)")
+    print(f"\n{'writer':<24} {'peak':>10} {'time':>9}")
+    print(f"{'render + write_text':<24} {previous_peak / 2**20:>8.1f}MB {previous_time * 1000:>7.0f}ms")
+    print(f"{'render_to_file':<24} {streamed_peak / 2**20:>8.1f}MB {streamed_time * 1000:>7.0f}ms")
+    print("\n✅ Byte-identical output" if identical else "\n❌ Outputs differ")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark the static panel fragments
+Renders the fields of many small forms holding both static panels through
+mapping.FIELD_TEMPLATE (field by field, without the per-field cache) and
+render_jinja2.generate_xml_directly, once rendering the panel fields with
+the form (as before) and once splicing the fragments rendered once per
+process, checks that the outputs are identical and compares the time
+"""
+
+import time
+
+import fragment_cache
+import mapping
+import render_jinja2
+from models import Area, Field, Form
+
+FORM_COUNT = 500
+FIELD_COUNT = 40
+
+def create_mapping_data():
+    """mapping's area groups for one form with both static panels"""
+    form_fields = {f"field{i}": {'nature': 'string', 'label': f"Champ {i}"} for i in range(FIELD_COUNT)}
+    form_fields['valeurPanel'] = {'nature': 'string'}
+    form_fields['csoPanel'] = {'nature': 'string'}
+    area_map = [{'fieldId': f"field{i}", 'area': "Critères avancés", 'sortNumber': str(i), 'columnNumber': '1'}
+                for i in range(0, FIELD_COUNT, 2)]
+    return mapping.group_fields_by_area(mapping.build_field_mapping_from_area_map(area_map, form_fields))
+
+def render_mapping_fields(area_groups, render):
+    """The markup of every field of the form, one by one"""
+    return [render(field) for fields in area_groups.values() for field in fields]
+
+def inline_mapping_fields(area_groups):
+    """The same fields with the static ones rendered by the template macro"""
+    return {area_id: [field.with_overlay(is_static_panel=False) if field.get('is_static_panel') else field
+                      for field in fields]
+            for area_id, fields in area_groups.items()}
+
+def create_direct_data():
+    """generate_xml_directly data for one form with both static panels"""
+    fields = {f"field{i}": {'nature': 'string', 'label2': f"Champ {i}", 'sortNumber': str(i)} for i in range(FIELD_COUNT)}
+    area_fields = {'area1': list(fields.items())[:FIELD_COUNT // 2], 'area2': list(fields.items())[FIELD_COUNT // 2:], 'area3': []}
+    area_fields['area2'].extend(render_jinja2.get_static_fields().items())
+    area_fields['area3'].extend(render_jinja2.get_consolidation_fields().items())
+    return render_jinja2.prepare_template_data({}, area_fields, {})
+
+def inline_direct_data(data):
+    """The same data with the static fields written by the emitter"""
+    areas = [Area(area, {'fields': [Field(field, {'panel': None}) for field in area['fields']]}) for area in data['areas']]
+    return Form(data, {'areas': areas})
+
+def best_time(render, count):
+    """Best of 3 passes rendering `count` forms, in seconds"""
+    times = []
+    for _ in range(3):
+        started = time.perf_counter()
+        for _ in range(count):
+            render()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+def main():
+    """Run the benchmark"""
+    area_groups = create_mapping_data()
+    inline_groups = inline_mapping_fields(area_groups)
+    direct_data = create_direct_data()
+    direct_inline = inline_direct_data(direct_data)
+
+    cases = [
+        ('mapping.FIELD_TEMPLATE', lambda: render_mapping_fields(inline_groups, mapping.render_field_fragment),
+         lambda: render_mapping_fields(area_groups, mapping.render_field_fragment)),
+        ('generate_xml_directly', lambda: render_jinja2.generate_xml_directly(direct_inline),
+         lambda: render_jinja2.generate_xml_directly(direct_data)),
+    ]
+
+    print(f"🧪 {FORM_COUNT} forms of {FIELD_COUNT} fields with both static panels")
+    print(f"\n{'target':<24} {'rendered':>10} {'spliced':>9} {'output':>8}")
+    all_identical = True
+    for name, inline, spliced in cases:
+        identical = inline() == spliced()
+        all_identical &= identical
+        print(f"{name:<24} {best_time(inline, FORM_COUNT) * 1000:>8.0f}ms "
+              f"{best_time(spliced, FORM_COUNT) * 1000:>7.0f}ms {'same' if identical else 'DIFF':>8}")
+
+    cache = fragment_cache.static_panels
+    print(f"\n📦 Static panel fragments: {cache.misses} rendered, {cache.hits} reused")
+    print("✅ Byte-identical output" if all_identical else "❌ Outputs differ")
+
+if __name__ == "__main__":
+    main()
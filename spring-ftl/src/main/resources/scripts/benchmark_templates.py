@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Benchmark the template registry
+Builds the templates embedded in the generators with jinja2.Template (as the
+generators did before), through the registry with an empty bytecode cache,
+from the bytecode cache in a fresh process, and again from memory
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from jinja2 import Template
+
+import template_registry
+
+REPEATS = 20
+
+def embedded_templates():
+    """Sources of the templates the generators build from strings"""
+    import FormService, FunctionService, GridService, Interface, combine_with_temp, mapping, screenfinal
+    return [FormService.JAVA_TEMPLATE, FunctionService.JAVA_TEMPLATE, GridService.JAVA_TEMPLATE,
+            Interface.JAVA_TEMPLATE, combine_with_temp.TEMPLATE, mapping.TEMPLATE, screenfinal.template_content]
+
+def timed(function, *args):
+    started = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - started
+
+def build_all(build, sources):
+    for source in sources:
+        build(source)
+
+def main():
+    """Run the benchmark"""
+    if len(sys.argv) > 1 and sys.argv[1] == '--load':
+        # Child process: the bytecode cache is warm, memory is not
+        print(timed(build_all, template_registry.from_string, embedded_templates()))
+        return
+
+    sources = embedded_templates()
+    print(f"🧪 {len(sources)} embedded templates")
+
+    previous = sum(timed(build_all, Template, sources) for _ in range(REPEATS)) / REPEATS
+    with tempfile.TemporaryDirectory() as cache_dir:
+        os.environ['TEMPLATE_BYTECODE_CACHE'] = cache_dir
+        cold = timed(build_all, template_registry.from_string, sources)
+        warm = sum(timed(build_all, template_registry.from_string, sources) for _ in range(REPEATS)) / REPEATS
+        output = subprocess.run([sys.executable, __file__, '--load'],
+                                capture_output=True, text=True, check=True).stdout
+        bytecode = float(output.strip().splitlines()[-1])
+
+    print(f"\n{'Template() every call':<28} {previous * 1000:>8.1f}ms")
+    print(f"{'registry, first compile':<28} {cold * 1000:>8.1f}ms")
+    print(f"{'registry, bytecode cache':<28} {bytecode * 1000:>8.1f}ms")
+    print(f"{'registry, in memory':<28} {warm * 1000:>8.1f}ms")
+    stats = template_registry.compile_stats()
+    print(f"\n✅ {stats.compiled} compiled in {stats.seconds * 1000:.1f}ms this process")
+
+if __name__ == "__main__":
+    main()
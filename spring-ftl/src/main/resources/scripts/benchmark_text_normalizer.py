@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark text normalization
+Normalizes 100k French labels with the previous regex implementations of
+mapping.py and properties_ftl.py and with text_normalizer, checks that the
+results are identical and compares the timings (first pass and repeated pass)
+"""
+
+import random
+import re
+import sys
+import time
+import unicodedata
+
+import text_normalizer
+
+LABEL_COUNT = 100000
+DISTINCT_LABELS = 20000
+WORDS = ["Date", "début", "fin", "Compte", "Société", "Devise", "Opération", "Crédit", "Échéance",
+         "Taux", "Montant", "Référence", "N°", "Agence", "Intérêts", "échus", "décalés", "Côté",
+         "Façade", "Reçu", "Noël", "Ambiguë", "Maïs", "Où", "Ça", "L'immobilier", "l’option",
+         "TCN", "(précomptes)", "€", "ŒUVRE", "ÇA", "naïve", "Ångström", "Straße", "ﬁn", "Σίσυφος"]
+SEPARATORS = [" ", " ", " ", "  ", " - ", "\t", " / ", ": ", " "]
+
+def mapping_normalize_text(text):
+    """mapping.normalize_text before text_normalizer"""
+    if not text:
+        return ""
+    text = unicodedata.normalize('NFD', text.lower())
+    text = ''.join(c for c in text if unicodedata.category(c) != 'Mn')
+    text = re.sub(r'[^ -~\w\s]', '', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text
+
+def properties_normalize_text(text):
+    """FieldMapper.normalize_text before text_normalizer"""
+    if not text:
+        return ""
+    text = text.lower()
+    text = re.sub(r'[éèêë]', 'e', text)
+    text = re.sub(r'[àâä]', 'a', text)
+    text = re.sub(r'[ïî]', 'i', text)
+    text = re.sub(r'[ôö]', 'o', text)
+    text = re.sub(r'[ùûü]', 'u', text)
+    text = re.sub(r'[ç]', 'c', text)
+    return text
+
+def create_labels(rng):
+    """LABEL_COUNT labels drawn from DISTINCT_LABELS, as labels repeat across stages"""
+    distinct = ["", " ", "  Échéance  "]
+    while len(distinct) < DISTINCT_LABELS:
+        words = rng.sample(WORDS, rng.randint(1, 5))
+        label = words[0]
+        for word in words[1:]:
+            label += rng.choice(SEPARATORS) + word
+        distinct.append(label)
+    return [rng.choice(distinct) for _ in range(LABEL_COUNT)]
+
+def timed(normalize, labels):
+    started = time.perf_counter()
+    results = [normalize(label) for label in labels]
+    return results, time.perf_counter() - started
+
+def main():
+    """Run the benchmark"""
+    labels = create_labels(random.Random(14))
+    print(f"🧪 {len(labels):,} labels ({DISTINCT_LABELS:,} distinct)")
+    print(f"\n{'normalization':<16} {'previous':>10} {'first pass':>11} {'again':>9}")
+
+    identical = True
+    for name, previous, current in (
+        ('normalize_label', mapping_normalize_text, text_normalizer.normalize_label),
+        ('fold_accents', properties_normalize_text, text_normalizer.fold_accents),
+    ):
+        current.cache_clear()
+        expected, previous_time = timed(previous, labels)
+        first, first_time = timed(current, labels)
+        again, again_time = timed(current, labels)
+        print(f"{name:<16} {previous_time * 1000:>8.0f}ms {first_time * 1000:>9.0f}ms {again_time * 1000:>7.0f}ms")
+        for label, old, new in zip(labels, expected, first):
+            if old != new:
+                print(f"❌ {name}({label!r}): {old!r} != {new!r}")
+                identical = False
+                break
+        if first != again:
+            print(f"❌ {name}: cached results differ")
+            identical = False
+
+    if not identical:
+        sys.exit(1)
+    print("\n✅ Same results as the previous implementations")
+
+if __name__ == "__main__":
+    main()
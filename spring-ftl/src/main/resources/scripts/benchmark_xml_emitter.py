@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Benchmark the XML emitter
+Builds the XML of a 20k-field form with the previous f-string generators and
+with the generators on xml_emitter (combined.generate_xml,
+render_jinja2.generate_xml_directly and the fieldlinks.py layout), checks the
+output against the previous one and compares the time. Values holding XML
+special characters must now give well-formed documents; the previous
+generate_xml_directly wrote every value raw, so most of its gap is the
+escaping. Exits with 1 when an output differs or does not parse.
+"""
+
+import io
+import sys
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+import combined
+import fieldlinks
+import xml_pretty
+from benchmark_xml_pretty import create_form
+from render_jinja2 import generate_xml_directly
+
+FIELD_COUNT = 20000
+ROUNDS = 5
+
+def previous_escape_attr(value):
+    """combined.escape_attr before xml_emitter"""
+    if value is None:
+        return ""
+    return str(value).replace('"', '&quot;').replace('<', '&lt;').replace('>', '&gt;')
+
+def previous_field_xml(field_id, field_data):
+    """combined.generate_field_xml before xml_emitter"""
+    nature = field_data.get('nature', 'string')
+    lines = [f'<field id="{previous_escape_attr(field_id)}"', f' nature="{previous_escape_attr(nature)}"']
+    for attr_name in combined.OPTIONAL_FIELD_ATTRIBUTES:
+        if attr_name in field_data:
+            lines.append(f' {attr_name}="{previous_escape_attr(field_data[attr_name])}"')
+    if nature == 'lov' and 'lov' in field_data:
+        lines.append(f' lov="{previous_escape_attr(field_data["lov"])}"')
+        for attr_name in ('valueField', 'displayTemplate'):
+            if attr_name in field_data:
+                lines.append(f' {attr_name}="{previous_escape_attr(field_data[attr_name])}"')
+    lines.append(' />')
+    return ''.join(lines)
+
+def previous_fieldlinks_xml(fieldlinks_data, generation):
+    """combined.generate_fieldlinks_xml before xml_emitter"""
+    if not fieldlinks_data or 'links' not in fieldlinks_data:
+        return '<fieldLinks />'
+    lines = ['<fieldLinks>']
+    for link in fieldlinks_data['links']:
+        lines.append('<fieldLink')
+        lines.append(f' childFieldId="{previous_escape_attr(link.get("childFieldId", ""))}"')
+        lines.append(f' id="{previous_escape_attr(link.get("id", ""))}"')
+        lines.append(f' methodName="{previous_escape_attr(link.get("methodName", ""))}"')
+        lines.append(f' nature="{previous_escape_attr(link.get("nature", "CONDITIONNALHIDDEN"))}"')
+        lines.append(f' disabled="{previous_escape_attr(link.get("disabled", "false"))}"')
+        lines.append(f' beanId="{generation.fieldlink_bean_id}">')
+        for father_id in link.get('fatherFieldIds', []):
+            lines.append(f'<fieldLinkFather fatherFieldId="{previous_escape_attr(father_id)}" />')
+        lines.append('</fieldLink>')
+    lines.append('</fieldLinks>')
+    return '\n'.join(lines)
+
+def previous_combined_xml(area_map, form_fields, fieldlinks_data, generation):
+    """combined.generate_xml before xml_emitter"""
+    area_fields = combined.group_fields_by_area(combined.build_field_mapping_from_area_map(area_map, form_fields))
+    lines = [
+        xml_pretty.XML_HEADER,
+        f'<form xmlns:jxb="http://java.sun.com/xml/ns/jaxb" xmlns:xjc="http://java.sun.com/xml/ns/jaxb/xjc" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" id="{generation.form_id}BlockForm" xsi:noNamespaceSchemaLocation="http://scheme.cf.linedata.com/function.xsd" fatherId="LotIntervallePortefeuille" beanId="{generation.form_bean_id}">',
+        '<graphic>', '<headerVisible>false</headerVisible>', '<collapsible>false</collapsible>',
+        '<collapsed>false</collapsed>', '</graphic>',
+        previous_fieldlinks_xml(fieldlinks_data, generation),
+        '<areas>',
+    ]
+    for area_id in ['area1', 'area2', 'area3']:
+        if not area_fields.get(area_id):
+            continue
+        sort_number = '1' if area_id == 'area1' else '3' if area_id == 'area2' else '2'
+        lines.append(f'<area id="{area_id}" sortNumber="{sort_number}">')
+        if area_id == 'area1':
+            lines.extend(['<graphic>', '<headerVisible>false</headerVisible>', '</graphic>'])
+        lines.append('<fields>')
+        lines.extend(previous_field_xml(field['id'], field) for field in area_fields[area_id])
+        lines.extend(['</fields>', '</area>'])
+    lines.extend(['</areas>', '</form>'])
+    return '\n'.join(lines)
+
+def previous_xml_directly(data):
+    """render_jinja2.generate_xml_directly before xml_emitter"""
+    lines = [
+        xml_pretty.XML_HEADER,
+        f'<form xmlns:jxb="http://java.sun.com/xml/ns/jaxb" xmlns:xjc="http://java.sun.com/xml/ns/jaxb/xjc" '
+        f'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" id="{data["form_id"]}" '
+        f'xsi:noNamespaceSchemaLocation="http://scheme.cf.linedata.com/function.xsd" fatherId="" beanId="{data["bean_id"]}">',
+        '    <graphic>', '        <headerVisible>false</headerVisible>', '        <collapsible>false</collapsible>',
+        '        <collapsed>false</collapsed>', '    </graphic>', '', '    <fieldLinks>',
+    ]
+    for link in data['field_links']:
+        lines.append(f'        <fieldLink childFieldId="{link["childFieldId"]}" id="{link["id"]}" methodName="{link["methodName"]}" '
+                     f'nature="{link["nature"]}" disabled="{link["disabled"]}" beanId="{link["beanId"]}">')
+        lines.extend(f'            <fieldLinkFather fatherFieldId="{father}" />' for father in link['fathers'])
+        lines.append('        </fieldLink>')
+    lines.extend(['    </fieldLinks>', '', '    <areas>'])
+    for area in data['areas']:
+        lines.extend(['', f'        <area id="{area["id"]}" sortNumber="{area["sortNumber"]}">',
+                      '            <graphic><headerVisible>false</headerVisible></graphic>', '            <fields>'])
+        for field in area['fields']:
+            attrs = [f'{name}="{field[name]}"' for name in ('id', 'nature', 'columnNumber', 'sortNumber', 'readOnly', 'hidden')]
+            attrs.extend(f'{name}="{field[name]}"' for name in ('lov', 'valueField', 'functionId', 'fkSearchField', 'displayTemplate', 'clearValueIfNotInStore')
+                         if field.get(name) and (name != 'valueField' or field['nature'] == 'lov'))
+            lines.append(f'                <field {" ".join(attrs)}>')
+            if field.get('label'):
+                lines.append(f'<label>{field["label"]}</label>')
+            if field.get('controls'):
+                lines.append('                    <controls>')
+                lines.extend(f'                        <control id="{c["id"]}" nature="{c["nature"]}" />' for c in field['controls'])
+                lines.append('                    </controls>')
+            if field.get('filters'):
+                lines.append('                    <filters>')
+                lines.extend(f'                        <filter id="{f["id"]}" fieldId="{f["fieldId"]}" />' for f in field['filters'])
+                lines.append('                    </filters>')
+            lines.append('                </field>')
+        lines.extend(['            </fields>', '        </area>'])
+    lines.extend(['', '    </areas>', '</form>'])
+    return '\n'.join(lines)
+
+def previous_fieldlinks_file(field_links, fonction_name):
+    """The body of fieldlinks.main before xml_emitter"""
+    def escape_attr(value):
+        return escape(str(value), {'"': "&quot;", "'": "&apos;"})
+
+    lines = ['<fieldLinks>']
+    for link in field_links:
+        child_id = escape_attr(link.get("childFieldId", ""))
+        disabled = str(link.get("disabled", "false")).lower()
+        lines.append(f'  <fieldLink childFieldId="{child_id}" id="link_{child_id}"')
+        lines.append(f'             methodName="is{child_id}Visible" nature="{link.get("nature", "CONDITIONNALHIDDEN")}" disabled="{disabled}"')
+        lines.append(f'             beanId="{fonction_name}FieldLinkService">')
+        lines.extend(f'    <fieldLinkFather fatherFieldId="{escape_attr(father)}" />' for father in link.get("fatherFieldIds", []))
+        lines.append('  </fieldLink>')
+    lines.append('</fieldLinks>')
+    return '\n'.join(lines)
+
+def emitter_fieldlinks_file(field_links, fonction_name):
+    """The body of fieldlinks.main on xml_emitter"""
+    out = io.StringIO()
+    fieldlinks.write_fieldlinks(out, field_links, fonction_name)
+    return out.getvalue()
+
+def create_combined_inputs(field_count, label):
+    """combined.generate_xml inputs for one form"""
+    form_fields = {f"field{i}": {
+        'id': f"field{i}",
+        'nature': 'lov' if i % 3 == 0 else 'string', 'label': label(i), 'maxLength': '30',
+        'lov': f"Lov{i}QueryServiceImpl", 'valueField': 'value', 'displayTemplate': '{value} - {longLabel}',
+    } for i in range(field_count)}
+    area_map = {f"field{i}": {'area': f"area{i % 3 + 1}", 'sortNumber': str(i), 'columnNumber': str(i % 2 + 1)}
+                for i in range(0, field_count, 2)}
+    fieldlinks_data = {'links': [{
+        'childFieldId': f"field{i}", 'id': f"link_field{i}", 'methodName': f"isField{i}Visible",
+        'fatherFieldIds': [f"field{i + 1}", f"field{i + 2}"],
+    } for i in range(0, field_count, 10)]}
+    return area_map, form_fields, fieldlinks_data
+
+def create_field_links(field_count, child):
+    """fieldlink.json entries"""
+    return [{'childFieldId': child(i), 'disabled': i % 2 == 0, 'fatherFieldIds': [f"field{i + 1}"]}
+            for i in range(field_count // 10)]
+
+def best_time(build, *args):
+    """Best of ROUNDS, in seconds"""
+    times = []
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        build(*args)
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+def peak_memory(write, *args):
+    """Peak bytes allocated by write"""
+    tracemalloc.start()
+    write(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+def previous_combined_file(path, area_map, form_fields, fieldlinks_data, generation):
+    """combined.main before xml_emitter: the document as one string, then written"""
+    path.write_text(previous_combined_xml(area_map, form_fields, fieldlinks_data, generation), encoding="utf-8")
+
+def emitter_combined_file(path, area_map, form_fields, fieldlinks_data, generation):
+    """combined.main on xml_emitter: written to the file as it is built"""
+    with open(path, 'w', encoding='utf-8') as f:
+        combined.write_xml(f, area_map, form_fields, fieldlinks_data, 'bench', generation)
+
+def pretty(xml):
+    """The document as render_jinja2.render_template writes it"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "form.xml"
+        xml_pretty.write_pretty([xml], path)
+        return path.read_bytes()
+
+def well_formed(xml):
+    """Whether the document parses"""
+    try:
+        ET.fromstring(xml.encode('utf-8'))
+        return True
+    except ET.ParseError:
+        return False
+
+def golden_cases(field_count, generation):
+    """(name, previous generator, its args, current generator, its args, normalize) for a form of field_count fields"""
+    combined_inputs = create_combined_inputs(field_count, lambda i: f"Libellé n°{i} — état")
+    direct_data = create_form(field_count)
+    field_links = create_field_links(field_count, lambda i: f"field{i}")
+    return [
+        ('combined.generate_xml', previous_combined_xml, combined_inputs + (generation,),
+         lambda *args: combined.generate_xml(*args[:3], 'bench', args[3]), combined_inputs + (generation,), None),
+        ('generate_xml_directly', previous_xml_directly, (direct_data,), generate_xml_directly, (direct_data,), pretty),
+        ('fieldlinks.main', previous_fieldlinks_file, (field_links, 'MyFunction'),
+         emitter_fieldlinks_file, (field_links, 'MyFunction'), None),
+    ]
+
+def special_character_cases(generation):
+    """(name, XML) written by each generator from values holding XML special characters"""
+    special = lambda i: f"R&D <{i}> \"quoted\" l'état"
+    area_map, form_fields, fieldlinks_data = create_combined_inputs(30, special)
+    fieldlinks_data['links'][0]['childFieldId'] = special(0)
+    direct_data = create_form(30)
+    direct_data['areas'][0]['fields'][0]['label'] = special(0)
+    direct_data['field_links'][0]['methodName'] = special(0)
+    return [
+        ('combined.generate_xml', combined.generate_xml(area_map, form_fields, fieldlinks_data, 'bench', generation)),
+        ('generate_xml_directly', generate_xml_directly(direct_data)),
+        ('fieldlinks.main', emitter_fieldlinks_file(create_field_links(30, special), 'MyFunction')),
+    ]
+
+def main():
+    """Run the benchmark"""
+    generation = combined.GenerationContext('bench')
+    combined_inputs = create_combined_inputs(FIELD_COUNT, lambda i: f"Libellé n°{i} — état")
+    cases = golden_cases(FIELD_COUNT, generation)
+
+    print(f"🧪 XML of a {FIELD_COUNT:,}-field form, best of {ROUNDS}")
+    print(f"\n{'generator':<24} {'f-strings':>10} {'emitter':>9} {'golden':>8}")
+    all_identical = True
+    for name, previous, previous_args, current, current_args, normalize in cases:
+        previous_xml, current_xml = previous(*previous_args), current(*current_args)
+        if normalize:
+            # Only the whitespace between elements changed; compare the written files
+            previous_xml, current_xml = normalize(previous_xml), normalize(current_xml)
+        identical = previous_xml == current_xml
+        all_identical &= identical
+        print(f"{name:<24} {best_time(previous, *previous_args) * 1000:>8.0f}ms "
+              f"{best_time(current, *current_args) * 1000:>7.0f}ms {'same' if identical else 'DIFF':>8}")
+    print("\n✅ Same output as the previous generators" if all_identical else "\n❌ Outputs differ")
+    print("ℹ️  generate_xml_directly now escapes about 10 values per field that the f-strings wrote raw")
+
+    with tempfile.TemporaryDirectory() as directory:
+        previous_path, emitted_path = Path(directory) / "previous.xml", Path(directory) / "emitted.xml"
+        previous_peak = peak_memory(previous_combined_file, previous_path, *combined_inputs, generation)
+        emitted_peak = peak_memory(emitter_combined_file, emitted_path, *combined_inputs, generation)
+        identical = previous_path.read_bytes() == emitted_path.read_bytes()
+    all_identical &= identical
+    print(f"{'✅' if identical else '❌'} combined.main peak memory: {previous_peak / 2**20:.1f}MB -> {emitted_peak / 2**20:.1f}MB")
+
+    # Values with XML special characters
+    all_well_formed = True
+    for name, xml in special_character_cases(generation):
+        parsed = well_formed(xml)
+        all_well_formed &= parsed
+        print(f"{'✅' if parsed else '❌'} {name}: special characters {'escaped' if parsed else 'break the XML'}")
+
+    if not (all_identical and all_well_formed):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark the streaming XML pretty-printer
+Pretty-prints the form XML of a 20k-field form the previous way (ElementTree
+parse, serialize, minidom parse, toprettyxml, line filtering) and with
+xml_pretty, checks that the files are byte-identical and compares the time
+and the peak memory allocated
+"""
+
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from xml.dom import minidom
+
+import xml_pretty
+from render_jinja2 import generate_xml_directly
+
+FIELD_COUNT = 20000
+
+def create_form(field_count):
+    """generate_xml_directly data for one form"""
+    fields = [{
+        'id': f"field{i}", 'nature': 'lov' if i % 3 == 0 else 'string', 'columnNumber': '1',
+        'sortNumber': str(i), 'readOnly': 'false', 'hidden': 'false',
+        'lov': f"Lov{i}QueryServiceImpl" if i % 3 == 0 else '', 'valueField': 'value',
+        'displayTemplate': '{value} - {longLabel}', 'clearValueIfNotInStore': 'true',
+        'label': f"Libellé n°{i} — état" if i % 2 else '',
+        'controls': [{'id': 'mandatory', 'nature': 'MANDATORY'}] if i % 4 == 0 else [],
+        'filters': [{'id': f"field{i - 1}", 'fieldId': f"field{i - 1}"}] if i % 5 == 0 else [],
+    } for i in range(field_count)]
+    return {
+        'form_id': 'benchBlockForm',
+        'bean_id': 'benchFormService',
+        'field_links': [{
+            'childFieldId': f"field{i}", 'id': f"link_field{i}", 'methodName': f"isField{i}Visible",
+            'nature': 'CONDITIONNALHIDDEN', 'disabled': 'false', 'beanId': 'benchFieldLinkService',
+            'fathers': [f"field{i + 1}"],
+        } for i in range(0, field_count, 10)],
+        'areas': [{'id': f"area{n + 1}", 'sortNumber': str(n + 1), 'fields': fields[n::3]} for n in range(3)],
+    }
+
+def previous_write(rendered_xml, output_path):
+    """render_jinja2.render_template before xml_pretty"""
+    root = ET.fromstring(rendered_xml)
+    rough_string = ET.tostring(root, encoding='utf-8')
+    reparsed = minidom.parseString(rough_string)
+    pretty_xml = reparsed.toprettyxml(indent='    ', encoding=None)
+    lines = [line for line in pretty_xml.split('\n') if line.strip()]
+    if lines and lines[0].startswith('<?xml'):
+        lines[0] = xml_pretty.XML_HEADER
+    with output_path.open('w', encoding='utf-8') as f:
+        f.write('\n'.join(lines))
+
+def measure(write, *args):
+    """Return (peak bytes allocated, seconds)"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    write(*args)
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak, elapsed
+
+def main():
+    """Run the benchmark"""
+    rendered_xml = generate_xml_directly(create_form(FIELD_COUNT))
+    print(f"🧪 Form XML of {FIELD_COUNT:,} fields ({len(rendered_xml) / 2**20:.1f}MB)")
+
+    with tempfile.TemporaryDirectory() as directory:
+        previous_path, streamed_path = Path(directory) / "previous.xml", Path(directory) / "streamed.xml"
+        previous_peak, previous_time = measure(previous_write, rendered_xml, previous_path)
+        streamed_peak, streamed_time = measure(xml_pretty.write_pretty, [rendered_xml], streamed_path)
+        identical = previous_path.read_bytes() == streamed_path.read_bytes()
+
+    print(f"\n{'pretty-printer':<24} {'peak':>10} {'time':>9}")
+    print(f"{'ElementTree + minidom':<24} {previous_peak / 2**20:>8.1f}MB {previous_time * 1000:>7.0f}ms")
+    print(f"{'xml_pretty':<24} {streamed_peak / 2**20:>8.1f}MB {streamed_time * 1000:>7.0f}ms")
+    print("\n✅ Byte-identical output" if identical else "\n❌ Outputs differ")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Incremental build cache
+Records a content hash of every generator's inputs, templates and source,
+and of the outputs it wrote, so that main.py can skip generators whose inputs
+did not change since the last successful run and whose outputs are still in
+place
+"""
+
+import ast
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+DEFAULT_CACHE_PATH = os.path.join("output", ".buildcache.json")
+CACHE_FORMAT = 2
+
+def hash_file(path):
+    """Return the sha256 of a file, or None when it does not exist"""
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    except FileNotFoundError:
+        return None
+    return digest.hexdigest()
+
+def local_imports(script_path):
+    """Return the sibling modules a script imports"""
+    script_path = Path(script_path)
+    try:
+        tree = ast.parse(script_path.read_text(encoding='utf-8'), filename=str(script_path))
+    except (OSError, SyntaxError, ValueError):
+        return []
+
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name.split('.')[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.add(node.module.split('.')[0])
+
+    siblings = []
+    for name in sorted(names):
+        candidate = script_path.parent / f"{name}.py"
+        if candidate.exists():
+            siblings.append(candidate)
+    return siblings
+
+class BuildCache:
+    """Manifest of the last successful build of every (form, generator) pair"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, force=False):
+        self.path = path
+        self.force = force
+        self.entries = {}
+        self.updates = {}
+        self.report = []
+        self._file_hashes = {}
+        self._script_hashes = {}
+        self.load()
+
+    def load(self):
+        """Load the manifest, starting empty when it is missing or unreadable"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict) and data.get('format') == CACHE_FORMAT:
+            self.entries = data.get('entries', {})
+
+    def save(self):
+        """Write the manifest, including entries recorded during this run"""
+        for key, entry in self.updates.items():
+            if entry is None:
+                self.entries.pop(key, None)
+            else:
+                self.entries[key] = entry
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'format': CACHE_FORMAT, 'entries': self.entries}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def fork(self):
+        """Copy for a worker process: same entries, nothing recorded yet"""
+        clone = BuildCache.__new__(BuildCache)
+        clone.path = self.path
+        clone.force = self.force
+        clone.entries = dict(self.entries)
+        clone.updates = {}
+        clone.report = []
+        clone._file_hashes = {}
+        clone._script_hashes = {}
+        return clone
+
+    def merge(self, updates, report):
+        """Take over entries and report lines produced by a worker process"""
+        self.updates.update(updates)
+        self.report.extend(report)
+
+    def file_hash(self, path):
+        """Hash a file once per (mtime, size) so unchanged inputs are read only once"""
+        try:
+            stat = os.stat(path)
+            key = (path, stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+        if key not in self._file_hashes:
+            self._file_hashes[key] = hash_file(path)
+        return self._file_hashes[key]
+
+    def script_hash(self, script):
+        """Hash a generator together with the sibling modules it imports"""
+        if script not in self._script_hashes:
+            digest = hashlib.sha256()
+            seen, queue = set(), [Path(script).resolve()]
+            while queue:
+                current = queue.pop(0)
+                if current in seen:
+                    continue
+                seen.add(current)
+                digest.update(current.name.encode('utf-8'))
+                digest.update((hash_file(current) or 'missing').encode('utf-8'))
+                queue.extend(local_imports(current))
+            self._script_hashes[script] = digest.hexdigest()
+        return self._script_hashes[script]
+
+    def fingerprint(self, script, inputs, templates=()):
+        """Describe everything a generator's output depends on"""
+        return {
+            'script': self.script_hash(script),
+            'inputs': {path: self.file_hash(path) for path in inputs},
+            'templates': {path: self.file_hash(path) for path in templates},
+        }
+
+    def check(self, form_id, script, fingerprint, outputs=()):
+        """Return (up_to_date, reason) for one generator run writing `outputs`"""
+        if self.force:
+            return False, "--force"
+
+        entry = self.entries.get(f"{form_id}:{script}")
+        if entry is None:
+            return False, "no previous successful build"
+
+        previous = entry.get('fingerprint', {})
+        reasons = []
+        if previous.get('script') != fingerprint['script']:
+            reasons.append("script changed")
+        for kind in ('inputs', 'templates'):
+            old, new = previous.get(kind, {}), fingerprint[kind]
+            for path in sorted(set(old) | set(new)):
+                if old.get(path) != new.get(path):
+                    reasons.append(f"{kind[:-1]} changed: {path}")
+
+        # Outputs deleted or edited since the last build are written again. They
+        # are read afresh: generators rewrite them within one mtime tick
+        written = entry.get('outputs', {})
+        for path in sorted(set(written) | set(outputs)):
+            digest = hash_file(path)
+            if path not in written:
+                reasons.append(f"output not recorded: {path}")
+            elif digest is None:
+                reasons.append(f"output missing: {path}")
+            elif digest != written[path]:
+                reasons.append(f"output changed: {path}")
+        if reasons:
+            return False, "; ".join(reasons)
+
+        missing = [path for path, digest in fingerprint['inputs'].items() if digest is None]
+        detail = f" ({len(missing)} declared inputs still missing)" if missing else ""
+        return True, (f"inputs, templates and script unchanged and outputs in place "
+                      f"since {entry.get('built_at', 'last build')}{detail}")
+
+    def record(self, form_id, script, fingerprint, outputs=()):
+        """Remember a successful run and the content of the outputs it wrote"""
+        self.updates[f"{form_id}:{script}"] = {
+            'fingerprint': fingerprint,
+            'outputs': {path: hash_file(path) for path in outputs},
+            'built_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        }
+
+    def forget(self, form_id, script):
+        """Drop the entry of a failed run so the next run retries it"""
+        self.updates[f"{form_id}:{script}"] = None
+
+    def note(self, form_id, script, action, reason):
+        """Add a line to the skipped/rebuilt report"""
+        self.report.append((form_id, script, action, reason))
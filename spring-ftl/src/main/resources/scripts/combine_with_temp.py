@@ -1,11 +1,14 @@
-import json
 import re
 from pathlib import Path
 from xml.sax.saxutils import escape
 from typing import Dict, List, Tuple, Any
-from jinja2 import Template
 import traceback
 
+from combined import find_workspace_root
+from form_model import FormModel, form_id_from_context, model_from_context
+from layout_engine import LayoutBatch, layout
+import template_registry
+
 TEMPLATE = """\
 {# Template Jinja2 généré automatiquement #}
 <form xmlns:jxb="http://java.sun.com/xml/ns/jaxb"
@@ -131,11 +134,9 @@ def escape_attr(value):
         return ""
     return escape(str(value), {'"': "&quot;", "'": "&apos;"})
 
-def load_area_config():
+def load_area_config(model):
     """Charge la configuration des areas depuis le fichier JSON"""
-    area_config_path = Path(r"C:\Users\USER\Downloads\spring-ftl\output\area_data.json")
-    with area_config_path.open(encoding="utf-8") as f:
-        return json.load(f)
+    return model.area_data
 
 def get_field_id_from_label(label, areas_data):
     """Trouve l'ID technique d'un champ à partir de son label"""
@@ -154,22 +155,18 @@ def contains_field(data, field_id):
         return field_id in data
     return False
 
-def check_static_area_dependencies(transformed_result_path):
-    """Vérifie les dépendances pour les champs statiques des areas"""
+def check_static_area_dependencies(model, form_id):
+    """Vérifie les dépendances pour les champs statiques des areas du formulaire"""
     try:
-        if not transformed_result_path.exists():
+        if not model.exists(FormModel.TRANSFORMED):
             print("❌ Fichier transformed_result.json introuvable.")
             return {"valeurPanel": False, "csoPanel": False}
 
-        with transformed_result_path.open(encoding='utf-8') as f:
-            data = json.load(f)
-
-        original_json = data.get("original_json", {})
-        aini_data = original_json.get("aini", {}) if isinstance(original_json, dict) else {}
+        form_data = model.fields(form_id)
 
         dependencies = {
-            "valeurPanel": contains_field(aini_data, "valeurPanel"),
-            "csoPanel": contains_field(aini_data, "csoPanel")
+            "valeurPanel": contains_field(form_data, "valeurPanel"),
+            "csoPanel": contains_field(form_data, "csoPanel")
         }
 
         if not dependencies.get("valeurPanel", False):
@@ -184,43 +181,90 @@ def check_static_area_dependencies(transformed_result_path):
         # Always return a dict, never a bool
         return {"valeurPanel": False, "csoPanel": False}
 
-def find_field_id_by_label(label, transformed_result_path):
+# Accepted for every label: the previous lookup always matched it
+INSTRUMENT_LABEL_ALIAS = "Type instrument"
+LABEL_TYPES = ['label', 'label1', 'label2']
+_DONE = object()
+
+class LabelGraph:
+    """Field ids by label, with label renames (ancien -> nouveau) resolved ahead of time"""
+
+    def __init__(self, fields: Dict[str, Any], label_mappings: List[Dict[str, Any]]):
+        # Label -> (position, field id) of the first field carrying it
+        self.direct = {}
+        for position, (field_id, field_data) in enumerate(fields.items()):
+            for label_type in LABEL_TYPES:
+                try:
+                    self.direct.setdefault(field_data.get(label_type), (position, field_id))
+                except TypeError:
+                    continue  # unhashable label, cannot match a mapping
+
+        # nouveau -> [ancien, ...] in mapping order
+        self.renames = {}
+        for mapping in label_mappings:
+            try:
+                self.renames.setdefault(mapping.get("nouveau"), []).append(mapping.get("ancien"))
+            except TypeError:
+                continue
+
+        self.cycles = self._find_cycles()
+        self.resolved = {label: self._resolve(label) for label in self.renames}
+
+    def _resolve(self, label):
+        """Field reached through the fewest renames, in mapping order; None if none"""
+        seen = {label}
+        level = [label]
+        while level:
+            next_level = []
+            for name in level:
+                for old_label in self.renames.get(name, ()):
+                    if old_label in self.direct:
+                        return self.direct[old_label][1]
+                    if old_label not in seen:
+                        seen.add(old_label)
+                        next_level.append(old_label)
+            level = next_level
+        return None
+
+    def _find_cycles(self):
+        """Rename chains that lead back to themselves, each as a list of labels"""
+        cycles = []
+        state = {}  # label -> 1 while on the current path, 2 when done
+        for root in self.renames:
+            if root in state:
+                continue
+            path = [root]
+            stack = [iter(self.renames.get(root, ()))]
+            state[root] = 1
+            while stack:
+                old_label = next(stack[-1], _DONE)
+                if old_label is _DONE:
+                    state[path.pop()] = 2
+                    stack.pop()
+                elif state.get(old_label) == 1:
+                    cycles.append(path[path.index(old_label):] + [old_label])
+                elif old_label not in state:
+                    state[old_label] = 1
+                    path.append(old_label)
+                    stack.append(iter(self.renames.get(old_label, ())))
+        return cycles
+
+    def field_id(self, label):
+        """Field carrying the label (or the alias), else the field its renames lead to"""
+        found = [self.direct[name] for name in (label, INSTRUMENT_LABEL_ALIAS) if name in self.direct]
+        if found:
+            return min(found)[1]
+        return self.resolved.get(label)
+
+def find_field_id_by_label(label, model, graph: LabelGraph = None, form_id: str = None):
     """
-    Find a field ID by its label using various matching strategies
+    Find a field ID by its label, directly or through the label mappings
     """
-    with transformed_result_path.open(encoding='utf-8') as f:
-        data = json.load(f)
-
-    # First try direct match in original_json
-    aini_data = data.get("original_json", {}).get("aini", {})
-    for field_id, field_data in aini_data.items():
-        if any(field_data.get(label_type) == label or field_data.get(label_type) == "Type instrument"
-               for label_type in ['label', 'label1', 'label2']):
-            return field_id
-
-    # Try matching through label_mappings
-    label_mappings = data.get("label_mappings", [])
-    for mapping in label_mappings:
-        if mapping.get("nouveau") == label or mapping.get("ancien") == "Type instrument":
-            # Found the new label, now find the field with the old label
-            old_label = mapping.get("ancien")
-            for field_id, field_data in aini_data.items():
-                if any(field_data.get(label_type) == old_label
-                      for label_type in ['label', 'label1', 'label2']):
-                    return field_id
-
-    # Try matching in area_configs
-    area_configs = data.get("area_configs", [])
-    for area in area_configs:
-        for field in area.get("fields", []):
-            if field.get("name") == label or field.get("name") == "Type instrument":
-                # Found the field, now find its ID in aini_data
-                for field_id, field_data in aini_data.items():
-                    if any(field_data.get(label_type) == field.get("name")
-                          for label_type in ['label', 'label1', 'label2']):
-                        return field_id
-
-    return None
+    # A match through the area configs always needs a field carrying the
+    # config name, i.e. a direct match, so they are not searched
+    if graph is None:
+        graph = LabelGraph(model.fields(form_id or form_id_from_context(None, model)), model.label_mappings)
+    return graph.field_id(label)
 
 def organize_fields_by_area(field_to_area: Dict[str, Dict[str, Any]],
                           field_name_to_id: Dict[str, str],
@@ -306,67 +350,37 @@ def prepare_template_data(field_links_data: Any,
 
     return template_data
 
-def correct_area_sort_numbers_and_readonly(area_id: str, field_data: Dict[str, Any], area1_sort_counter: Dict[str, int] = None) -> Dict[str, Any]:
-    """
-    Corriger les sortNumber des areas et s'assurer que readOnly est false par défaut
-    """
-    corrected_data = field_data.copy()
-   
-    # FORCER readOnly à false TOUJOURS
-    corrected_data['readOnly'] = 'false'
-   
-    # Correction des sortNumbers selon l'area
-    if area_id == 'area1' and area1_sort_counter is not None:
-        # Pour area1: le premier champ garde son sortNumber, puis +10 à chaque fois
-        if area1_sort_counter['count'] == 0:
-            # Premier champ: garder son sortNumber original
-            try:
-                original_sort = int(corrected_data.get('sortNumber', '1'))
-                area1_sort_counter['current'] = original_sort
-                corrected_data['sortNumber'] = str(original_sort)
-            except (ValueError, TypeError):
-                area1_sort_counter['current'] = 1
-                corrected_data['sortNumber'] = '1'
-        else:
-            # Champs suivants: ajouter +10 à chaque fois
-            area1_sort_counter['current'] += 10
-            corrected_data['sortNumber'] = str(area1_sort_counter['current'])
-       
-        area1_sort_counter['count'] += 1
-    elif area_id == 'area1':
-        # Fallback si pas de counter (ne devrait pas arriver)
-        try:
-            original_sort = int(corrected_data.get('sortNumber', '1'))
-            corrected_data['sortNumber'] = str(original_sort * 10)
-        except (ValueError, TypeError):
-            corrected_data['sortNumber'] = '10'
-   
-    return corrected_data
-
-def main():
+def main(context=None):
     # === Paths ===
-    fieldlink_json_path = Path(r"C:\Users\USER\Downloads\spring-ftl\output\fieldlink.json")
-    area_json_path = Path(r"C:\Users\USER\Downloads\spring-ftl\output\transformed_result.json")
-    filters_json_path = Path(r"C:\Users\USER\Downloads\spring-ftl\output\parsed_result.json")
-    base_output_dir = Path(r"C:\Users\USER\Downloads\spring-ftl\.idea\demo")
+    # The workspace of the working directory first, as in combined.py
+    script_dir = Path(__file__).parent.resolve()
+    workspace_root = find_workspace_root(Path.cwd()) or find_workspace_root(script_dir)
+    if not workspace_root:
+        print("❌ Impossible de trouver le repertoire racine du workspace")
+        return
+    input_dir = workspace_root / "output"
+    base_output_dir = workspace_root / ".idea" / "demo"
 
     try:
         # Load JSON data
-        with fieldlink_json_path.open(encoding="utf-8") as f:
-            field_links_data = json.load(f)
-        with area_json_path.open(encoding="utf-8") as f:
-            areas_data = json.load(f)
-            areas_data = areas_data.get("original_json", {}).get("aini", {})
-        with filters_json_path.open(encoding="utf-8") as f:
-            filters_list = json.load(f)
+        model = model_from_context(context, input_dir)
+        field_links_data = model.fieldlinks
+
+        # The form being generated (the first one when run on its own)
+        form_id = form_id_from_context(context, model)
+        if form_id is None:
+            raise ValueError("No form found in transformed_result.json")
+        # Copy: the instrument types field is added below
+        areas_data = dict(model.fields(form_id))
+        filters_list = model.filters
 
         # Check dependencies for static fields
-        dependencies = check_static_area_dependencies(area_json_path)
+        dependencies = check_static_area_dependencies(model, form_id)
         print("DEBUG dependencies:", dependencies, type(dependencies))
         valeurpanel_exists = dependencies.get("valeurPanel", False)
         csopanel_exists = dependencies.get("csoPanel", False)
     
-        area_config = load_area_config()
+        area_config = load_area_config(model)
 
         # Créer un mapping des noms de champs vers leurs IDs techniques
         field_name_to_id = {}
@@ -393,7 +407,6 @@ def main():
         excluded_filter_values = {"AINI", "ATCN", "1", "", "AIMM"}
 
         # Prepare output
-        form_id = "aini"
         output_subfolder = base_output_dir / form_id
         output_subfolder.mkdir(parents=True, exist_ok=True)
         output_xml_path = output_subfolder / f"{form_id}BlockForm.block.xml"
@@ -409,8 +422,13 @@ def main():
                     'column_number': field['columnNumber']
                 }
 
+        # Resolve label renames once; every label lookup below is a dict hit
+        label_graph = LabelGraph(model.fields(form_id), model.label_mappings)
+        for cycle in label_graph.cycles:
+            print(f"⚠️ Label mapping cycle ignored: {' -> '.join(map(str, reversed(cycle)))}")
+
         # Find the correct ID for Type(s) d'instrument(s)
-        instrument_types_id = find_field_id_by_label("Type(s) d'instrument(s)", area_json_path) or "ridtins"
+        instrument_types_id = find_field_id_by_label("Type(s) d'instrument(s)", model, label_graph) or "ridtins"
 
         # Add instrument types field
         instrument_types_field = {
@@ -435,23 +453,21 @@ def main():
 
         # Organiser les champs dans leurs areas respectives
         area_fields = {"area1": [], "area2": [], "area3": []}
-        area1_sort_counter = {'count': 0, 'current': 0}
-       
+        batch = LayoutBatch()
         for field_name, field_info in field_to_area.items():
-            area_id = field_info['area_id']
             field_id = field_name_to_id.get(field_name)
-           
             if field_id and field_id in areas_data:
-                field_data = areas_data[field_id].copy()
-                field_data['sortNumber'] = field_info['sort_number']
-                field_data['columnNumber'] = field_info['column_number']
-               
-                if area_id == 'area1':
-                    field_data = correct_area_sort_numbers_and_readonly(area_id, field_data, area1_sort_counter)
-                else:
-                    field_data = correct_area_sort_numbers_and_readonly(area_id, field_data)
+                batch.add(form_id, field_id, field_info['area_id'], field_info['sort_number'], field_info['column_number'])
 
-                area_fields[area_id].append((field_id, field_data))
+        # area1: the first field keeps its sortNumber, then +10 each time
+        placed = layout(batch, 'counter')
+        for row, field_id in enumerate(batch.field_ids):
+            field_data = areas_data[field_id].copy()
+            field_data['sortNumber'] = placed.sort_numbers[row]
+            field_data['columnNumber'] = placed.column_numbers[row]
+            # FORCER readOnly à false TOUJOURS
+            field_data['readOnly'] = 'false'
+            area_fields[placed.areas[row]].append((field_id, field_data))
 
         # Préparer les listes de champs pour chaque area
         fields_area1 = [field_data for field_id, field_data in area_fields['area1']]
@@ -491,12 +507,9 @@ def main():
                 'fatherFieldIds': link['fatherFieldIds']
             })
 
-        # Render template
-        template = Template(TEMPLATE)
-        xml_content = template.render(template_data)
-
-        # Write XML to file
-        output_xml_path.write_text(xml_content, encoding="utf-8")
+        # Render template straight to the XML file
+        template = template_registry.from_string(TEMPLATE)
+        template_registry.render_to_file(template, output_xml_path, template_data, encoding="utf-8")
         print(f"✅ Fichier XML généré : {output_xml_path}")
 
     except Exception as e:
@@ -11,6 +11,22 @@ import traceback
 from pathlib import Path
 from typing import Dict, Any, List
 
+import fragment_cache
+from form_model import FormModel, load_form_model, model_from_context
+from models import Field
+from xml_emitter import XmlEmitter, escape_attribute
+
+# Files read and written by this generator; main.py schedules generators from these
+INPUTS = (
+    "output/area_map.json",
+    "output/transformed_result.json",
+    "output/fieldlink.json",
+)
+OUTPUTS = (
+    "output/demo/{form_id}/{form_id}.block.xml",
+    "output/demo/{form_id}/{form_id}.block.properties",
+)
+
 def resource_path(relative_path):
     """Get absolute path to resource, works for dev and for PyInstaller"""
     try:
@@ -21,12 +37,6 @@ def resource_path(relative_path):
     
     return os.path.join(base_path, relative_path)
 
-def escape_attr(value):
-    """Escape XML attribute values"""
-    if value is None:
-        return ""
-    return str(value).replace('"', '&quot;').replace('<', '&lt;').replace('>', '&gt;')
-
 def find_workspace_root(start_path):
     """Find the workspace root directory"""
     current = Path(start_path)
@@ -36,7 +46,7 @@ def find_workspace_root(start_path):
         current = current.parent
     return None
 
-def get_form_id_from_environment():
+def get_form_id_from_environment(model=None):
     """Get form_id from environment variable or detect from data"""
     # First try environment variable
     form_id = os.environ.get('FORM_ID')
@@ -44,49 +54,51 @@ def get_form_id_from_environment():
         return form_id
     
     # Try to detect from data files
-    output_dir = Path("output")
-    if output_dir.exists():
-        transformed_path = output_dir / "transformed_result.json"
-        if transformed_path.exists():
-            try:
-                with open(transformed_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                
-                # Look for forms in the data structure
-                if 'originalJson' in data:
-                    forms = list(data['originalJson'].keys())
-                    if forms:
-                        return forms[0]  # Use first form found
-                elif isinstance(data, dict):
-                    forms = list(data.keys())
-                    if forms:
-                        return forms[0]  # Use first form found
-            except Exception as e:
-                print(f"⚠️ Error reading transformed data: {e}")
+    if model is None:
+        model = load_form_model()
+    if model.exists(FormModel.TRANSFORMED):
+        try:
+            form_id = model.first_form_id()
+            if form_id:
+                return form_id  # Use first form found
+        except Exception as e:
+            print(f"⚠️ Error reading transformed data: {e}")
     
     # Default fallback
     return "aini"
 
+class GenerationContext:
+    """Form id and bean ids resolved once for a whole generation"""
+
+    def __init__(self, form_id):
+        self.form_id = form_id
+        self.form_bean_id = f"{form_id}FormService"
+        self.fieldlink_bean_id = f"{form_id}FieldLinkServiceFieldLinkService"
+
+    @classmethod
+    def resolve(cls, model=None, context=None):
+        """Resolve the form id from the caller's form context, FORM_ID or the data files"""
+        form_id = getattr(context, 'form_id', None)
+        return cls(form_id or get_form_id_from_environment(model))
+
 def build_field_mapping_from_area_map(area_map, form_fields):
     """Build field mapping from area map and form fields"""
     mapped_fields = {}
     
     for field_id, field_data in form_fields.items():
         if field_id in area_map:
-            mapped_fields[field_id] = {
-                **field_data,
+            mapped_fields[field_id] = Field(field_data, {
                 'area': area_map[field_id]['area'],
                 'sortNumber': area_map[field_id]['sortNumber'],
                 'columnNumber': area_map[field_id]['columnNumber']
-            }
+            })
         else:
             # Default to area1 if not mapped
-            mapped_fields[field_id] = {
-                **field_data,
+            mapped_fields[field_id] = Field(field_data, {
                 'area': 'area1',
                 'sortNumber': '1',
                 'columnNumber': '1'
-            }
+            })
     
     return mapped_fields
 
@@ -105,73 +117,74 @@ def group_fields_by_area(mapped_fields):
     
     return area_fields
 
-def generate_field_xml(field_id: str, field_data: dict) -> str:
-    """Generate XML for a single field"""
-    lines = [f'<field id="{escape_attr(field_id)}"']
-    
-    # Add required attributes
+# Optional field attributes, in output order
+OPTIONAL_FIELD_ATTRIBUTES = ('columnNumber', 'sortNumber', 'readOnly', 'hidden', 'label', 'maxLength', 'defaultValue')
+
+def write_field(emitter: XmlEmitter, field_id: str, field_data: dict):
+    """Write the element of a single field"""
     nature = field_data.get('nature', 'string')
-    lines.append(f' nature="{escape_attr(nature)}"')
-    
-    # Add optional attributes
-    optional_attrs = [
-        ('columnNumber', 'columnNumber'),
-        ('sortNumber', 'sortNumber'),
-        ('readOnly', 'readOnly'),
-        ('hidden', 'hidden'),
-        ('label', 'label'),
-        ('maxLength', 'maxLength'),
-        ('defaultValue', 'defaultValue')
-    ]
-    
-    for attr_name, xml_attr in optional_attrs:
-        if attr_name in field_data:
-            lines.append(f' {xml_attr}="{escape_attr(field_data[attr_name])}"')
-    
+    parts = [f'<field id="{escape_attribute(field_id)}" nature="{escape_attribute(nature)}"']
+    parts += [f' {name}="{escape_attribute(field_data[name])}"' for name in OPTIONAL_FIELD_ATTRIBUTES if name in field_data]
+
     # Add LOV-specific attributes
     if nature == 'lov' and 'lov' in field_data:
-        lines.append(f' lov="{escape_attr(field_data["lov"])}"')
-        if 'valueField' in field_data:
-            lines.append(f' valueField="{escape_attr(field_data["valueField"])}"')
-        if 'displayTemplate' in field_data:
-            lines.append(f' displayTemplate="{escape_attr(field_data["displayTemplate"])}"')
-    
-    lines.append(' />')
-    
-    return ''.join(lines)
+        parts.append(f' lov="{escape_attribute(field_data["lov"])}"')
+        parts += [f' {name}="{escape_attribute(field_data[name])}"' for name in ('valueField', 'displayTemplate') if name in field_data]
 
-def generate_fieldlinks_xml(fieldlinks_data: dict) -> str:
-    """Generate XML for field links"""
+    parts.append(' />')
+    emitter.line(''.join(parts))
+
+def generate_field_xml(field_id: str, field_data: dict) -> str:
+    """Generate XML for a single field"""
+    emitter = XmlEmitter()
+    write_field(emitter, field_id, field_data)
+    return emitter.getvalue()
+
+def field_fragment(field, options) -> str:
+    """The element of one field, as written by an emitter with `options` (indent, newline, depth)"""
+    indent, newline, depth = options
+    emitter = XmlEmitter(indent=indent, newline=newline, depth=depth)
+    write_field(emitter, field['id'], field)
+    return emitter.getvalue()
+
+def write_fieldlinks(emitter: XmlEmitter, fieldlinks_data: dict, generation: GenerationContext = None):
+    """Write the fieldLinks element"""
     if not fieldlinks_data or 'links' not in fieldlinks_data:
-        return '<fieldLinks />'
-    
-    lines = ['<fieldLinks>']
-    
+        emitter.empty('fieldLinks')
+        return
+
+    if generation is None:
+        generation = GenerationContext.resolve()
+    bean_id = escape_attribute(generation.fieldlink_bean_id)
+    emitter.start('fieldLinks')
+
     for link in fieldlinks_data['links']:
         if not isinstance(link, dict):
             continue
-            
-        lines.append('<fieldLink')
-        lines.append(f' childFieldId="{escape_attr(link.get("childFieldId", ""))}"')
-        lines.append(f' id="{escape_attr(link.get("id", ""))}"')
-        lines.append(f' methodName="{escape_attr(link.get("methodName", ""))}"')
-        lines.append(f' nature="{escape_attr(link.get("nature", "CONDITIONNALHIDDEN"))}"')
-        lines.append(f' disabled="{escape_attr(link.get("disabled", "false"))}"')
-        
-        # Get form_id for dynamic bean ID
-        form_id = get_form_id_from_environment()
-        bean_id = f"{form_id}FieldLinkServiceFieldLinkService"
-        lines.append(f' beanId="{bean_id}">')
-        
+
+        # One attribute per line
+        emitter.start_line(
+            f'<fieldLink\n childFieldId="{escape_attribute(link.get("childFieldId", ""))}"'
+            f'\n id="{escape_attribute(link.get("id", ""))}"'
+            f'\n methodName="{escape_attribute(link.get("methodName", ""))}"'
+            f'\n nature="{escape_attribute(link.get("nature", "CONDITIONNALHIDDEN"))}"'
+            f'\n disabled="{escape_attribute(link.get("disabled", "false"))}"'
+            f'\n beanId="{bean_id}">'
+        )
+
         # Add father fields
-        father_field_ids = link.get('fatherFieldIds', [])
-        for father_id in father_field_ids:
-            lines.append(f'<fieldLinkFather fatherFieldId="{escape_attr(father_id)}" />')
-        
-        lines.append('</fieldLink>')
-    
-    lines.append('</fieldLinks>')
-    return '\n'.join(lines)
+        for father_id in link.get('fatherFieldIds', []):
+            emitter.line(f'<fieldLinkFather fatherFieldId="{escape_attribute(father_id)}" />')
+
+        emitter.end('fieldLink')
+
+    emitter.end('fieldLinks')
+
+def generate_fieldlinks_xml(fieldlinks_data: dict, generation: GenerationContext = None) -> str:
+    """Generate XML for field links"""
+    emitter = XmlEmitter()
+    write_fieldlinks(emitter, fieldlinks_data, generation)
+    return emitter.getvalue()
 
 def generate_properties_file(area_map, form_fields, output_path):
     """Generate properties file for the form"""
@@ -190,33 +203,41 @@ def generate_properties_file(area_map, form_fields, output_path):
     output_path.write_text('\n'.join(properties), encoding='utf-8')
     print(f"✅ Properties file generated at: {output_path}")
 
-def generate_xml(area_map, form_fields, fieldlinks_data, form_id):
-    """Generate complete XML form in compact format"""
+def write_xml(out, area_map, form_fields, fieldlinks_data, form_id, generation: GenerationContext = None):
+    """Write the complete XML form in compact format to a text stream"""
     # Build mapping for ALL fields
     mapped_fields = build_field_mapping_from_area_map(area_map, form_fields)
     area_fields = group_fields_by_area(mapped_fields)
 
-    # Get form_id for dynamic IDs
-    form_id = get_form_id_from_environment()
-    bean_id = f"{form_id}FormService"
+    # Dynamic IDs come from FORM_ID (or the data files), resolved once
+    if generation is None:
+        generation = GenerationContext.resolve()
+    form_id = generation.form_id
+    bean_id = generation.form_bean_id
 
     # Generate XML
-    lines = [
-        '<?xml version="1.0" encoding="UTF-8" standalone="no"?>',
-        f'<form xmlns:jxb="http://java.sun.com/xml/ns/jaxb" xmlns:xjc="http://java.sun.com/xml/ns/jaxb/xjc" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" id="{form_id}BlockForm" xsi:noNamespaceSchemaLocation="http://scheme.cf.linedata.com/function.xsd" fatherId="LotIntervallePortefeuille" beanId="{bean_id}">',
-        '<graphic>',
-        '<headerVisible>false</headerVisible>',
-        '<collapsible>false</collapsible>',
-        '<collapsed>false</collapsed>',
-        '</graphic>'
-    ]
+    emitter = XmlEmitter(out)
+    emitter.declaration()
+    emitter.start('form', [
+        ('xmlns:jxb', "http://java.sun.com/xml/ns/jaxb"),
+        ('xmlns:xjc', "http://java.sun.com/xml/ns/jaxb/xjc"),
+        ('xmlns:xsi', "http://www.w3.org/2001/XMLSchema-instance"),
+        ('id', f"{form_id}BlockForm"),
+        ('xsi:noNamespaceSchemaLocation', "http://scheme.cf.linedata.com/function.xsd"),
+        ('fatherId', "LotIntervallePortefeuille"),
+        ('beanId', bean_id),
+    ])
+    emitter.start('graphic')
+    emitter.element('headerVisible', 'false')
+    emitter.element('collapsible', 'false')
+    emitter.element('collapsed', 'false')
+    emitter.end('graphic')
 
     # Add fieldLinks
-    fieldlinks_xml = generate_fieldlinks_xml(fieldlinks_data)
-    lines.append(fieldlinks_xml)
+    write_fieldlinks(emitter, fieldlinks_data, generation)
 
     # Areas
-    lines.append('<areas>')
+    emitter.start('areas')
 
     # Process areas in order
     for area_id in ['area1', 'area2', 'area3']:
@@ -224,72 +245,77 @@ def generate_xml(area_map, form_fields, fieldlinks_data, form_id):
             continue
 
         sort_number = '1' if area_id == 'area1' else '3' if area_id == 'area2' else '2'
-        lines.append(f'<area id="{area_id}" sortNumber="{sort_number}">')
+        emitter.start('area', [('id', area_id), ('sortNumber', sort_number)])
 
         # Add graphic only for area1
         if area_id == 'area1':
-            lines.append('<graphic>')
-            lines.append('<headerVisible>false</headerVisible>')
-            lines.append('</graphic>')
-
-        lines.append('<fields>')
-
-        # Add fields
-        for field in area_fields[area_id]:
-            field_xml = generate_field_xml(field['id'], field)
-            lines.append(field_xml)
+            emitter.start('graphic')
+            emitter.element('headerVisible', 'false')
+            emitter.end('graphic')
+
+        emitter.start('fields')
+
+        # Add fields; with the fragment cache on (--watch, service), unchanged
+        # areas and fields come from the cache
+        if fragment_cache.enabled():
+            options = emitter.options
+            emitter.splice(fragment_cache.area_fragment(
+                write_field, options, area_id, area_fields[area_id],
+                lambda field: field_fragment(field, options), separator=emitter.newline))
+        else:
+            for field in area_fields[area_id]:
+                write_field(emitter, field['id'], field)
 
-        lines.append('</fields>')
-        lines.append('</area>')
+        emitter.end('fields')
+        emitter.end('area')
 
-    lines.append('</areas>')
-    lines.append('</form>')
+    emitter.end('areas')
+    emitter.end('form')
 
-    return '\n'.join(lines)
+def generate_xml(area_map, form_fields, fieldlinks_data, form_id, generation: GenerationContext = None):
+    """Generate complete XML form in compact format"""
+    emitter = XmlEmitter()
+    write_xml(emitter.out, area_map, form_fields, fieldlinks_data, form_id, generation)
+    return emitter.getvalue()
 
-def main():
+def main(context=None):
     """Main entry point"""
-    # Find workspace root
+    # Find workspace root, preferring the working directory so callers can
+    # point the generator at another workspace
     script_dir = Path(__file__).parent.resolve()
-    workspace_root = find_workspace_root(script_dir)
+    workspace_root = find_workspace_root(Path.cwd()) or find_workspace_root(script_dir)
     if not workspace_root:
         print("❌ Could not find workspace root")
         return
 
     # Set up paths
     base_path = workspace_root / "output"
-    area_map_path = base_path / "area_map.json"
-    transformed_path = base_path / "transformed_result.json"
-    fieldlinks_path = base_path / "fieldlink.json"
 
     try:
         # Load data
-        area_map = json.load(open(resource_path(str(area_map_path)), encoding="utf-8"))
-        transformed_data = json.load(open(resource_path(str(transformed_path)), encoding="utf-8"))
+        model = model_from_context(context, resource_path(str(base_path)))
+        area_map = model.area_map
 
-        # Get form data
-        if 'originalJson' in transformed_data:
-            form_id = next(iter(transformed_data['originalJson']))
-            form_fields = transformed_data['originalJson'][form_id]
-        else:
-            form_id = next(iter(transformed_data))
-            form_fields = transformed_data[form_id]
+        # Get form data: the form being generated (the first one when run on its own)
+        generation = GenerationContext.resolve(model, context)
+        form_id = generation.form_id
+        if form_id not in model.form_ids():
+            raise ValueError(f"Form {form_id} not found in transformed_result.json")
+        form_fields = model.fields(form_id)
 
         # Load field links
         fieldlinks_data = {"links": []}
-        if fieldlinks_path.exists():
-            fieldlinks_data = json.load(open(resource_path(str(fieldlinks_path)), encoding="utf-8"))
-
-        # Generate XML
-        xml_content = generate_xml(area_map, form_fields, fieldlinks_data, form_id)
+        if model.exists(FormModel.FIELDLINKS):
+            fieldlinks_data = model.fieldlinks
 
         # Create output directory
         output_dir = base_path / "demo" / form_id
         output_dir.mkdir(parents=True, exist_ok=True)
 
-        # Save XML
+        # Write XML straight to the file
         xml_path = output_dir / f"{form_id}.block.xml"
-        xml_path.write_text(xml_content, encoding="utf-8")
+        with open(xml_path, 'w', encoding='utf-8') as f:
+            write_xml(f, area_map, form_fields, fieldlinks_data, form_id, generation)
         print(f"✅ XML generated at: {xml_path}")
 
         # Generate properties file
@@ -1,29 +1,29 @@
-import json
 from pathlib import Path
 from typing import Dict, List, Any, Tuple
 
+import json_backend
+import parse_cache
+from layout_engine import LayoutBatch, layout
+from models import Field
+
 def load_area_config(area_config_path: Path) -> List[Dict[str, Any]]:
     """Load area configuration from JSON file"""
-    with area_config_path.open(encoding="utf-8") as f:
-        return json.load(f)
+    return parse_cache.load_json(area_config_path)
 
 def load_json_data(fieldlink_path, area_path, filters_path):
-    with open(fieldlink_path, encoding='utf-8') as f:
-        field_links_data = json.load(f)
-
-    with open(area_path, encoding='utf-8') as f:
-        area_data = json.load(f)
-        
-        # Corrige si les éléments sont des chaînes JSON
-        if isinstance(area_data, list) and isinstance(area_data[0], str):
-            area_data = [json.loads(item) for item in area_data]
-        elif isinstance(area_data, dict):
-            for key, value in area_data.items():
-                if isinstance(value, str):
-                    area_data[key] = json.loads(value)
-
-    with open(filters_path, encoding='utf-8') as f:
-        filters_data = json.load(f)
+    field_links_data = parse_cache.load_json(fieldlink_path)
+
+    area_data = parse_cache.load_json(area_path)
+
+    # Corrige si les éléments sont des chaînes JSON
+    if isinstance(area_data, list) and isinstance(area_data[0], str):
+        area_data = [json_backend.loads(item) for item in area_data]
+    elif isinstance(area_data, dict):
+        for key, value in area_data.items():
+            if isinstance(value, str):
+                area_data[key] = json_backend.loads(value)
+
+    filters_data = parse_cache.load_json(filters_path)
 
     return field_links_data, area_data, filters_data
 
@@ -91,21 +91,23 @@ def organize_fields_by_area(field_to_area: Dict[str, Dict[str, Any]],
     area_fields = {"area1": [], "area2": [], "area3": []}
     
     # Process fields from field_to_area
+    batch = LayoutBatch()
     for field_name, field_info in field_to_area.items():
-        area_id = field_info['area_id']
         field_id = field_name_to_id.get(field_name)
-        
         if field_id and field_id in areas_data:
-            field_data = areas_data[field_id].copy()
-            # Only multiply sortNumber by 10 for area1
-            if area_id == 'area1':
-                field_data['sortNumber'] = str(int(field_info['sort_number']) * 10)
-            else:
-                field_data['sortNumber'] = field_info['sort_number']
-            field_data['columnNumber'] = field_info['column_number']
+            batch.add(None, field_id, field_info['area_id'], field_info['sort_number'], field_info['column_number'])
+
+    # Only multiply sortNumber by 10 for area1
+    placed = layout(batch, 'scaled')
+    for row, field_id in enumerate(batch.field_ids):
+        # The source attributes are shared; only the placement is stored on the field
+        field_data = Field(areas_data[field_id], {
+            'sortNumber': placed.sort_numbers[row],
+            'columnNumber': placed.column_numbers[row],
             # Set readOnly to false by default
-            field_data['readOnly'] = "false"
-            area_fields[area_id].append((field_id, field_data))
+            'readOnly': "false",
+        })
+        area_fields[placed.areas[row]].append((field_id, field_data))
     
     return area_fields
 
@@ -1,10 +1,31 @@
 import json
 from pathlib import Path
-from xml.sax.saxutils import escape
 
-def escape_attr(value):
-    """Escape XML attribute special characters"""
-    return escape(str(value), {'"': "&quot;", "'": "&apos;"})
+from xml_emitter import XmlEmitter, escape_attribute
+
+def write_fieldlinks(out, field_links, fonction_name):
+    """Write the fieldLinks element of fieldlink.json entries to a text stream"""
+    emitter = XmlEmitter(out, indent='  ')
+    emitter.start('fieldLinks')
+    bean_id = escape_attribute(f"{fonction_name}FieldLinkService")
+
+    for link in field_links:
+        child_id = escape_attribute(link.get("childFieldId", ""))
+        nature = escape_attribute(link.get("nature", "CONDITIONNALHIDDEN"))
+        disabled = escape_attribute(str(link.get("disabled", "false")).lower())
+
+        emitter.start_line(
+            f'<fieldLink childFieldId="{child_id}" id="link_{child_id}"\n'
+            f'             methodName="is{child_id}Visible" nature="{nature}" disabled="{disabled}"\n'
+            f'             beanId="{bean_id}">'
+        )
+
+        for father in link.get("fatherFieldIds", []):
+            emitter.line(f'<fieldLinkFather fatherFieldId="{escape_attribute(father)}" />')
+
+        emitter.end('fieldLink')
+
+    emitter.end('fieldLinks')
 
 def main():
     input_json_path = Path(r"C:\Users\USER\Downloads\spring-ftl\output\fieldlink.json")
@@ -17,29 +38,8 @@ def main():
         with input_json_path.open(encoding="utf-8") as f:
             field_links = json.load(f)
 
-        lines = ['<fieldLinks>']
-
-        for link in field_links:
-            child_id = escape_attr(link.get("childFieldId", ""))
-            bean_id = f"{fonction_name}FieldLinkService"
-            method_name = f"is{child_id}Visible"
-            nature = link.get("nature", "CONDITIONNALHIDDEN")
-            disabled = str(link.get("disabled", "false")).lower()
-
-            lines.append(f'  <fieldLink childFieldId="{child_id}" id="link_{child_id}"')
-            lines.append(f'             methodName="{method_name}" nature="{nature}" disabled="{disabled}"')
-            lines.append(f'             beanId="{bean_id}">')
-
-            for father in link.get("fatherFieldIds", []):
-                father_escaped = escape_attr(father)
-                lines.append(f'    <fieldLinkFather fatherFieldId="{father_escaped}" />')
-
-            lines.append(f'  </fieldLink>')
-
-        lines.append('</fieldLinks>')
-
-        xml_content = "\n".join(lines)
-        output_xml_path.write_text(xml_content, encoding="utf-8")
+        with output_xml_path.open('w', encoding="utf-8") as out:
+            write_fieldlinks(out, field_links, fonction_name)
 
         print(f"✅ XML généré avec succès dans : {output_xml_path}")
 
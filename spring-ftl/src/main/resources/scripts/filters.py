@@ -1,6 +1,7 @@
 import json
 from pathlib import Path
-from jinja2 import Environment, FileSystemLoader
+
+import template_registry
 
 def main():
     # Using the exact old paths you gave me
@@ -40,20 +41,15 @@ def main():
         else:
             field["filters"] = []
 
-    # Initialize Jinja2
-    env = Environment(
-        loader=FileSystemLoader(str(template_dir)),
+    # Load the template (shared environment, bytecode cached)
+    template = template_registry.get_template(
+        template_dir, "filters_tmp.ftl.j2",
         trim_blocks=True,
         lstrip_blocks=True
     )
-    template = env.get_template("filters_tmp.ftl.j2")
-
-    # Render XML
-    xml_output = template.render(fields=fields, fieldLinks=fieldLinks)
 
-    # Write output
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write(xml_output)
+    # Render XML straight to the output file
+    template_registry.render_to_file(template, output_path, fields=fields, fieldLinks=fieldLinks, encoding="utf-8")
 
     print(f"[✅] Fichier XML généré : {output_path}")
 
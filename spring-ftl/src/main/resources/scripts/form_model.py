@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Shared form model
+Parses each input file of the output directory at most once per run and
+exposes it as a read-only model shared by all generators
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+import parse_cache
+from form_stream import FormIndex, iter_forms
+
+def _readonly(self, *args, **kwargs):
+    raise TypeError(f"{type(self).__name__} is read-only; copy it with dict()/list() first")
+
+class FrozenDict(dict):
+    """dict that cannot be modified in place (still passes isinstance(x, dict))"""
+
+    __slots__ = ('_hash',)
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+    __ior__ = _readonly
+
+    def __reduce__(self):
+        return FrozenDict, (dict(self),)
+
+    def __hash__(self):
+        # By value, like equality; computed on first use
+        try:
+            return self._hash
+        except AttributeError:
+            self._hash = hash(frozenset(self.items()))
+            return self._hash
+
+class FrozenList(list):
+    """list that cannot be modified in place (still passes isinstance(x, list))"""
+
+    __slots__ = ('_hash',)
+    __setitem__ = __delitem__ = _readonly
+    append = extend = insert = pop = remove = reverse = sort = clear = _readonly
+    __iadd__ = __imul__ = _readonly
+
+    def __reduce__(self):
+        return FrozenList, (list(self),)
+
+    def __hash__(self):
+        # By value, like equality; computed on first use
+        try:
+            return self._hash
+        except AttributeError:
+            self._hash = hash(tuple(self))
+            return self._hash
+
+def freeze(value):
+    """Recursively convert parsed JSON into FrozenDict/FrozenList"""
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return FrozenList(freeze(item) for item in value)
+    return value
+
+class FormModel:
+    """Read-only view of every generator input found in one output directory"""
+
+    TRANSFORMED = "transformed_result.json"
+    AREA_MAP = "area_map.json"
+    AREA_DATA = "area_data.json"
+    FIELDLINKS = "fieldlink.json"
+    FILTERS = "parsed_result.json"
+    RESPONSE = "response.json"
+    FUNCTION_NAME = "function-name-f.json"
+
+    # Forms read through the offset index that are kept in memory
+    MAX_CACHED_FORMS = 8
+
+    def __init__(self, base_dir="output"):
+        self.base_dir = Path(base_dir)
+        self._documents: Dict[str, Any] = {}
+        self._index: Optional[FormIndex] = None
+        self._forms: "OrderedDict[str, Mapping[str, Any]]" = OrderedDict()
+        self._sections: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_documents(cls, base_dir, documents: Mapping[str, Any]) -> "FormModel":
+        """Model over inputs parsed elsewhere (frozen); files of base_dir fill in the rest"""
+        model = cls(base_dir)
+        model._documents.update(documents)
+        return model
+
+    def path(self, name: str) -> Path:
+        return self.base_dir / name
+
+    def exists(self, name: str) -> bool:
+        return name in self._documents or self.path(name).exists()
+
+    def document(self, name: str, default: Any = None) -> Any:
+        """Parse an input file on first use; later calls return the same object"""
+        with self._lock:
+            if name not in self._documents:
+                path = self.path(name)
+                if not path.exists():
+                    if default is not None:
+                        return freeze(default)
+                    raise FileNotFoundError(f"No such input file: {path}")
+                self._documents[name] = freeze(parse_cache.load_json(path))
+            return self._documents[name]
+
+    # === transformed_result.json ===
+    # Single forms, form ids and the other top-level members are read through
+    # a byte-offset index, so large multi-form exports are never parsed whole
+    # unless a generator asks for `transformed` or `forms`
+
+    @property
+    def transformed(self) -> Mapping[str, Any]:
+        return self.document(self.TRANSFORMED)
+
+    def _parsed(self) -> bool:
+        return self.TRANSFORMED in self._documents
+
+    def form_index(self) -> FormIndex:
+        """Offsets of every form in transformed_result.json"""
+        with self._lock:
+            if self._index is None:
+                self._index = FormIndex.open(self.path(self.TRANSFORMED))
+            return self._index
+
+    def _section(self, *names) -> Any:
+        """Top-level member of transformed_result.json under the first name present"""
+        if self._parsed():
+            data = self.transformed
+            for name in names:
+                if name in data:
+                    return data[name]
+            return FrozenList()
+        with self._lock:
+            key = names[0]
+            if key not in self._sections:
+                index = self.form_index()
+                value = next((index.read_section(name) for name in names if name in index.sections), [])
+                self._sections[key] = freeze(value)
+            return self._sections[key]
+
+    @property
+    def forms(self) -> Mapping[str, Mapping[str, Any]]:
+        """Form id -> field id -> field attributes (parses the whole document)"""
+        data = self.transformed
+        for key in ('originalJson', 'original_json'):
+            if key in data:
+                return data[key]
+        # A transformed_result.json without the wrapper holds the forms directly
+        return data
+
+    def form_ids(self) -> List[str]:
+        if not self._parsed():
+            return self.form_index().form_ids
+        forms = self.forms
+        return list(forms.keys()) if isinstance(forms, dict) else []
+
+    def first_form_id(self) -> Optional[str]:
+        return next(iter(self.form_ids()), None)
+
+    def fields(self, form_id: Optional[str] = None) -> Mapping[str, Any]:
+        """Fields of a form, or of the first form when no id is given"""
+        if form_id is None:
+            form_id = self.first_form_id()
+        if form_id is None:
+            return FrozenDict()
+        if self._parsed():
+            return self.forms.get(form_id, FrozenDict())
+
+        with self._lock:
+            if form_id in self._forms:
+                self._forms.move_to_end(form_id)
+                return self._forms[form_id]
+            index = self.form_index()
+            if form_id not in index.forms:
+                return FrozenDict()
+            fields = freeze(index.read_form(form_id))
+            self._forms[form_id] = fields
+            while len(self._forms) > self.MAX_CACHED_FORMS:
+                self._forms.popitem(last=False)
+            return fields
+
+    def iter_forms(self):
+        """Yield (form_id, fields) one form at a time"""
+        if self._parsed():
+            yield from self.forms.items()
+            return
+        for form_id, fields in iter_forms(self.path(self.TRANSFORMED)):
+            yield form_id, freeze(fields)
+
+    def form_document(self, form_id: Optional[str] = None) -> Mapping[str, Any]:
+        """transformed_result.json reduced to a single form (the first one by default)"""
+        if form_id is None:
+            form_id = self.first_form_id()
+        if form_id is None:
+            return self.transformed
+        return FrozenDict({
+            'originalJson': FrozenDict({form_id: self.fields(form_id)}),
+            'labelMappings': self.label_mappings,
+            'areaConfigs': self.area_configs,
+        })
+
+    @property
+    def label_mappings(self) -> Sequence[Mapping[str, str]]:
+        return self._section('labelMappings', 'label_mappings')
+
+    @property
+    def area_configs(self) -> Sequence[Mapping[str, Any]]:
+        return self._section('areaConfigs', 'area_configs')
+
+    # === other inputs ===
+
+    @property
+    def area_map(self) -> Sequence[Mapping[str, Any]]:
+        return self.document(self.AREA_MAP)
+
+    @property
+    def area_data(self) -> Sequence[Mapping[str, Any]]:
+        return self.document(self.AREA_DATA)
+
+    @property
+    def fieldlinks(self) -> Any:
+        """fieldlink.json as written by the Spring service"""
+        return self.document(self.FIELDLINKS)
+
+    @property
+    def links(self) -> Sequence[Mapping[str, Any]]:
+        """Field link definitions, whatever the shape of fieldlink.json"""
+        if not self.exists(self.FIELDLINKS):
+            return FrozenList()
+        data = self.fieldlinks
+        if isinstance(data, dict):
+            return data.get('links', FrozenList())
+        return data
+
+    @property
+    def filters(self) -> Sequence[Mapping[str, Any]]:
+        """parsed_result.json: LOV and filter definitions per field"""
+        return self.document(self.FILTERS)
+
+    @property
+    def response(self) -> Mapping[str, Any]:
+        return self.document(self.RESPONSE)
+
+    @property
+    def function_name(self) -> Mapping[str, Any]:
+        return self.document(self.FUNCTION_NAME)
+
+    def function_id(self) -> str:
+        """Function id of function-name-f.json ('' when it holds none)"""
+        data = self.function_name
+        if isinstance(data, str):
+            return data
+        if isinstance(data, dict):
+            for key in ('functionId', 'function_id', 'name'):
+                if key in data:
+                    return data[key]
+            # Otherwise the first value
+            if data:
+                return list(data.values())[0]
+        return str(data) if data else ""
+
+    def response_form_id(self) -> Optional[str]:
+        """First real form of response.json (not 'default' or 'ridtins')"""
+        return next((key for key in self.response if key.lower() not in ("default", "ridtins")), None)
+
+def load_form_model(base_dir="output") -> FormModel:
+    """Model for scripts run on their own; main.py shares one model across generators"""
+    return FormModel(base_dir)
+
+def form_id_from_context(context, model: FormModel) -> Optional[str]:
+    """Form a generator renders: the caller's form context, then FORM_ID, then the first form"""
+    return getattr(context, 'form_id', None) or os.environ.get('FORM_ID') or model.first_form_id()
+
+def model_from_context(context, base_dir="output") -> FormModel:
+    """Use the run's shared model when the caller provided one for the same directory"""
+    model = getattr(context, 'model', None)
+    if model is not None and model.base_dir.resolve() == Path(base_dir).resolve():
+        return model
+    return load_form_model(base_dir)
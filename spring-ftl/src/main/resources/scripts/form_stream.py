@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Streaming form reader
+Reads transformed_result.json one form at a time instead of loading the whole
+document, and keeps a byte-offset index of the forms so a single form can be
+read with one seek. Memory use is bounded by the largest form, not by the
+number of forms in the export.
+"""
+
+import codecs
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+import json_backend
+
+CHUNK_SIZE = 1 << 20  # bytes read at a time
+INDEX_FORMAT = 1
+FORM_KEYS = ('originalJson', 'original_json')
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+
+class _Reader:
+    """Incrementally decoded text buffer that keeps track of byte offsets"""
+
+    def __init__(self, f):
+        self.f = f
+        self.utf8 = codecs.getincrementaldecoder('utf-8-sig')()
+        self.buf = ''
+        self.pos = 0            # position in buf
+        # Byte offsets are counted from a mark that only moves forward, so
+        # each character is encoded once to measure it
+        self.mark = 0
+        self.mark_offset = 0    # byte offset of buf[mark] in the file
+        self.eof = False
+
+    def fill(self, at_least=CHUNK_SIZE):
+        """Drop the text before the mark and read more; False at end of file"""
+        if self.eof:
+            return False
+        if self.mark:
+            self.buf = self.buf[self.mark:]
+            self.pos -= self.mark
+            self.mark = 0
+        chunk = self.f.read(max(at_least, CHUNK_SIZE))
+        if not chunk:
+            self.eof = True
+            self.buf += self.utf8.decode(b'', final=True)
+            return False
+        if self.mark_offset == 0 and not self.buf and chunk.startswith(codecs.BOM_UTF8):
+            # utf-8-sig drops the BOM from the text; keep byte offsets right
+            self.mark_offset = len(codecs.BOM_UTF8)
+        self.buf += self.utf8.decode(chunk)
+        return True
+
+    def byte_offset(self, pos=None):
+        """File offset of buf[pos], for positions at or after the mark; moves the mark there"""
+        pos = self.pos if pos is None else pos
+        self.mark_offset += len(self.buf[self.mark:pos].encode('utf-8'))
+        self.mark = pos
+        return self.mark_offset
+
+    def skip_whitespace(self):
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf) or not self.fill():
+                return
+
+    def peek(self):
+        self.skip_whitespace()
+        if self.pos >= len(self.buf):
+            raise ValueError(f"Unexpected end of JSON at byte {self.byte_offset()}")
+        return self.buf[self.pos]
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected '{char}' at byte {self.byte_offset()}, found '{self.buf[self.pos]}'")
+        self.pos += 1
+
+    def value(self):
+        """Decode the next JSON value; returns (value, start_byte, end_byte)"""
+        self.skip_whitespace()
+        start_pos = self.pos
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # Value runs past the buffer: read as much again and retry,
+                # so the total work stays linear in the size of the value
+                if not self.fill(len(self.buf)):
+                    raise
+                start_pos = self.pos
+                continue
+            if end == len(self.buf) and isinstance(value, (int, float)) and not self.eof:
+                # A number may continue in the next chunk
+                self.fill()
+                start_pos = self.pos
+                continue
+            break
+        start = self.byte_offset(start_pos)
+        self.pos = end
+        return value, start, self.byte_offset(end)
+
+    def members(self):
+        """Iterate the members of the object at the current position as (key, reader)"""
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key, _, _ = self.value()
+            if not isinstance(key, str):
+                raise ValueError(f"Object keys must be strings (byte {self.byte_offset()})")
+            self.expect(':')
+            yield key
+            separator = self.peek()
+            self.pos += 1
+            if separator == '}':
+                return
+            if separator != ',':
+                raise ValueError(f"Expected ',' or '}}' at byte {self.byte_offset() - 1}")
+
+def _scan(path):
+    """Single pass over the document yielding (form_id, fields, start, end) per form
+
+    Returns the index entries (forms and the other top-level members, as
+    (name, start_byte, end_byte) lists) as the generator's return value.
+    Without an originalJson wrapper the top-level members are the forms; they
+    are only known to be forms at the end, so they are not yielded.
+    """
+    forms, sections = [], []
+    wrapped = False
+    with open(path, 'rb') as f:
+        reader = _Reader(f)
+        for key in reader.members():
+            if key in FORM_KEYS and not wrapped and reader.peek() == '{':
+                wrapped = True
+                for form_id in reader.members():
+                    fields, start, end = reader.value()
+                    forms.append((form_id, start, end))
+                    yield form_id, fields, start, end
+                    del fields
+            else:
+                _, start, end = reader.value()
+                sections.append((key, start, end))
+    if not wrapped:
+        forms, sections = sections, []
+    return {'forms': forms, 'sections': sections, 'wrapped': wrapped}
+
+def _drain(scan):
+    """Run a scan to the end and return its index entries"""
+    while True:
+        try:
+            next(scan)
+        except StopIteration as stop:
+            return stop.value
+
+def _read_span(f, start, end):
+    f.seek(start)
+    return json_backend.loads(f.read(end - start))
+
+class FormIndex:
+    """Byte offsets of every form (and other top-level member) of a transformed_result.json"""
+
+    def __init__(self, path, forms, sections, wrapped=True):
+        self.path = Path(path)
+        self.forms = {form_id: (start, end) for form_id, start, end in forms}
+        self.sections = {name: (start, end) for name, start, end in sections}
+        self.wrapped = wrapped
+
+    @property
+    def form_ids(self):
+        return list(self.forms)
+
+    def read_form(self, form_id):
+        """Parse a single form's fields"""
+        start, end = self.forms[form_id]
+        with open(self.path, 'rb') as f:
+            return _read_span(f, start, end)
+
+    def read_section(self, name, default=None):
+        """Parse a top-level member such as labelMappings"""
+        if name not in self.sections:
+            return default
+        start, end = self.sections[name]
+        with open(self.path, 'rb') as f:
+            return _read_span(f, start, end)
+
+    def iter_forms(self):
+        """Yield (form_id, fields) one form at a time, in document order"""
+        with open(self.path, 'rb') as f:
+            for form_id, (start, end) in self.forms.items():
+                yield form_id, _read_span(f, start, end)
+
+    # === persistence ===
+
+    @staticmethod
+    def _stamp(path):
+        stat = os.stat(path)
+        return {'path': os.path.abspath(path), 'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+
+    @staticmethod
+    def index_path(path, cache_dir=None):
+        path = Path(path)
+        cache_dir = Path(cache_dir) if cache_dir else path.parent / ".cache"
+        digest = hashlib.sha256(os.path.abspath(path).encode('utf-8')).hexdigest()[:16]
+        return cache_dir / f"{path.stem}.{digest}.index.json"
+
+    @classmethod
+    def build(cls, path):
+        """Scan the document once"""
+        stamp = cls._stamp(path)
+        scanned = _drain(_scan(path))
+        index = cls(path, scanned['forms'], scanned['sections'], scanned['wrapped'])
+        index.stamp = stamp
+        return index
+
+    def save(self, cache_dir=None):
+        """Write the index next to the parse cache; skipped when the directory is read-only"""
+        index_path = self.index_path(self.path, cache_dir)
+        data = dict(getattr(self, 'stamp', None) or self._stamp(self.path))
+        data.update({
+            'format': INDEX_FORMAT,
+            'wrapped': self.wrapped,
+            'forms': [[form_id, start, end] for form_id, (start, end) in self.forms.items()],
+            'sections': [[name, start, end] for name, (start, end) in self.sections.items()],
+        })
+        tmp_path = index_path.with_name(f"{index_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            index_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, index_path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    @classmethod
+    def load(cls, path, cache_dir=None):
+        """Saved index of `path`, or None when missing or stale (size/mtime changed)"""
+        try:
+            with open(cls.index_path(path, cache_dir), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            stamp = cls._stamp(path)
+        except (OSError, ValueError):
+            return None
+        if data.get('format') != INDEX_FORMAT or any(data.get(key) != value for key, value in stamp.items()):
+            return None
+        index = cls(path, data['forms'], data['sections'], data.get('wrapped', True))
+        index.stamp = stamp
+        return index
+
+    @classmethod
+    def open(cls, path, cache_dir=None):
+        """Load the saved index, or build and save it"""
+        index = cls.load(path, cache_dir)
+        if index is None:
+            index = cls.build(path)
+            index.save(cache_dir)
+        return index
+
+def iter_forms(path, cache_dir=None):
+    """Yield (form_id, fields) for every form of a transformed_result.json, one at a time
+
+    Uses the saved offset index when it is current; otherwise streams the
+    document once and saves the index on the way
+    """
+    index = FormIndex.load(path, cache_dir)
+    if index is None:
+        stamp = FormIndex._stamp(path)
+        scan = _scan(path)
+        while True:
+            try:
+                form_id, fields, _, _ = next(scan)
+            except StopIteration as stop:
+                scanned = stop.value
+                break
+            yield form_id, fields
+            del fields
+        index = FormIndex(path, scanned['forms'], scanned['sections'], scanned['wrapped'])
+        index.stamp = stamp
+        index.save(cache_dir)
+        if index.wrapped:
+            return
+    yield from index.iter_forms()
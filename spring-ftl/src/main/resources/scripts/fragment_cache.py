@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Fragment cache
+Keeps pre-rendered XML fragments in memory for the whole process:
+- static panels, which never change between forms, are rendered once and
+  spliced into every form's output, keyed by panel id, target and options;
+- in long-running processes (--watch and the generator service, which call
+  enable()), the markup of each field and of each area's field list is kept
+  under the field attributes, so a re-render after a small edit (a field
+  moved through /transform/updateFieldOrder) only renders the fields that
+  changed. One-shot runs leave it disabled and render straight to the
+  output, as keeping the fragments only costs time and memory there.
+Field and area entries are bounded by size with LRU eviction.
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Mapping, NamedTuple, Optional, Sequence
+
+MAX_FIELD_BYTES = 64 * 2**20
+MAX_AREA_BYTES = 64 * 2**20
+
+_enabled = False
+
+class FragmentCache:
+    """Rendered fragments by key, with hit and miss counts"""
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        self.max_bytes = max_bytes
+        self.size = 0               # bytes held by the fragment strings
+        self.hits = 0
+        self.misses = 0
+        self._fragments = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, render: Callable[[], object]):
+        """The fragment for `key`, rendered by `render()` the first time"""
+        with self._lock:
+            fragment = self._fragments.get(key)
+            if fragment is not None:
+                self.hits += 1
+                if self.max_bytes is not None:
+                    self._fragments.move_to_end(key)
+                return fragment
+
+        # Rendering twice in a race is harmless: both give the same fragment
+        fragment = render()
+        with self._lock:
+            self.misses += 1
+            if key in self._fragments:
+                return self._fragments[key]
+            self._fragments[key] = fragment
+            if self.max_bytes is not None:
+                self.size += sys.getsizeof(fragment)
+                while self.size > self.max_bytes and len(self._fragments) > 1:
+                    self.size -= sys.getsizeof(self._fragments.popitem(last=False)[1])
+            return fragment
+
+    def clear(self):
+        with self._lock:
+            self._fragments.clear()
+            self.size = self.hits = self.misses = 0
+
+# Static panel fragments, keyed by (panel id, target, options)
+static_panels = FragmentCache()
+# Field fragments, keyed by (target, options, attribute key)
+fields = FragmentCache(MAX_FIELD_BYTES)
+# Field lists of areas, keyed by (target, options, area, attribute keys of its fields)
+areas = FragmentCache(MAX_AREA_BYTES)
+
+def enable():
+    """Keep field and area fragments for re-renders (long-running processes)"""
+    global _enabled
+    _enabled = True
+
+def disable():
+    """Render fields straight to the output again (one-shot runs)"""
+    global _enabled
+    _enabled = False
+
+def enabled() -> bool:
+    return _enabled
+
+def static_panel(panel_id: str, target: str, options: tuple, render: Callable[[], object]):
+    """The static panel `panel_id` as rendered for `target` with `options`"""
+    return static_panels.get((panel_id, target, options), render)
+
+def attribute_key(attributes: Mapping) -> Hashable:
+    """A field's attributes as a cache key; equal attributes give equal keys"""
+    key = tuple(attributes.items())
+    try:
+        hash(key)
+    except TypeError:
+        # Plain lists or dicts among the values
+        return repr(key)
+    return key
+
+def area_fragment(target: Hashable, options: tuple, area_id: str, area_fields: Sequence[Mapping],
+                  render: Callable[[Mapping], str], separator: str = '') -> str:
+    """The fragments of `area_fields` joined by `separator`
+
+    `target` identifies the markup (the template macro or the function that
+    renders a field) and `options` what else the output depends on; `render`
+    renders one field. Unchanged areas come whole from the cache; otherwise
+    only the fields whose attributes changed are rendered.
+    """
+    keys = [attribute_key(field) for field in area_fields]
+
+    def render_area():
+        return separator.join([
+            fields.get((target, options, field_key), lambda field=field: render(field))
+            for field_key, field in zip(keys, area_fields)
+        ])
+    return areas.get((target, options, area_id, tuple(keys)), render_area)
+
+class FragmentStats(NamedTuple):
+    field_hits: int
+    field_misses: int
+    area_hits: int
+    area_misses: int
+
+    def __sub__(self, other):
+        return FragmentStats(*(mine - theirs for mine, theirs in zip(self, other)))
+
+    @staticmethod
+    def ratio(hits, misses):
+        return hits / (hits + misses) if hits + misses else 0.0
+
+    @property
+    def field_ratio(self) -> float:
+        return self.ratio(self.field_hits, self.field_misses)
+
+    @property
+    def area_ratio(self) -> float:
+        return self.ratio(self.area_hits, self.area_misses)
+
+def fragment_stats() -> FragmentStats:
+    """Totals for this process; subtract an earlier snapshot to measure a stage"""
+    return FragmentStats(fields.hits, fields.misses, areas.hits, areas.misses)
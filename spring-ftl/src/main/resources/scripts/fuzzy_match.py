@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Fuzzy label matcher
+Trigram similarity search over a fixed set of labels. Labels are normalized
+(text_normalizer.normalize_label) and split into padded word trigrams kept in
+an inverted index. A lookup with a minimum score only counts the query's
+rarest trigrams (prefix filtering): a label sharing too few of them cannot
+share enough trigrams to reach the score, so only the rest are scored.
+"""
+
+import heapq
+import math
+from collections import Counter
+from itertools import chain
+from typing import Iterable, List, NamedTuple
+
+from text_normalizer import normalize_label
+
+DEFAULT_LIMIT = 3
+DEFAULT_MIN_SCORE = 0.3  # below this, labels have little more than a few letters in common
+SEARCH_THRESHOLDS = (0.9, 0.75, 0.6, 0.45)
+PREFIX_EXTRA = 2  # rare trigrams counted beyond the minimal prefix, to filter by count
+
+class Match(NamedTuple):
+    value: str
+    score: float      # Dice coefficient of the trigram sets, 0..1
+    position: int     # index of the label in the matcher, the tie-breaker
+
+def trigrams(text: str) -> frozenset:
+    """Trigrams of each word padded with a space on both sides"""
+    grams = set()
+    for word in text.split():
+        padded = f" {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+class TrigramMatcher:
+    """Best scoring labels for a query, by trigram similarity"""
+
+    def __init__(self, labels: Iterable[str], normalize=normalize_label):
+        self.normalize = normalize
+        self.labels: List[str] = []
+        self.grams: List[frozenset] = []
+        self.index = {}  # trigram -> positions of the labels containing it
+        for label in labels:
+            grams = trigrams(normalize(label))
+            position = len(self.labels)
+            self.labels.append(label)
+            self.grams.append(grams)
+            for gram in grams:
+                self.index.setdefault(gram, []).append(position)
+
+    def search(self, text: str, limit: int = DEFAULT_LIMIT, min_score: float = DEFAULT_MIN_SCORE) -> List[Match]:
+        """Up to `limit` labels scoring at least `min_score`, best first (earliest on ties)"""
+        query = trigrams(self.normalize(text))
+        if not query or limit <= 0:
+            return []
+        # High thresholds select few candidates; once `limit` labels reach a
+        # threshold, no label below it can be among the best
+        for threshold in [t for t in SEARCH_THRESHOLDS if t > min_score] + [min_score]:
+            best = self._search(query, limit, threshold)
+            if len(best) >= limit:
+                break
+        return [Match(self.labels[-negated], score, -negated) for score, negated in best]
+
+    def _search(self, query, limit, threshold):
+        """(score, -position) of the best labels scoring at least `threshold`"""
+        query_size = len(query)
+        # A score s needs at least s * |query| / (2 - s) shared trigrams. A
+        # label sharing that many shares at least `required - skipped` of the
+        # rarest trigrams, when the `skipped` most common ones are not counted
+        required = max(1, math.ceil(threshold * query_size / (2 - threshold) - 1e-9))
+        counted = min(query_size, query_size - required + 1 + PREFIX_EXTRA)
+        minimum = required - (query_size - counted)
+        postings = sorted((self.index.get(gram, ()) for gram in query), key=len)
+        shared = Counter(chain.from_iterable(postings[:counted]))
+
+        grams = self.grams
+        scored = []
+        for position, common in shared.items():
+            if common < minimum:
+                continue
+            label_grams = grams[position]
+            score = 2 * len(query & label_grams) / (query_size + len(label_grams))
+            if score >= threshold:
+                scored.append((score, -position))
+        return heapq.nlargest(limit, scored)
+
+    def best(self, text: str, min_score: float = DEFAULT_MIN_SCORE):
+        """The best match, or None"""
+        matches = self.search(text, 1, min_score)
+        return matches[0] if matches else None
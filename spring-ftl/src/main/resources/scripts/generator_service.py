@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Generator Service
+Resident job server for the XML generators. Worker processes import the
+generators and Jinja2 once and keep them loaded, together with the parsed base
+input files, which every job shares as a read-only form model. Jobs are posted
+as JSON over local HTTP or a Unix socket.
+
+    POST /jobs    {"form_id": "aini", "inputs": {"area_map.json": [...], ...}}
+    GET  /health  worker pool state and generation number
+    POST /reload  restart the workers after in-flight jobs finish
+"""
+
+import argparse
+import io
+import json
+import os
+import shutil
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import fragment_cache
+import main as workflow
+import parse_cache
+import template_registry
+from form_model import FormModel, freeze
+
+SCRIPTS_DIR = Path(__file__).parent.resolve()
+TEMPLATE_DIRS = [SCRIPTS_DIR / "templates", SCRIPTS_DIR.parent / "templates"]
+DEFAULT_SCRIPTS = ['combined.py', 'mapping.py', 'lov_impl_.py', 'screenfinal.py']
+RELOAD_POLL_INTERVAL = 1.0  # seconds
+
+# Parsed base inputs of this worker process, set by _warm_worker
+_base_inputs = None
+
+def _warm_worker(scripts, inputs_dir):
+    """Pool initializer: import the generators and parse the base inputs once per worker process"""
+    global _base_inputs
+    os.chdir(SCRIPTS_DIR)
+    # Jobs run inside short-lived workspaces: keep the template bytecode cache out of them
+    os.environ.setdefault('TEMPLATE_BYTECODE_CACHE', template_registry.cache_dir())
+    # Jobs re-render forms that mostly did not change
+    fragment_cache.enable()
+    _base_inputs = InputStore(inputs_dir)
+    _base_inputs.snapshot()
+    for script in scripts:
+        try:
+            workflow.load_generator(str(SCRIPTS_DIR / script))
+        except BaseException as e:
+            print(f"⚠️ Could not preload {script}: {e}", file=sys.stderr)
+
+def fragment_report(stats):
+    """Fragment cache reuse of one job: unchanged areas are reused whole, only changed fields are rendered"""
+    return {
+        **stats._asdict(),
+        'area_hit_ratio': round(stats.area_ratio, 4),
+        'field_hit_ratio': round(stats.field_ratio, 4),
+    }
+
+def write_json(path, content):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(content, f, ensure_ascii=False, indent=2)
+
+def prepare_workspace(workspace, job):
+    """Create the job's scratch directory and its form model: the parsed base inputs with the job's over them
+
+    Returns the model and the files written, which are not artifacts.
+    """
+    inputs_dir = workspace / 'output'
+    inputs_dir.mkdir(parents=True)
+    documents, unparsed = _base_inputs.snapshot()
+    documents.update((name, freeze(content)) for name, content in job['inputs'].items())
+
+    written = set()
+    for name, content in unparsed.items():
+        if name not in job['inputs']:
+            # Generators meet the same parse error as with the file on disk
+            (inputs_dir / name).write_bytes(content)
+            written.add(inputs_dir / name)
+    if workflow.abandoned_generators():
+        # Generators of this worker now run in subprocesses, which read their inputs from disk
+        for name, document in documents.items():
+            write_json(inputs_dir / name, document)
+            written.add(inputs_dir / name)
+    return FormModel.from_documents(inputs_dir.resolve(), documents), written
+
+def collect_artifacts(workspace, written):
+    """{path relative to the workspace: content} of every file the generators wrote"""
+    return {
+        path.relative_to(workspace).as_posix(): path.read_text(encoding='utf-8', errors='replace')
+        for path in sorted(workspace.rglob('*'))
+        if path.is_file() and path not in written
+    }
+
+def run_job(job):
+    """Worker: run every generator for one job in a scratch workspace, return its artifacts and remove it"""
+    started = time.perf_counter()
+    workspace = Path(job['work_dir']) / job['job_id']
+    stdout_router, stderr_router = workflow.install_output_routers()
+    log = io.StringIO()
+    stdout_router.capture(log)
+    stderr_router.capture(log)
+
+    previous_cwd = os.getcwd()
+    nodes = {}
+    artifacts = {}
+    fragments_before = fragment_cache.fragment_stats()
+    successful = 0
+    prepared = started
+    try:
+        model, written = prepare_workspace(workspace, job)
+        prepared = time.perf_counter()
+        os.chdir(workspace)
+        scripts = [str(SCRIPTS_DIR / script) for script in job['scripts']]
+        nodes = workflow.build_generator_dag(scripts)
+        successful = workflow.run_generator_dag(nodes, job['form_id'], True, os.path.join('.idea', 'demo'),
+                                                model=model)
+        os.chdir(previous_cwd)
+        artifacts = collect_artifacts(workspace, written)
+    except BaseException:
+        traceback.print_exc()
+    finally:
+        os.chdir(previous_cwd)
+        shutil.rmtree(workspace, ignore_errors=True)
+        stdout_router.release()
+        stderr_router.release()
+
+    return {
+        'successful': successful,
+        'attempted': len(job['scripts']),
+        'stages': {
+            Path(script).name: {'status': node.status, 'seconds': round(node.duration, 4)}
+            for script, node in nodes.items()
+        },
+        'artifacts': artifacts,
+        'prepare_seconds': round(prepared - started, 4),
+        'run_seconds': round(time.perf_counter() - prepared, 4),
+        'fragments': fragment_report(fragment_cache.fragment_stats() - fragments_before),
+        # Generators left running by a timeout; the worker must not take more jobs
+        'abandoned': workflow.abandoned_generators(),
+        'log': log.getvalue(),
+    }
+
+class InputStore:
+    """Base input files kept parsed in memory and re-parsed when they change on disk"""
+
+    def __init__(self, inputs_dir):
+        self.inputs_dir = Path(inputs_dir)
+        self._files = {}      # name -> ((mtime, size), frozen document, bytes when it does not parse)
+        self._lock = threading.Lock()
+
+    def snapshot(self):
+        """Return ({name: frozen document}, {name: bytes of the files that do not parse}), re-reading only changed files"""
+        documents, unparsed = {}, {}
+        with self._lock:
+            for path in sorted(self.inputs_dir.glob('*.json')):
+                stat = path.stat()
+                key = (stat.st_mtime_ns, stat.st_size)
+                cached = self._files.get(path.name)
+                if cached is None or cached[0] != key:
+                    try:
+                        cached = (key, freeze(parse_cache.load_json(path)), None)
+                    except ValueError:
+                        cached = (key, None, path.read_bytes())
+                    self._files[path.name] = cached
+                if cached[2] is None:
+                    documents[path.name] = cached[1]
+                else:
+                    unparsed[path.name] = cached[2]
+        return documents, unparsed
+
+class GeneratorService:
+    """Owns the warm worker pool and swaps it when generators or templates change"""
+
+    def __init__(self, inputs_dir, work_dir, workers, scripts=DEFAULT_SCRIPTS):
+        self.inputs_dir = Path(inputs_dir).resolve()
+        self.work_dir = Path(work_dir).resolve()
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        self.workers = workers
+        self.scripts = list(scripts)
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._pool = None
+        self._watched = self._watched_mtimes()
+        self._stop = threading.Event()
+        self._start_pool()
+
+    def _start_pool(self):
+        pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_warm_worker,
+            initargs=(self.scripts, str(self.inputs_dir))
+        )
+        with self._lock:
+            previous, self._pool = self._pool, pool
+            self.generation += 1
+        if previous is not None:
+            # Jobs already submitted to the old pool still run to completion
+            previous.shutdown(wait=False)
+
+    def _watched_mtimes(self):
+        files = list(SCRIPTS_DIR.glob('*.py'))
+        for directory in TEMPLATE_DIRS:
+            if directory.exists():
+                files.extend(directory.rglob('*.j2'))
+        return {str(path): path.stat().st_mtime_ns for path in files if path.exists()}
+
+    def reload(self, reason="requested"):
+        """Start fresh workers; new jobs go to them while old jobs finish"""
+        print(f"🔄 Reloading generators ({reason})")
+        self._watched = self._watched_mtimes()
+        self._start_pool()
+
+    def watch(self):
+        """Background loop reloading the workers when a generator or template changes"""
+        while not self._stop.wait(RELOAD_POLL_INTERVAL):
+            current = self._watched_mtimes()
+            if current != self._watched:
+                changed = sorted(set(current.items()) ^ set(self._watched.items()))
+                self.reload(f"changed: {', '.join(sorted({Path(path).name for path, _ in changed}))}")
+
+    def submit(self, request):
+        """Run one job and return its artifacts and timings"""
+        received = time.perf_counter()
+        form_id = request.get('form_id')
+        if not form_id or not isinstance(form_id, str):
+            raise ValueError("'form_id' is required")
+        bundle = request.get('inputs') or {}
+        if not isinstance(bundle, dict):
+            raise ValueError("'inputs' must be an object of file name -> JSON content")
+
+        for name in bundle:
+            if Path(name).name != name:
+                raise ValueError(f"input names must be plain file names: {name}")
+
+        job_id = uuid.uuid4().hex[:12]
+        job = {'job_id': job_id, 'work_dir': str(self.work_dir), 'form_id': form_id,
+               'scripts': self.scripts, 'inputs': bundle}
+        while True:
+            with self._lock:
+                pool, generation = self._pool, self.generation
+            try:
+                future = pool.submit(run_job, job)
+                break
+            except RuntimeError:
+                # The pool was swapped by a reload between the lookup and the submit
+                continue
+        result = future.result()
+        if result['abandoned']:
+            # A timed-out generator keeps running in its worker and would share
+            # the worker's cwd and modules with the next jobs: retire the pool
+            self.reload(f"timed out: {', '.join(result['abandoned'])}")
+
+        result.update({
+            'job_id': job_id,
+            'form_id': form_id,
+            'generation': generation,
+            'timings': {
+                'prepare_seconds': result.pop('prepare_seconds'),
+                'run_seconds': result.pop('run_seconds'),
+                'total_seconds': round(time.perf_counter() - received, 4),
+            },
+        })
+        return result
+
+    def close(self):
+        self._stop.set()
+        with self._lock:
+            pool = self._pool
+        pool.shutdown(wait=True)
+
+class JobRequestHandler(BaseHTTPRequestHandler):
+    """JSON endpoints of the generator service"""
+
+    service = None
+
+    def address_string(self):
+        # Unix socket peers have no host/port
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False, indent=2).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send_json(200, {
+                'status': 'ok',
+                'generation': self.service.generation,
+                'workers': self.service.workers,
+                'scripts': self.service.scripts,
+            })
+        else:
+            self._send_json(404, {'error': f"unknown endpoint {self.path}"})
+
+    def do_POST(self):
+        if self.path == '/reload':
+            self.service.reload()
+            self._send_json(200, {'status': 'reloaded', 'generation': self.service.generation})
+            return
+        if self.path != '/jobs':
+            self._send_json(404, {'error': f"unknown endpoint {self.path}"})
+            return
+
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length) or b'{}')
+            self._send_json(200, self.service.submit(request))
+        except ValueError as e:
+            self._send_json(400, {'error': str(e)})
+        except Exception as e:
+            traceback.print_exc()
+            self._send_json(500, {'error': str(e)})
+
+if hasattr(socketserver, 'UnixStreamServer'):
+    class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        """HTTP over a Unix domain socket, one thread per request"""
+        daemon_threads = True
+
+        def server_bind(self):
+            socketserver.UnixStreamServer.server_bind(self)
+            self.server_name = 'localhost'
+            self.server_port = 0
+
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Resident XML generator service")
+    parser.add_argument('--host', default='127.0.0.1', help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=8765, help="port to listen on (default: 8765)")
+    parser.add_argument('--socket', help="listen on this Unix socket path instead of TCP")
+    parser.add_argument('--workers', type=workflow.positive_int, default=os.cpu_count() or 1,
+                        help="number of warm worker processes (default: CPU count)")
+    parser.add_argument('--inputs', default='output', help="directory holding the base JSON inputs (default: output)")
+    parser.add_argument('--work-dir', default=os.path.join(tempfile.gettempdir(), 'chorus-generator-jobs'),
+                        help="directory for the scratch workspaces of running jobs")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Start the service and serve until interrupted"""
+    args = parse_args(argv)
+    workflow.setup_environment()
+
+    service = GeneratorService(args.inputs, args.work_dir, args.workers)
+    JobRequestHandler.service = service
+    threading.Thread(target=service.watch, name='template-watcher', daemon=True).start()
+
+    if args.socket:
+        if not hasattr(socketserver, 'UnixStreamServer'):
+            raise SystemExit("❌ Unix sockets are not available on this platform")
+        if os.path.exists(args.socket):
+            os.unlink(args.socket)
+        server = ThreadingUnixHTTPServer(args.socket, JobRequestHandler)
+        where = args.socket
+    else:
+        server = ThreadingHTTPServer((args.host, args.port), JobRequestHandler)
+        where = f"http://{args.host}:{args.port}"
+
+    print(f"🚀 Generator service listening on {where} with {args.workers} workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n⚠️ Service interrupted by user")
+    finally:
+        server.server_close()
+        service.close()
+        if args.socket and os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Input file watchers
+Report which watched input files changed, using inotify on Linux and mtime
+polling everywhere else
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+
+POLL_INTERVAL = 0.5  # seconds
+
+# inotify event flags (see <sys/inotify.h>)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = os.O_NONBLOCK
+_EVENT_HEADER = struct.Struct('iIII')
+
+def _normalize(path):
+    return os.path.normpath(os.path.abspath(path))
+
+class PollingWatcher:
+    """Detect changes by comparing (mtime, size) of every watched file"""
+
+    name = "mtime polling"
+
+    def __init__(self, paths, interval=POLL_INTERVAL):
+        self.paths = {_normalize(path): path for path in paths}
+        self.interval = interval
+        self._state = {path: self._stat(path) for path in self.paths}
+
+    @staticmethod
+    def _stat(path):
+        try:
+            stat = os.stat(path)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def _poll(self):
+        changed = set()
+        for path, original in self.paths.items():
+            state = self._stat(path)
+            if state != self._state[path]:
+                self._state[path] = state
+                changed.add(original)
+        return changed
+
+    def wait(self, timeout=None):
+        """Block until a watched file changes or the timeout expires; return the changed paths"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            changed = self._poll()
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            pause = self.interval if deadline is None else min(self.interval, max(deadline - time.monotonic(), 0))
+            time.sleep(pause)
+
+    def close(self):
+        pass
+
+class InotifyWatcher:
+    """Detect changes with Linux inotify on the directories holding the watched files"""
+
+    name = "inotify"
+    MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+    def __init__(self, paths):
+        libc_name = ctypes.util.find_library('c') or 'libc.so.6'
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self.paths = {_normalize(path): path for path in paths}
+        self._directories = {}
+        for path in self.paths:
+            directory = os.path.dirname(path)
+            if directory in self._directories.values():
+                continue
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), self.MASK)
+            if wd < 0:
+                self.close()
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+            self._directories[wd] = directory
+
+    def _read_events(self):
+        changed = set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, _mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            directory = self._directories.get(wd)
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, os.fsdecode(name))
+            if path in self.paths:
+                changed.add(self.paths[path])
+        return changed
+
+    def wait(self, timeout=None):
+        """Block until a watched file changes or the timeout expires; return the changed paths"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+            ready, _, _ = select.select([self._fd], [], [], remaining)
+            if not ready:
+                return set()
+            changed = self._read_events()
+            if changed:
+                return changed
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+def create_watcher(paths):
+    """Use inotify where the platform has it, mtime polling otherwise"""
+    if sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(paths)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(paths)
+
+def collect_changes(watcher, debounce):
+    """Wait for a change, then keep collecting until the files are quiet for `debounce` seconds"""
+    changed = watcher.wait()
+    first_change = time.perf_counter()
+    while True:
+        more = watcher.wait(debounce)
+        if not more:
+            return changed, first_change
+        changed |= more
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+JSON backend
+Single entry point for parsing the generator input files. Uses orjson when it
+is installed and the standard library otherwise; set JSON_BACKEND=json (or
+call set_backend) to force a specific parser.
+"""
+
+import json
+import os
+
+JSONDecodeError = json.JSONDecodeError
+
+def _stdlib_loads(data):
+    return json.loads(data)
+
+_BACKENDS = {'json': _stdlib_loads}
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+else:
+    def _orjson_loads(data):
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # orjson is stricter than the standard library (NaN, integers wider
+            # than 64 bits, lone surrogates, BOM); parse those files the slow way
+            # so every backend accepts and returns exactly the same data
+            return json.loads(data)
+
+    _BACKENDS['orjson'] = _orjson_loads
+
+# Fastest first
+_PREFERENCE = ('orjson', 'json')
+
+def available_backends():
+    """Names of the parsers that can be used in this environment"""
+    return [name for name in _PREFERENCE if name in _BACKENDS]
+
+def set_backend(name):
+    """Select the parser used by loads/load/load_path"""
+    global BACKEND, _loads
+    if name not in _BACKENDS:
+        raise ValueError(f"JSON backend '{name}' is not available (available: {', '.join(available_backends())})")
+    BACKEND = name
+    _loads = _BACKENDS[name]
+
+def loads(data):
+    """Parse JSON from str or bytes"""
+    return _loads(data)
+
+def load(fp):
+    """Parse JSON from a file object opened in text or binary mode"""
+    return _loads(fp.read())
+
+def load_path(path):
+    """Parse a UTF-8 JSON file"""
+    with open(path, 'rb') as f:
+        return _loads(f.read())
+
+set_backend(os.environ.get('JSON_BACKEND') or available_backends()[0])
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Label index
+Normalized field labels of one form, indexed once so that label lookups do
+not rescan (and renormalize) every field. Exact matches are a dict lookup;
+partial matches go through an n-gram index of the labels instead of a scan.
+Results are the same as scanning the fields in order, label2 before label.
+"""
+
+from typing import Callable, Dict, List, Optional, Set
+
+LABEL_KEYS = ('label2', 'label')
+GRAM_SIZE = 3
+
+class SubstringIndex:
+    """Texts in insertion order, searchable by equality and by substring in both directions
+
+    Every lookup returns the position of the first matching text, so results
+    are the same as a scan of the texts in order.
+    """
+
+    def __init__(self):
+        self.texts: List[str] = []
+        # Text -> first position, for exact matches and "text in search"
+        self.positions: Dict[str, int] = {}
+        # n-grams (length 1..GRAM_SIZE) -> positions, for "search in text"
+        self.grams: Dict[str, Set[int]] = {}
+        self.longest = 0
+
+    def add(self, text: str) -> int:
+        position = len(self.texts)
+        self.texts.append(text)
+        self.positions.setdefault(text, position)
+        self.longest = max(self.longest, len(text))
+        for size in range(1, min(GRAM_SIZE, len(text)) + 1):
+            for start in range(len(text) - size + 1):
+                self.grams.setdefault(text[start:start + size], set()).add(position)
+        return position
+
+    def first_equal(self, search: str) -> Optional[int]:
+        return self.positions.get(search)
+
+    def first_related(self, search: str) -> Optional[int]:
+        """First position whose text contains `search` or is contained in it"""
+        best = self.first_containing(search)
+        contained = self.first_contained_in(search)
+        if contained is not None and (best is None or contained < best):
+            best = contained
+        return best
+
+    def first_contained_in(self, search: str) -> Optional[int]:
+        """First position whose text is a substring of `search`"""
+        # Look up each substring of the search no longer than the longest text
+        best = None
+        length = len(search)
+        for start in range(length + 1):
+            for end in range(start, min(length, start + self.longest) + 1):
+                position = self.positions.get(search[start:end])
+                if position is not None and (best is None or position < best):
+                    best = position
+        return best
+
+    def first_containing(self, search: str) -> Optional[int]:
+        """First position whose text contains `search`"""
+        if not self.texts:
+            return None
+        if not search:
+            return 0
+        if len(search) <= GRAM_SIZE:
+            positions = self.grams.get(search)
+            return min(positions) if positions else None
+
+        # Candidates share every n-gram of the search; check them in order
+        postings: List[Set[int]] = []
+        for start in range(len(search) - GRAM_SIZE + 1):
+            positions = self.grams.get(search[start:start + GRAM_SIZE])
+            if not positions:
+                return None
+            postings.append(positions)
+        postings.sort(key=len)
+        candidates = postings[0].intersection(*postings[1:])
+        for position in sorted(candidates):
+            if search in self.texts[position]:
+                return position
+        return None
+
+class LabelIndex:
+    """Exact and substring lookup of field ids by normalized label"""
+
+    def __init__(self, form_data, normalize: Callable[[str], str]):
+        self.normalize = normalize
+        # Field id of each label, in scan order; the position is the match priority
+        self.field_ids = []
+        self.labels = SubstringIndex()
+
+        for field_id, field_data in form_data.items():
+            if not isinstance(field_data, dict):
+                continue
+            for label_key in LABEL_KEYS:
+                if label_key in field_data:
+                    self.labels.add(normalize(field_data[label_key]))
+                    self.field_ids.append(field_id)
+
+    def find(self, search_label) -> Optional[str]:
+        """Field id of the first exact match, else of the first partial match"""
+        search = self.normalize(search_label)
+        position = self.labels.first_equal(search)
+        if position is None:
+            position = self.labels.first_related(search)
+        return None if position is None else self.field_ids[position]
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Layout engine
+Computes the area, sortNumber and columnNumber of the fields of one or more
+forms in a single batched pass. Fields are added to a LayoutBatch as parallel
+columns; a policy assigns the numbers for the whole batch at once, and
+order() returns the rows grouped by form and area, stably sorted by sort
+number. The batched steps run on NumPy arrays when NumPy is installed and on
+plain lists otherwise; both give the same results.
+
+Each generator renders one form per run, so its batch holds every field of
+that form, all areas together; batches of many forms only come up when a
+caller lays out several forms at once (benchmark_layout.py).
+
+Policies (the rules the generators have always used):
+  counter    the first area1 field of a form keeps its sort number, each
+             next one gets +10; other areas are unchanged (combine_with_temp)
+  scaled     area1 sort numbers are multiplied by 10; other areas are
+             unchanged (data_loader, render_jinja2)
+  next_free  fields without a mapping go to area1, numbered from the form's
+             first area1 sort number in steps of 10 (mapping)
+"""
+
+from typing import Any, Dict, Hashable, List, NamedTuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+AREAS = ('area1', 'area2', 'area3')
+SORT_STEP = 10
+
+class Layout(NamedTuple):
+    """Assigned values, one per batch row"""
+    areas: List[str]
+    sort_numbers: List[Any]
+    column_numbers: List[Any]
+
+class LayoutBatch:
+    """Fields of one or more forms, as parallel columns"""
+
+    def __init__(self):
+        self.form_codes: List[int] = []
+        self.area_codes: List[int] = []
+        self.field_ids: List[str] = []
+        self.areas: List[str] = []
+        self.sort_numbers: List[Any] = []
+        self.column_numbers: List[Any] = []
+        self.mapped: List[bool] = []
+        self._forms: Dict[Hashable, int] = {}
+        self._areas: Dict[str, int] = {area: code for code, area in enumerate(AREAS)}
+
+    def add(self, form, field_id, area, sort_number=None, column_number=1, mapped=True) -> int:
+        """Add a field; returns its row"""
+        self.form_codes.append(self._forms.setdefault(form, len(self._forms)))
+        self.area_codes.append(self._areas.setdefault(area, len(self._areas)))
+        self.field_ids.append(field_id)
+        self.areas.append(area)
+        self.sort_numbers.append(sort_number)
+        self.column_numbers.append(column_number)
+        self.mapped.append(mapped)
+        return len(self.field_ids) - 1
+
+    def __len__(self):
+        return len(self.field_ids)
+
+# === batched helpers ===
+
+def _group_ranks(groups, selected):
+    """For each selected row, its rank among the selected rows of its group (input order)"""
+    if np is not None:
+        groups = np.asarray(groups, dtype=np.int64)
+        rows = np.flatnonzero(np.asarray(selected, dtype=bool))
+        ranks = np.zeros(len(groups), dtype=np.int64)
+        if len(rows):
+            keys = groups[rows]
+            by_group = np.argsort(keys, kind='stable')
+            sorted_keys = keys[by_group]
+            positions = np.arange(len(rows))
+            starts = np.concatenate(([True], sorted_keys[1:] != sorted_keys[:-1]))
+            first = np.maximum.accumulate(np.where(starts, positions, 0))
+            ranks[rows[by_group]] = positions - first
+        return ranks.tolist()
+    ranks, counts = [0] * len(groups), {}
+    for row, (group, chosen) in enumerate(zip(groups, selected)):
+        if chosen:
+            ranks[row] = counts.get(group, 0)
+            counts[group] = ranks[row] + 1
+    return ranks
+
+def _steps(bases, ranks):
+    """bases + SORT_STEP * ranks, elementwise, as Python ints"""
+    if np is not None:
+        try:
+            return (np.asarray(bases, dtype=np.int64) + SORT_STEP * np.asarray(ranks, dtype=np.int64)).tolist()
+        except OverflowError:
+            pass  # numbers beyond 64 bits
+    return [base + SORT_STEP * rank for base, rank in zip(bases, ranks)]
+
+def _first_sort(value):
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return 1
+
+# === policies ===
+
+def _counter(batch: LayoutBatch, options) -> Layout:
+    area1 = [code == 0 for code in batch.area_codes]
+    ranks = _group_ranks(batch.form_codes, area1)
+    firsts = {}
+    for row, form in enumerate(batch.form_codes):
+        if area1[row] and form not in firsts:
+            firsts[form] = _first_sort(batch.sort_numbers[row])
+    values = _steps([firsts.get(form, 0) for form in batch.form_codes], ranks)
+    sort_numbers = [str(value) if chosen else original
+                    for value, chosen, original in zip(values, area1, batch.sort_numbers)]
+    return Layout(list(batch.areas), sort_numbers, list(batch.column_numbers))
+
+def _scaled(batch: LayoutBatch, options) -> Layout:
+    # Parsing the strings dominates; a single pass is as fast as arrays here
+    sort_numbers = [str(int(value) * SORT_STEP) if code == 0 else value
+                    for value, code in zip(batch.sort_numbers, batch.area_codes)]
+    return Layout(list(batch.areas), sort_numbers, list(batch.column_numbers))
+
+def _next_free(batch: LayoutBatch, options) -> Layout:
+    # start: form -> first sort number for its unmapped fields (default SORT_STEP)
+    starts = options.get('start', {})
+    start_by_code = {code: starts.get(form, SORT_STEP) for form, code in batch._forms.items()}
+    unmapped = [not mapped for mapped in batch.mapped]
+    ranks = _group_ranks(batch.form_codes, unmapped)
+    values = _steps([start_by_code[form] for form in batch.form_codes], ranks)
+    areas = [AREAS[0] if chosen else area for chosen, area in zip(unmapped, batch.areas)]
+    sort_numbers = [value if chosen else original
+                    for value, chosen, original in zip(values, unmapped, batch.sort_numbers)]
+    return Layout(areas, sort_numbers, list(batch.column_numbers))
+
+POLICIES = {
+    'counter': _counter,
+    'scaled': _scaled,
+    'next_free': _next_free,
+}
+
+def layout(batch: LayoutBatch, policy: str, **options) -> Layout:
+    """Assign area, sortNumber and columnNumber to every row with the given policy"""
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown layout policy: {policy} (choose from {', '.join(POLICIES)})")
+    return POLICIES[policy](batch, options)
+
+def order(batch: LayoutBatch, sort_numbers: List[Any] = None, column_numbers: List[Any] = None) -> List[int]:
+    """Rows grouped by form then area, stably sorted by int(sortNumber) (then int(columnNumber))"""
+    sort_keys = [int(value) for value in (batch.sort_numbers if sort_numbers is None else sort_numbers)]
+    keys = [sort_keys, batch.area_codes, batch.form_codes]
+    if column_numbers is not None:
+        keys.insert(0, [int(value) for value in column_numbers])
+    if np is not None and len(batch):
+        try:
+            # lexsort sorts by the last key first and is stable
+            return np.lexsort([np.asarray(key, dtype=np.int64) for key in keys]).tolist()
+        except OverflowError:
+            pass  # numbers beyond 64 bits
+    return sorted(range(len(batch)), key=list(zip(*reversed(keys))).__getitem__)
@@ -3,23 +3,61 @@
 Script to generate Spring XML configuration from parsed_result.json using the provided template.
 """
 
-import sys
 import os
 
-def resource_path(relative_path):
-    if hasattr(sys, '_MEIPASS'):
-        return os.path.join(sys._MEIPASS, relative_path)
-    return os.path.join(os.path.abspath('.'), relative_path)
-
 import json
-from jinja2 import Template
 
-def load_json_data(file_path):
+from form_model import FormModel, model_from_context
+import template_registry
+
+# Files read and written by this generator; main.py schedules generators from these
+INPUTS = (
+    "output/parsed_result.json",
+    "output/function-name-f.json",
+)
+OUTPUTS = (
+    ".idea/demo/{function_id}/{function_id}LovServiceImpl.spring.xml",
+)
+
+# Spring configuration template, with INVERTED logic
+TEMPLATE = '''<bean id="genericLovQueryService"
+        class="com.linedata.chorus.std.services.commons.service.lov.service.impl.GenericLovQueryServiceImpl">
+    <property name="frameworkJdbcTemplate" ref="chorusDaoTemplate" />
+    <property name="sqlListOfValuesQuery">
+      <map merge="true">
+        {% for field in fields if field.isWithParam %}
+        <entry key="{{ field.fieldId }}{{ functionId }}_valuesList_01">
+          <bean class="org.apache.commons.io.IOUtils" factory-method="toString">
+            <constructor-arg type="java.io.InputStream"
+              value="classpath:com/linedata/chorus/std/services/commons/dao/lovvalue/{{ field.methode }}.sql" />
+          </bean>
+        </entry>
+        {% endfor %}
+      </map>
+    </property>
+  </bean>
+  {% for field in fields if not field.isWithParam %}
+  <bean id="{{ field.fieldId }}{{ functionId }}LovQueryService"
+        class="com.linedata.chorus.std.services.commons.service.lov.service.impl.{{ field.fieldId }}{{ functionId }}LovQueryServiceImpl">
+    <property name="frameworkJdbcTemplate" ref="chorusDaoTemplate" />
+    <property name="sqlListOfValuesQuery">
+      <map merge="true">
+        <entry key="{{ field.fieldId }}{{ functionId }}LovQueryService">
+          <bean class="org.apache.commons.io.IOUtils" factory-method="toString">
+            <constructor-arg type="java.io.InputStream"
+              value="classpath:com/linedata/chorus/std/services/commons/dao/lovvalue/{{ field.methode }}.sql" />
+          </bean>
+        </entry>
+      </map>
+    </property>
+  </bean>
+  {% endfor %}'''
+
+def load_json_data(model, file_name):
     """Load and parse the JSON data file."""
+    file_path = model.path(file_name)
     try:
-        with open(resource_path(file_path), 'r', encoding='utf-8') as file:
-            data = json.load(file)
-        return data
+        return model.document(file_name)
     except FileNotFoundError:
         print(f"Error: File {file_path} not found.")
         return None
@@ -27,26 +65,11 @@ def load_json_data(file_path):
         print(f"Error parsing JSON: {e}")
         return None
 
-def load_function_id(file_path):
+def load_function_id(model, file_name):
     """Load the function ID from the function-name-f.json file."""
+    file_path = model.path(file_name)
     try:
-        with open(resource_path(file_path), 'r', encoding='utf-8') as file:
-            data = json.load(file)
-        # Assuming the function ID is stored as a simple string or in a key
-        # You may need to adjust this based on the actual structure of your JSON
-        if isinstance(data, str):
-            return data
-        elif isinstance(data, dict) and 'functionId' in data:
-            return data['functionId']
-        elif isinstance(data, dict) and 'function_id' in data:
-            return data['function_id']
-        elif isinstance(data, dict) and 'name' in data:
-            return data['name']
-        else:
-            # If it's a dict, try to get the first value
-            if isinstance(data, dict) and data:
-                return list(data.values())[0]
-            return str(data) if data else ""
+        return model.function_id()
     except FileNotFoundError:
         print(f"Warning: Function ID file {file_path} not found. Using empty function ID.")
         return ""
@@ -81,64 +104,29 @@ def process_fields(data):
 def generate_spring_config(fields, function_id=''):
     """Generate Spring XML configuration using the template."""
     
-    # Define the template string with INVERTED logic
-    template_str = '''<bean id="genericLovQueryService"
-        class="com.linedata.chorus.std.services.commons.service.lov.service.impl.GenericLovQueryServiceImpl">
-    <property name="frameworkJdbcTemplate" ref="chorusDaoTemplate" />
-    <property name="sqlListOfValuesQuery">
-      <map merge="true">
-        {% for field in fields if field.isWithParam %}
-        <entry key="{{ field.fieldId }}{{ functionId }}_valuesList_01">
-          <bean class="org.apache.commons.io.IOUtils" factory-method="toString">
-            <constructor-arg type="java.io.InputStream"
-              value="classpath:com/linedata/chorus/std/services/commons/dao/lovvalue/{{ field.methode }}.sql" />
-          </bean>
-        </entry>
-        {% endfor %}
-      </map>
-    </property>
-  </bean>
-  {% for field in fields if not field.isWithParam %}
-  <bean id="{{ field.fieldId }}{{ functionId }}LovQueryService"
-        class="com.linedata.chorus.std.services.commons.service.lov.service.impl.{{ field.fieldId }}{{ functionId }}LovQueryServiceImpl">
-    <property name="frameworkJdbcTemplate" ref="chorusDaoTemplate" />
-    <property name="sqlListOfValuesQuery">
-      <map merge="true">
-        <entry key="{{ field.fieldId }}{{ functionId }}LovQueryService">
-          <bean class="org.apache.commons.io.IOUtils" factory-method="toString">
-            <constructor-arg type="java.io.InputStream"
-              value="classpath:com/linedata/chorus/std/services/commons/dao/lovvalue/{{ field.methode }}.sql" />
-          </bean>
-        </entry>
-      </map>
-    </property>
-  </bean>
-  {% endfor %}'''
-    
     # Create Jinja2 template
-    template = Template(template_str)
+    template = template_registry.from_string(TEMPLATE)
     
     # Render the template
     output = template.render(fields=fields, functionId=function_id)
     
     return output
 
-def main():
+def main(context=None):
     """Main function to execute the script."""
-    # File paths
-    json_file_path = resource_path(r"output\parsed_result.json")
-    function_id_file_path = resource_path(r"output\function-name-f.json")
+    # Inputs and outputs live in the workspace, also in the packaged build
+    model = model_from_context(context, os.path.abspath("output"))
     
     # Load JSON data
     print("Loading JSON data...")
-    data = load_json_data(json_file_path)
+    data = load_json_data(model, FormModel.FILTERS)
     
     if data is None:
         return
     
     # Load function ID
     print("Loading function ID...")
-    function_id = load_function_id(function_id_file_path)
+    function_id = load_function_id(model, FormModel.FUNCTION_NAME)
     print(f"Function ID loaded: '{function_id}'")
     
     # Process fields
@@ -156,10 +144,9 @@ def main():
     print(spring_config)
     
     # Optionally save to file
-    output_file = resource_path(rf".idea\demo\{function_id}\{function_id}LovServiceImpl.spring.xml")
+    output_file = os.path.abspath(f".idea/demo/{function_id}/{function_id}LovServiceImpl.spring.xml")
     try:
         # Create directory if it doesn't exist
-        import os
         os.makedirs(os.path.dirname(output_file), exist_ok=True)
         
         with open(output_file, 'w', encoding='utf-8') as file:
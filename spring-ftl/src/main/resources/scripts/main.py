@@ -7,12 +7,109 @@ Handles the execution of all XML generation scripts
 import subprocess
 import glob
 import os
+import re
 import sys
 import locale
 import time
 import json
+import io
+import argparse
+import inspect
+import importlib
+import importlib.util
+import ast
+import threading
+import traceback
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait
 from pathlib import Path
 
+from build_cache import BuildCache, DEFAULT_CACHE_PATH
+import fragment_cache
+from form_model import FormModel, load_form_model
+from input_watcher import create_watcher, collect_changes
+import template_registry
+
+# Maximum time a single generator may run for one form
+SCRIPT_TIMEOUT = 300  # 5 minutes
+
+# Quiet period after the last input change before --watch regenerates
+WATCH_DEBOUNCE = 0.5  # seconds
+
+# Generator modules loaded for in-process execution, keyed by script name
+_GENERATOR_MODULES = {}
+
+# Declared INPUTS/OUTPUTS/TEMPLATES of each generator, keyed by script name
+_GENERATOR_MANIFESTS = {}
+
+# Placeholders allowed in declared INPUTS/OUTPUTS/TEMPLATES, and how to read
+# each from the inputs; {form_id} is the form being generated
+PATH_PLACEHOLDERS = {
+    'form_id': None,
+    'function_id': FormModel.function_id,
+    'function_name': lambda model: model.function_name.get('functionName', '').strip() or None,
+    'response_form_id': FormModel.response_form_id,
+}
+_PLACEHOLDER = re.compile(r'\{(\w+)\}')
+
+# In-process generators that overran their timeout. Their threads cannot be
+# stopped and share this process's modules, so once one is left behind every
+# later generator of the process runs in a subprocess instead
+_ABANDONED_GENERATORS = []
+
+class FormContext:
+    """Per-form state handed to a generator running in-process
+
+    The form id travels with the context rather than through os.environ, so
+    generators running side by side (or one left behind by a timeout) never
+    see another form's id.
+    """
+
+    def __init__(self, form_id=None, cwd=None, model=None):
+        self.form_id = form_id
+        self.cwd = cwd or os.getcwd()
+        # Inputs parsed once per run and shared by every generator
+        self.model = model
+
+class _OutputRouter(io.TextIOBase):
+    """Stream proxy that sends writes to a per-thread buffer when one is set"""
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._local = threading.local()
+
+    @property
+    def encoding(self):
+        return getattr(self._stream, 'encoding', None) or 'utf-8'
+
+    def writable(self):
+        return True
+
+    def capture(self, buffer):
+        self._local.buffer = buffer
+
+    def release(self):
+        self._local.buffer = None
+
+    def write(self, text):
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is not None:
+            return buffer.write(text)
+        return self._stream.write(text)
+
+    def flush(self):
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None:
+            self._stream.flush()
+
+def install_output_routers():
+    """Route sys.stdout/sys.stderr through per-thread capture buffers"""
+    if not isinstance(sys.stdout, _OutputRouter):
+        sys.stdout = _OutputRouter(sys.stdout)
+    if not isinstance(sys.stderr, _OutputRouter):
+        sys.stderr = _OutputRouter(sys.stderr)
+    return sys.stdout, sys.stderr
+
 def setup_environment():
     """Setup the environment for proper execution"""
     # Set console encoding for Windows
@@ -50,29 +147,19 @@ def check_script_exists(script_name):
     
     return True, "OK"
 
-def detect_available_forms():
+def detect_available_forms(model=None):
     """Detect available form types from the data files"""
     forms = []
+    if model is None:
+        model = load_form_model(os.path.abspath("output"))
     
     # Check output directory for transformed data
-    output_dir = Path("output")
-    if output_dir.exists():
-        transformed_path = output_dir / "transformed_result.json"
-        if transformed_path.exists():
-            try:
-                with open(transformed_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                
-                # Look for forms in the data structure
-                if 'originalJson' in data:
-                    forms = list(data['originalJson'].keys())
-                elif isinstance(data, dict):
-                    # If it's a direct form structure
-                    forms = list(data.keys())
-                
-                safe_print(f"🔍 Detected forms: {forms}")
-            except Exception as e:
-                safe_print(f"⚠️ Error reading transformed data: {e}")
+    if model.exists(FormModel.TRANSFORMED):
+        try:
+            forms = model.form_ids()
+            safe_print(f"🔍 Detected forms: {forms}")
+        except Exception as e:
+            safe_print(f"⚠️ Error reading transformed data: {e}")
     
     # If no forms detected, fall back to default
     if not forms:
@@ -112,18 +199,135 @@ def create_output_directories(forms):
             except Exception as e:
                 safe_print(f"⚠️ Could not create directory {directory}: {e}")
 
-def run_script(script_name, form_id=None):
+def load_generator(script_name):
+    """Import a generator script once and reuse the module for every form"""
+    module = _GENERATOR_MODULES.get(script_name)
+    if module is not None:
+        return module
+
+    module_name = Path(script_name).stem
+    if os.path.exists(script_name):
+        spec = importlib.util.spec_from_file_location(module_name, os.path.abspath(script_name))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            sys.modules.pop(module_name, None)
+            raise
+    else:
+        # Frozen builds ship the generators as hidden imports
+        module = importlib.import_module(module_name)
+
+    if not callable(getattr(module, 'main', None)):
+        raise AttributeError(f"{script_name} has no main() entry point")
+
+    _GENERATOR_MODULES[script_name] = module
+    return module
+
+def call_generator(module, context):
+    """Call a generator entry point, passing the form context when it accepts one"""
+    try:
+        takes_context = bool(inspect.signature(module.main).parameters)
+    except (TypeError, ValueError):
+        takes_context = False
+    if takes_context:
+        return module.main(context)
+    return module.main()
+
+def run_script(script_name, form_id=None, in_process=False, model=None):
     """Run a Python script with proper error handling"""
     safe_print(f"\n=== Running {script_name} ===")
     if form_id:
         safe_print(f"📋 Processing form: {form_id}")
+
+    if in_process and _ABANDONED_GENERATORS:
+        safe_print(f"⚠️ {', '.join(_ABANDONED_GENERATORS)} still running after a timeout, "
+                   f"running {script_name} in a subprocess")
+        in_process = False
     
     # Check if script exists
     exists, message = check_script_exists(script_name)
-    if not exists:
+    if not exists and not (in_process and getattr(sys, 'frozen', False)):
         safe_print(f"❌ {message}")
         return False
-    
+
+    if in_process:
+        try:
+            module = load_generator(script_name)
+        except BaseException as e:
+            safe_print(f"⚠️ Could not load {script_name} in-process ({e}), falling back to subprocess")
+        else:
+            return run_loaded_script(script_name, module, FormContext(form_id, model=model))
+
+    return run_script_subprocess(script_name, form_id)
+
+def report_script_output(script_name, stdout, stderr, returncode):
+    """Print captured generator output and return whether it succeeded"""
+    if stdout:
+        safe_print("📤 STDOUT:")
+        safe_print(stdout)
+
+    if stderr:
+        safe_print("⚠️ STDERR:")
+        safe_print(stderr)
+
+    if returncode == 0:
+        safe_print(f"✅ {script_name} completed successfully")
+        return True
+    safe_print(f"❌ {script_name} failed with return code: {returncode}")
+    return False
+
+def run_loaded_script(script_name, module, context, timeout=SCRIPT_TIMEOUT):
+    """Run an already imported generator in a worker thread with captured output"""
+    stdout_router, stderr_router = install_output_routers()
+    stdout, stderr = io.StringIO(), io.StringIO()
+    outcome = {}
+
+    def target():
+        stdout_router.capture(stdout)
+        stderr_router.capture(stderr)
+        try:
+            call_generator(module, context)
+            outcome['returncode'] = 0
+        except SystemExit as e:
+            if e.code is None:
+                outcome['returncode'] = 0
+            elif isinstance(e.code, int):
+                outcome['returncode'] = e.code
+            else:
+                print(e.code, file=sys.stderr)
+                outcome['returncode'] = 1
+        except BaseException:
+            traceback.print_exc()
+            outcome['returncode'] = 1
+        finally:
+            stdout_router.release()
+            stderr_router.release()
+
+    safe_print(f"📁 Working directory: {context.cwd}")
+    safe_print(f"📄 Script module: {getattr(module, '__file__', None) or module.__name__}")
+
+    worker = threading.Thread(target=target, name=f"{script_name}:{context.form_id}", daemon=True)
+    worker.start()
+    worker.join(timeout)
+
+    if worker.is_alive():
+        # The thread cannot be killed; it keeps running detached and its result is
+        # discarded. Stop running generators in this process from now on
+        _ABANDONED_GENERATORS.append(f"{script_name} (form: {context.form_id})")
+        safe_print(f"⏰ {script_name} timed out after {timeout // 60} minutes; "
+                   f"later generators run in subprocesses")
+        return False
+
+    return report_script_output(script_name, stdout.getvalue(), stderr.getvalue(), outcome['returncode'])
+
+def abandoned_generators():
+    """In-process generators of this process still running after a timeout"""
+    return list(_ABANDONED_GENERATORS)
+
+def run_script_subprocess(script_name, form_id=None):
+    """Run a Python script in a fresh interpreter"""
     try:
         # Set environment for better encoding support
         env = os.environ.copy()
@@ -148,25 +352,10 @@ def run_script(script_name, form_id=None):
             env=env,
             errors='replace',
             cwd=cwd,
-            timeout=300  # 5 minutes timeout
+            timeout=SCRIPT_TIMEOUT
         )
         
-        # Print output
-        if result.stdout:
-            safe_print("📤 STDOUT:")
-            safe_print(result.stdout)
-        
-        if result.stderr:
-            safe_print("⚠️ STDERR:")
-            safe_print(result.stderr)
-        
-        # Check return code
-        if result.returncode == 0:
-            safe_print(f"✅ {script_name} completed successfully")
-            return True
-        else:
-            safe_print(f"❌ {script_name} failed with return code: {result.returncode}")
-            return False
+        return report_script_output(script_name, result.stdout, result.stderr, result.returncode)
     except subprocess.TimeoutExpired:
         safe_print(f"⏰ {script_name} timed out after 5 minutes")
         return False
@@ -187,8 +376,557 @@ def print_all_xmls(output_base_dir):
     except Exception as e:
         safe_print(f"❌ Error scanning XML files: {e}")
 
-def main():
+class GeneratorNode:
+    """One generator script in the dependency graph"""
+
+    def __init__(self, script, inputs, outputs, templates=()):
+        self.script = script
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.templates = tuple(templates)
+        self.depends_on = []
+        self.duration = 0.0
+        self.status = 'pending'
+        self.fingerprint = None
+
+    @property
+    def done(self):
+        return self.status in ('succeeded', 'cached')
+
+def read_generator_manifest(script_name):
+    """Read the INPUTS/OUTPUTS/TEMPLATES a generator declares, without running it"""
+    if script_name in _GENERATOR_MANIFESTS:
+        return _GENERATOR_MANIFESTS[script_name]
+
+    manifest = {'INPUTS': (), 'OUTPUTS': (), 'TEMPLATES': ()}
+    if os.path.exists(script_name):
+        try:
+            with open(script_name, 'r', encoding='utf-8') as f:
+                tree = ast.parse(f.read(), filename=script_name)
+            for node in tree.body:
+                if isinstance(node, ast.Assign):
+                    for target in node.targets:
+                        if isinstance(target, ast.Name) and target.id in manifest:
+                            manifest[target.id] = tuple(ast.literal_eval(node.value))
+        except (SyntaxError, ValueError) as e:
+            safe_print(f"⚠️ Could not read INPUTS/OUTPUTS of {script_name}: {e}")
+    elif getattr(sys, 'frozen', False):
+        try:
+            module = load_generator(script_name)
+            manifest = {key: tuple(getattr(module, key, ())) for key in manifest}
+        except BaseException as e:
+            safe_print(f"⚠️ Could not read INPUTS/OUTPUTS of {script_name}: {e}")
+
+    _GENERATOR_MANIFESTS[script_name] = (manifest['INPUTS'], manifest['OUTPUTS'], manifest['TEMPLATES'])
+    return _GENERATOR_MANIFESTS[script_name]
+
+class UnresolvedPathError(ValueError):
+    """A declared path whose placeholder the inputs do not define"""
+
+def resolve_form_paths(paths, form_id, model=None):
+    """Fill the placeholders of declared paths for one form
+
+    Raises UnresolvedPathError when the inputs give no value for one of them.
+    """
+    values = {'form_id': form_id or ''}
+
+    def fill(match):
+        name = match.group(1)
+        if name not in values:
+            nonlocal model
+            if model is None:
+                model = load_form_model(os.path.abspath("output"))
+            try:
+                values[name] = PATH_PLACEHOLDERS[name](model)
+            except (OSError, ValueError, AttributeError) as e:
+                raise UnresolvedPathError(f"{{{name}}} in {match.string}: {e}") from e
+            if values[name] is None:
+                raise UnresolvedPathError(f"{{{name}}} in {match.string}: not found in the inputs")
+        return values[name]
+
+    return tuple(_PLACEHOLDER.sub(fill, path) for path in paths)
+
+def check_placeholders(script, paths):
+    """Reject declared paths using a placeholder main.py cannot fill"""
+    for path in paths:
+        unknown = [name for name in _PLACEHOLDER.findall(path) if name not in PATH_PLACEHOLDERS]
+        if unknown:
+            raise ValueError(f"{script} declares {path} with unknown placeholder(s) "
+                             f"{', '.join(unknown)}; known: {', '.join(PATH_PLACEHOLDERS)}")
+
+def build_generator_dag(scripts):
+    """Build the dependency graph: a generator depends on whoever writes one of its inputs"""
+    nodes = {}
+    for script in scripts:
+        inputs, outputs, templates = read_generator_manifest(script)
+        check_placeholders(script, inputs + outputs + templates)
+        nodes[script] = GeneratorNode(script, inputs, outputs, templates)
+
+    for node in nodes.values():
+        for other in nodes.values():
+            if other is not node and set(node.inputs) & set(other.outputs):
+                node.depends_on.append(other.script)
+
+    # Reject cycles up front instead of deadlocking the scheduler
+    visiting, done = set(), set()
+
+    def visit(script, chain):
+        if script in done:
+            return
+        if script in visiting:
+            raise ValueError(f"Dependency cycle between generators: {' -> '.join(chain + [script])}")
+        visiting.add(script)
+        for dependency in nodes[script].depends_on:
+            visit(dependency, chain + [script])
+        visiting.discard(script)
+        done.add(script)
+
+    for script in nodes:
+        visit(script, [])
+    return nodes
+
+def critical_path(nodes):
+    """Return the chain of generators with the largest summed duration"""
+    finish, previous = {}, {}
+
+    def finish_time(script):
+        if script not in finish:
+            node = nodes[script]
+            start, before = 0.0, None
+            for dependency in node.depends_on:
+                if finish_time(dependency) > start:
+                    start, before = finish_time(dependency), dependency
+            finish[script] = start + node.duration
+            previous[script] = before
+        return finish[script]
+
+    if not nodes:
+        return [], 0.0
+    last = max(nodes, key=finish_time)
+    path = []
+    while last is not None:
+        path.append(last)
+        last = previous[last]
+    path.reverse()
+    return path, finish[path[-1]]
+
+def run_generator_node(node, form_id, in_process, model=None):
+    """Scheduler worker: run one generator and capture its log as a block"""
+    stdout_router, stderr_router = install_output_routers()
+    log = io.StringIO()
+    stdout_router.capture(log)
+    stderr_router.capture(log)
+    started = time.perf_counter()
+    try:
+        ok = run_script(node.script, form_id, in_process=in_process, model=model)
+    except BaseException:
+        traceback.print_exc()
+        ok = False
+    finally:
+        node.duration = time.perf_counter() - started
+        stdout_router.release()
+        stderr_router.release()
+    return ok, log.getvalue()
+
+def run_generator_dag(nodes, form_id, in_process, output_dir, build_cache=None, model=None, turns=None):
+    """Run independent generators concurrently, each one after its dependencies
+
+    With `turns` (from run_forms_in_pool), a generator also waits until the
+    runs of earlier forms that write the same files have finished.
+    """
+    successful = 0
+    if model is None:
+        model = load_form_model(os.path.abspath("output"))
+    pending = dict(nodes)
+    running = {}
+    waiting = {}
+
+    with ThreadPoolExecutor(max_workers=max(len(nodes), 1)) as executor:
+        while pending or running or waiting:
+            ready = []
+            for script, node in list(pending.items()):
+                statuses = [nodes[dependency].status for dependency in node.depends_on]
+                if any(status in ('failed', 'skipped') for status in statuses):
+                    node.status = 'skipped'
+                    del pending[script]
+                    if turns is not None:
+                        turns.finish(form_id, script)
+                    safe_print(f"⚠️ Skipping {script} (form: {form_id}) because a dependency did not succeed")
+                elif all(nodes[dependency].done for dependency in node.depends_on):
+                    del pending[script]
+                    if turns is not None and not turns.ready(form_id, script):
+                        # Another form writes the same files: wait for its turn in a worker thread
+                        node.status = 'waiting'
+                        waiting[executor.submit(turns.wait, form_id, script)] = node
+                    else:
+                        ready.append(node)
+
+            for node in ready:
+                if build_cache is not None and is_up_to_date(node, form_id, build_cache, model):
+                    node.status = 'cached'
+                    successful += 1
+                    if turns is not None:
+                        turns.finish(form_id, node.script)
+                    continue
+                node.status = 'running'
+                running[executor.submit(run_generator_node, node, form_id, in_process, model)] = node
+
+            if not running and not waiting:
+                continue
+
+            finished, _ = wait(list(running) + list(waiting), return_when=FIRST_COMPLETED)
+            for future in finished:
+                if future in waiting:
+                    # Its turn came; checked against the build cache and started above
+                    node = waiting.pop(future)
+                    node.status = 'pending'
+                    pending[node.script] = node
+                    continue
+
+                node = running.pop(future)
+                ok, log = future.result()
+                safe_print(log.rstrip('\n'))
+                if ok:
+                    node.status = 'succeeded'
+                    successful += 1
+                    if build_cache is not None:
+                        record_build(node, form_id, build_cache, model)
+                    # Print XML files after each successful script
+                    print_all_xmls(output_dir)
+                else:
+                    node.status = 'failed'
+                    if build_cache is not None:
+                        build_cache.forget(form_id, node.script)
+                    safe_print(f"⚠️ Skipping XML output for {node.script} (form: {form_id}) due to failure")
+                if turns is not None:
+                    turns.finish(form_id, node.script)
+    return successful
+
+def is_up_to_date(node, form_id, build_cache, model=None):
+    """Check a ready generator against the build cache and note the decision"""
+    try:
+        node.fingerprint = build_cache.fingerprint(
+            node.script,
+            resolve_form_paths(node.inputs, form_id, model),
+            resolve_form_paths(node.templates, form_id, model)
+        )
+        up_to_date, reason = build_cache.check(
+            form_id, node.script, node.fingerprint, resolve_form_paths(node.outputs, form_id, model))
+    except UnresolvedPathError as e:
+        node.fingerprint = None
+        up_to_date, reason = False, f"declared path unresolved: {e}"
+    if up_to_date:
+        build_cache.note(form_id, node.script, 'skipped', reason)
+        safe_print(f"\n♻️ Skipping {node.script} (form: {form_id}): {reason}")
+    else:
+        build_cache.note(form_id, node.script, 'rebuilt', reason)
+    return up_to_date
+
+def record_build(node, form_id, build_cache, model=None):
+    """Remember a successful run together with the outputs it wrote"""
+    try:
+        outputs = resolve_form_paths(node.outputs, form_id, model)
+    except UnresolvedPathError as e:
+        safe_print(f"⚠️ Not caching {node.script} (form: {form_id}): declared path unresolved: {e}")
+        build_cache.forget(form_id, node.script)
+        return
+    if node.fingerprint is None:
+        build_cache.forget(form_id, node.script)
+        return
+    build_cache.record(form_id, node.script, node.fingerprint, outputs)
+
+def peak_rss(children=False):
+    """Peak resident memory in bytes of this process (or of its largest finished child), None if unknown"""
+    try:
+        import resource
+    except ImportError:
+        return None if children else windows_peak_rss()
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def windows_peak_rss():
+    """Peak working set of this process on Windows, None if it cannot be read"""
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD)] + [
+                (name, ctypes.c_size_t) for name in (
+                    'PeakWorkingSetSize', 'WorkingSetSize', 'QuotaPeakPagedPoolUsage', 'QuotaPagedPoolUsage',
+                    'QuotaPeakNonPagedPoolUsage', 'QuotaNonPagedPoolUsage', 'PagefileUsage', 'PeakPagefileUsage')
+            ]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return None
+        return counters.PeakWorkingSetSize
+    except (AttributeError, OSError):
+        return None
+
+def report_peak_rss():
+    """Print the peak memory of the run"""
+    peak, children = peak_rss(), peak_rss(children=True)
+    if peak is None:
+        safe_print("🧠 Peak RSS: unavailable on this platform")
+        return
+    line = f"🧠 Peak RSS: {peak / (1024 * 1024):.1f} MB"
+    if children:
+        line += f" (largest worker or subprocess: {children / (1024 * 1024):.1f} MB)"
+    safe_print(line)
+
+def report_build_cache(build_cache):
+    """Print which generators were skipped or rebuilt, and why"""
+    safe_print("\n♻️ BUILD CACHE")
+    if not build_cache.report:
+        safe_print("  No generators were checked")
+        return
+    for action in ('skipped', 'rebuilt'):
+        lines = [entry for entry in build_cache.report if entry[2] == action]
+        safe_print(f"  {action.capitalize()}: {len(lines)}")
+        for form_id, script, _, reason in sorted(lines):
+            safe_print(f"    {form_id}/{script}: {reason}")
+
+def report_stage_timings(nodes, form_id, templates=None, fragments=None):
+    """Print per-generator durations, template compilation, fragment reuse and the critical path for one form"""
+    safe_print(f"\n⏱️ Stage timings for form {form_id}:")
+    for node in nodes.values():
+        after = f" (after {', '.join(node.depends_on)})" if node.depends_on else ""
+        safe_print(f"  {node.script}: {node.duration:.3f}s [{node.status}]{after}")
+    if templates is not None:
+        # In-process generators only; subprocess generators compile in their own interpreter
+        safe_print(f"  template compile: {templates.seconds:.3f}s "
+                   f"({templates.compiled} compiled, {templates.cached} from bytecode cache)")
+    if fragments is not None and fragments.area_hits + fragments.area_misses:
+        safe_print(f"  fragment cache: areas {fragments.area_ratio:.0%} reused "
+                   f"({fragments.area_hits}/{fragments.area_hits + fragments.area_misses}), "
+                   f"fields of changed areas {fragments.field_ratio:.0%} reused "
+                   f"({fragments.field_hits}/{fragments.field_hits + fragments.field_misses})")
+    path, total = critical_path(nodes)
+    safe_print(f"🧭 Critical path: {' -> '.join(path)} ({total:.3f}s)")
+
+def process_form(form_id, scripts, in_process, output_dir, build_cache=None, model=None, turns=None):
+    """Run the generator graph for one form and return the number of successes"""
+    safe_print(f"\n🎯 Processing form: {form_id}")
+
+    nodes = build_generator_dag(scripts)
+    templates_before = template_registry.compile_stats()
+    fragments_before = fragment_cache.fragment_stats()
+    successful = run_generator_dag(nodes, form_id, in_process, output_dir, build_cache, model, turns)
+    report_stage_timings(nodes, form_id, template_registry.compile_stats() - templates_before,
+                         fragment_cache.fragment_stats() - fragments_before)
+    return successful
+
+def process_form_captured(form_id, scripts, in_process, output_dir, build_cache=None, turns=None):
+    """Pool worker: run one form and return its whole log as a single block"""
+    stdout_router, stderr_router = install_output_routers()
+    log = io.StringIO()
+    stdout_router.capture(log)
+    stderr_router.capture(log)
+    try:
+        successful = process_form(form_id, scripts, in_process, output_dir, build_cache, turns=turns)
+    except BaseException:
+        traceback.print_exc()
+        successful = 0
+    finally:
+        if turns is not None:
+            # Never leave a later form waiting on a run that did not happen
+            turns.finish_form(form_id)
+        stdout_router.release()
+        stderr_router.release()
+    cache_changes = (build_cache.updates, build_cache.report) if build_cache is not None else None
+    return form_id, successful, log.getvalue(), cache_changes
+
+class OutputTurns:
+    """Orders the runs of different forms that write the same files
+
+    Built from the resolved OUTPUTS of every (form, generator) run. A run
+    waits until the runs of earlier forms writing one of its files have
+    finished, so shared files end up as a one-form-at-a-time run leaves
+    them, while runs writing their own files go in parallel. Events come
+    from a multiprocessing manager so pool workers can share them.
+    """
+
+    def __init__(self, forms, nodes, manager, model=None):
+        self.forms = list(forms)
+        self.scripts = list(nodes)
+        self._after = {}      # (form_id, script) -> earlier runs writing the same files
+        writers = {}          # output path -> runs writing it, in form order
+        for form_id in self.forms:
+            for script, node in nodes.items():
+                try:
+                    paths = [os.path.normcase(os.path.normpath(path))
+                             for path in resolve_form_paths(node.outputs, form_id, model)]
+                except UnresolvedPathError:
+                    # Unknown until it runs: assume it writes what its other forms' runs write
+                    paths = [f"<unresolved outputs of {script}>"]
+                for path in paths:
+                    for earlier in writers.get(path, ()):
+                        if earlier[0] != form_id:
+                            self._after.setdefault((form_id, script), set()).add(earlier)
+                    writers.setdefault(path, []).append((form_id, script))
+        awaited = set().union(*self._after.values()) if self._after else set()
+        self._finished = {run: manager.Event() for run in awaited}
+
+    @property
+    def ordered_runs(self):
+        """Number of runs that wait for another form's run"""
+        return len(self._after)
+
+    def ready(self, form_id, script):
+        return all(self._finished[run].is_set() for run in self._after.get((form_id, script), ()))
+
+    def wait(self, form_id, script):
+        for run in self._after.get((form_id, script), ()):
+            self._finished[run].wait()
+
+    def finish(self, form_id, script):
+        event = self._finished.get((form_id, script))
+        if event is not None:
+            event.set()
+
+    def finish_form(self, form_id):
+        for script in self.scripts:
+            self.finish(form_id, script)
+
+def run_forms_in_pool(forms, scripts, in_process, output_dir, jobs, build_cache=None, model=None):
+    """Process forms in parallel worker processes and merge their success counts"""
+    total_successful = 0
+    with multiprocessing.Manager() as manager, ProcessPoolExecutor(max_workers=jobs) as executor:
+        turns = OutputTurns(forms, build_generator_dag(scripts), manager, model)
+        if turns.ordered_runs:
+            safe_print(f"🔗 {turns.ordered_runs} generator runs write files of another form's run; "
+                       f"they run in form order")
+        # Forms start in submission order, so a run only ever waits for a form already started
+        futures = {
+            executor.submit(
+                process_form_captured, form_id, scripts, in_process, output_dir,
+                build_cache.fork() if build_cache is not None else None, turns
+            ): form_id
+            for form_id in forms
+        }
+        for future in as_completed(futures):
+            form_id = futures[future]
+            try:
+                form_id, successful, log, cache_changes = future.result()
+            except Exception as e:
+                safe_print(f"\n❌ Worker for form {form_id} failed: {e}")
+                continue
+
+            if cache_changes is not None:
+                build_cache.merge(*cache_changes)
+
+            # Print each worker's output as one uninterrupted block
+            safe_print(log.rstrip('\n'))
+            safe_print(f"📊 Form {form_id}: {successful}/{len(scripts)} script executions succeeded")
+            total_successful += successful
+    return total_successful
+
+def affected_generators(nodes, changed_paths, forms):
+    """Generators that read one of the changed files, plus everything downstream of them"""
+    changed = {os.path.normpath(path) for path in changed_paths}
+    affected = {
+        script for script, node in nodes.items()
+        if any(os.path.normpath(path) in changed
+               for form_id in forms for path in resolve_form_paths(node.inputs, form_id))
+    }
+
+    queue = list(affected)
+    while queue:
+        script = queue.pop()
+        for other, node in nodes.items():
+            if script in node.depends_on and other not in affected:
+                affected.add(other)
+                queue.append(other)
+    return [script for script in nodes if script in affected]
+
+def watch_inputs(scripts, in_process, output_dir, force=False):
+    """Regenerate only the generators consuming an input file each time one changes"""
+    # Re-renders after a small edit reuse the fragments of unchanged fields
+    fragment_cache.enable()
+    nodes = build_generator_dag(scripts)
+    forms = detect_available_forms()
+    watched = sorted({
+        path for node in nodes.values() for form_id in forms
+        for path in resolve_form_paths(node.inputs, form_id)
+    })
+    watcher = create_watcher(watched)
+    safe_print(f"\n👀 Watching {len(watched)} input files with {watcher.name} (Ctrl+C to stop)")
+
+    try:
+        while True:
+            changed, first_change = collect_changes(watcher, WATCH_DEBOUNCE)
+            safe_print(f"\n📝 Changed: {', '.join(sorted(changed))}")
+
+            model = load_form_model(os.path.abspath("output"))
+            forms = detect_available_forms(model)
+            affected = affected_generators(nodes, changed, forms)
+            if not affected:
+                safe_print("ℹ️ No generator reads these files")
+                continue
+
+            started = time.perf_counter()
+            build_cache = BuildCache(force=force)
+            successful = sum(
+                process_form(form_id, affected, in_process, output_dir, build_cache, model)
+                for form_id in forms
+            )
+            try:
+                build_cache.save()
+            except OSError as e:
+                safe_print(f"⚠️ Could not write build cache {build_cache.path}: {e}")
+            finished = time.perf_counter()
+
+            safe_print(
+                f"⚡ Regenerated {', '.join(affected)} for {len(forms)} form(s): "
+                f"{successful}/{len(affected) * len(forms)} succeeded in {finished - started:.3f}s "
+                f"({finished - first_change:.3f}s after the first change)"
+            )
+    finally:
+        watcher.close()
+
+def positive_int(value):
+    """argparse type for strictly positive integers"""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"expected a positive integer, got {value}")
+    return number
+
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Run all XML generation scripts")
+    parser.add_argument(
+        '--subprocess',
+        action='store_true',
+        help="run every generator in its own interpreter instead of loading it once in-process"
+    )
+    parser.add_argument(
+        '--jobs', '-j',
+        type=positive_int,
+        default=1,
+        metavar='N',
+        help="number of worker processes to spread forms across (default: 1)"
+    )
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help=f"ignore {DEFAULT_CACHE_PATH} and run every generator"
+    )
+    parser.add_argument(
+        '--watch',
+        action='store_true',
+        help="after the first run, keep watching the input files and regenerate what they feed"
+    )
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """Main function"""
+    args = parse_args(argv)
+    in_process = not args.subprocess
+
     try:
         # Setup environment
         setup_environment()
@@ -196,9 +934,11 @@ def main():
         safe_print("🚀 Starting XML generation workflow...")
         safe_print(f"🐍 Python version: {sys.version}")
         safe_print(f"📁 Current directory: {os.getcwd()}")
+        safe_print(f"⚙️ Execution mode: {'in-process' if in_process else 'subprocess'}, jobs: {args.jobs}")
         
-        # Detect available forms
-        forms = detect_available_forms()
+        # Detect available forms; inputs are parsed once and shared by all generators
+        model = load_form_model(os.path.abspath("output"))
+        forms = detect_available_forms(model)
         safe_print(f"📋 Forms to process: {forms}")
         
         # Create output directories for all forms
@@ -207,7 +947,8 @@ def main():
         output_dir = os.path.join('.idea', 'demo')
         safe_print(f"📁 Output directory: {output_dir}")
 
-        # List of scripts to run in order
+        # Generators to run; the order only breaks ties, dependencies come from
+        # the INPUTS/OUTPUTS each script declares
         scripts = [
             'combined.py',
             'mapping.py',
@@ -232,17 +973,19 @@ def main():
         # Run scripts for each form
         total_successful = 0
         total_attempts = len(scripts) * len(forms)
+        build_cache = BuildCache(force=args.force)
         
-        for form_id in forms:
-            safe_print(f"\n🎯 Processing form: {form_id}")
-            
-            for script in scripts:
-                if run_script(script, form_id):
-                    total_successful += 1
-                    # Print XML files after each successful script
-                    print_all_xmls(output_dir)
-                else:
-                    safe_print(f"⚠️ Skipping XML output for {script} (form: {form_id}) due to failure")
+        if args.jobs > 1 and len(forms) > 1:
+            safe_print(f"\n⚙️ Spreading {len(forms)} forms across {args.jobs} worker processes")
+            total_successful = run_forms_in_pool(forms, scripts, in_process, output_dir, args.jobs, build_cache, model)
+        else:
+            for form_id in forms:
+                total_successful += process_form(form_id, scripts, in_process, output_dir, build_cache, model)
+
+        try:
+            build_cache.save()
+        except OSError as e:
+            safe_print(f"⚠️ Could not write build cache {build_cache.path}: {e}")
         
         # Final summary
         safe_print("\n" + "="*50)
@@ -251,6 +994,8 @@ def main():
         safe_print(f"✅ Successful script executions: {total_successful}/{total_attempts}")
         safe_print(f"📋 Forms processed: {forms}")
         safe_print(f"📁 Output directory: {output_dir}")
+        report_peak_rss()
+        report_build_cache(build_cache)
         
         if total_successful > 0:
             safe_print("✅ XML generation workflow completed!")
@@ -262,6 +1007,9 @@ def main():
         # Final XML output
         safe_print("\n📄 Final XML files:")
         print_all_xmls(output_dir)
+
+        if args.watch:
+            watch_inputs(scripts, in_process, output_dir, force=args.force)
         
     except KeyboardInterrupt:
         safe_print("\n⚠️ Workflow interrupted by user")
@@ -272,4 +1020,5 @@ def main():
     safe_print("\n🎯 Workflow finished")
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     main()
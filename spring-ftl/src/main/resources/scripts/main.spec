@@ -1,10 +1,23 @@
 # -*- mode: python ; coding: utf-8 -*-
 
+import shutil
+import subprocess
+import sys
+
 block_cipher = None
 
+# Precompile every Jinja2 template into Python modules; the frozen app loads
+# them through a ModuleLoader instead of compiling templates at launch
+compiled_templates = 'build/compiled_templates'
+shutil.rmtree(compiled_templates, ignore_errors=True)
+subprocess.run(
+    [sys.executable, 'spring-ftl/src/main/resources/scripts/template_registry.py', '--compile', compiled_templates],
+    check=True,
+)
+
 a = Analysis(
     ['spring-ftl/src/main/resources/scripts/main.py'],
-    pathex=[],
+    pathex=['spring-ftl/src/main/resources/scripts'],
     binaries=[],
     datas=[
         ('output/*', 'output'),
@@ -12,9 +25,16 @@ a = Analysis(
         ('spring-ftl/src/main/java/com/example/spring_ftl/dto/*', 'dto'),
         ('spring-ftl/src/main/java/com/example/spring_ftl/service/*', 'service'),
         ('spring-ftl/src/main/resources/templates/*', 'templates'),
+        (compiled_templates, 'compiled_templates'),
         ('*.properties', '.'),
     ],
-    hiddenimports=[],
+    # Generators are imported by name at run time, not by main.py
+    hiddenimports=[
+        'combined',
+        'mapping',
+        'lov_impl_',
+        'screenfinal'
+    ],
     hookspath=[],
     runtime_hooks=[],
     excludes=['__pycache__'],
@@ -1,15 +1,25 @@
-import json
 from pathlib import Path
-from jinja2 import Template
-import unicodedata
-import re
-import sys
 import os
 
-def resource_path(relative_path):
-    if hasattr(sys, '_MEIPASS'):
-        return os.path.join(sys._MEIPASS, relative_path)
-    return os.path.join(os.path.abspath('.'), relative_path)
+import fragment_cache
+from form_model import FormModel, form_id_from_context, model_from_context
+from layout_engine import LayoutBatch, layout
+from models import Field, FieldLink
+import template_registry
+from text_normalizer import normalize_label
+
+# Files read and written by this generator; main.py schedules generators from these
+INPUTS = (
+    "output/transformed_result.json",
+    "output/fieldlink.json",
+    "output/area_map.json",
+)
+OUTPUTS = (
+    ".idea/demo/{form_id}/{form_id}.mapping.xml",
+)
+
+# Field link attributes used by the template
+LINK_ATTRIBUTES = ("childFieldId", "id", "methodName", "nature", "beanId")
 
 # Static panel definitions
 STATIC_PANELS = {
@@ -40,8 +50,34 @@ AREA_TITLES = {
     'area3': "Critères de consolidation"
 }
 
+# Markup of one field in the <fields> of an area; with the fragment cache on,
+# TEMPLATE gets each area's fields already rendered (area_fragments)
+FIELD_TEMPLATE = """\
+{% macro render_field(field) %}
+        <field id="{{ field.id }}"
+               nature="{{ field.nature }}"
+               {% if field.defaultValue is defined %}defaultValue="{{ field.defaultValue }}"{% endif %}
+               columnNumber="{{ field.columnNumber }}"
+               sortNumber="{{ field.sortNumber }}"
+               {% if field.maxLength is defined %}maxLength="{{ field.maxLength }}"{% endif %}
+               {% if field.readOnly is defined %}readOnly="{{ field.readOnly }}"{% endif %}
+               {% if field.hidden is defined %}hidden="{{ field.hidden }}"{% endif %}
+               {% if field.lov is defined %}lov="{{ field.lov }}"{% endif %}
+               {% if field.valueField is defined %}valueField="{{ field.valueField }}"{% endif %}
+               {% if field.setWithValuesList is defined %}setWithValuesList="{{ field.setWithValuesList }}"{% endif %}>
+          {% if field.label is defined %}<label>{{ field.label }}</label>{% endif %}
+          {% if field.nature == "lov" and field.filters is defined %}
+          <filters>
+            {% for filter in field.filters %}
+            <filter id="{{ filter.id }}" fieldId="{{ filter.fieldId }}" />
+            {% endfor %}
+          </filters>
+          {% endif %}
+        </field>
+        {% endmacro %}"""
+
 TEMPLATE = """\
-{# Template Jinja2 généré automatiquement #}
+{# Template Jinja2 généré automatiquement #}""" + FIELD_TEMPLATE + """
 <form xmlns:jxb="http://java.sun.com/xml/ns/jaxb"
       xmlns:xjc="http://java.sun.com/xml/ns/jaxb/xjc"
       xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
@@ -83,28 +119,7 @@ TEMPLATE = """\
         <headerVisible>false</headerVisible>
       </graphic>
       <fields>
-        {% for field in area_fields %}
-        <field id="{{ field.id }}"
-               nature="{{ field.nature }}"
-               {% if field.defaultValue is defined %}defaultValue="{{ field.defaultValue }}"{% endif %}
-               columnNumber="{{ field.columnNumber }}"
-               sortNumber="{{ field.sortNumber }}"
-               {% if field.maxLength is defined %}maxLength="{{ field.maxLength }}"{% endif %}
-               {% if field.readOnly is defined %}readOnly="{{ field.readOnly }}"{% endif %}
-               {% if field.hidden is defined %}hidden="{{ field.hidden }}"{% endif %}
-               {% if field.lov is defined %}lov="{{ field.lov }}"{% endif %}
-               {% if field.valueField is defined %}valueField="{{ field.valueField }}"{% endif %}
-               {% if field.setWithValuesList is defined %}setWithValuesList="{{ field.setWithValuesList }}"{% endif %}>
-          {% if field.label is defined %}<label>{{ field.label }}</label>{% endif %}
-          {% if field.nature == "lov" and field.filters is defined %}
-          <filters>
-            {% for filter in field.filters %}
-            <filter id="{{ filter.id }}" fieldId="{{ filter.fieldId }}" />
-            {% endfor %}
-          </filters>
-          {% endif %}
-        </field>
-        {% endfor %}
+        {% if area_fragments %}{{ area_fragments[area_name] }}{% else %}{% for field in area_fields %}{{ static_fragments[field.id] if field.is_static_panel else render_field(field) }}{% endfor %}{% endif %}
       </fields>
     </area>
     {% endfor %}
@@ -143,13 +158,7 @@ TEMPLATE = """\
 """
 
 def normalize_text(text: str) -> str:
-    if not text:
-        return ""
-    text = unicodedata.normalize('NFD', text.lower())
-    text = ''.join(c for c in text if unicodedata.category(c) != 'Mn')
-    text = re.sub(r'[^ -~\w\s]', '', text)
-    text = re.sub(r'\s+', ' ', text).strip()
-    return text
+    return normalize_label(text)
 
 def build_label2_area_map(area_data):
     # Map normalized name -> (area, sortNumber, columnNumber)
@@ -199,51 +208,97 @@ def build_field_mapping_from_area_map(area_map, form_fields):
     else:
         next_area1_sort = 10
     
-    # Collect unmapped area1 fields in order
-    unmapped_area1_fields = []
-    for field_id, field_data in form_fields.items():
-        if not isinstance(field_data, dict):
-            continue
-        if field_id not in area_map_lookup:
-            unmapped_area1_fields.append((field_id, field_data))
-    
-    # Assign sortNumbers to unmapped area1 fields in order
-    unmapped_sort_numbers = {}
-    for field_id, field_data in unmapped_area1_fields:
-        unmapped_sort_numbers[field_id] = next_area1_sort
-        next_area1_sort += 10
-    
-    # Process ALL fields from transformed_result.json
+    # Lay out ALL fields from transformed_result.json: mapped fields keep
+    # their area_map.json placement, the others go to area1 with
+    # incremental sort numbers, in order
+    batch = LayoutBatch()
     for field_id, field_data in form_fields.items():
         if not isinstance(field_data, dict):
             continue
-        # Start with field data from transformed_result.json
-        field = dict(field_data)
-        field['id'] = field_id
-        # If field exists in area_map.json, use its mapping
         if field_id in area_map_lookup:
             mapping = area_map_lookup[field_id]
-            field['area'] = mapping['area']
-            field['sortNumber'] = mapping['sortNumber']
-            field['columnNumber'] = mapping['columnNumber']
-            field['label'] = mapping['label']
-        elif field_id in unmapped_sort_numbers:
-            # Default to area1 with incremental sort numbers, in order
-            field['area'] = 'area1'
-            field['sortNumber'] = unmapped_sort_numbers[field_id]
-            field['columnNumber'] = field.get('columnNumber', 1)
-        mapped[field_id] = field
+            batch.add(None, field_id, mapping['area'], mapping['sortNumber'], mapping['columnNumber'])
+        else:
+            batch.add(None, field_id, 'area1', None, field_data.get('columnNumber', 1), mapped=False)
+    placed = layout(batch, 'next_free', start={None: next_area1_sort})
+
+    for row, field_id in enumerate(batch.field_ids):
+        # Start with field data from transformed_result.json; only the
+        # attributes set here are stored on the field, the rest is shared
+        overlay = {
+            'id': field_id,
+            'area': placed.areas[row],
+            'sortNumber': placed.sort_numbers[row],
+            'columnNumber': placed.column_numbers[row],
+        }
+        if batch.mapped[row]:
+            overlay['label'] = area_map_lookup[field_id]['label']
+        mapped[field_id] = Field(form_fields[field_id], overlay)
     # Add static panel fields if panel exists in form_fields
     for panel_id, panel_config in STATIC_PANELS.items():
         if panel_id in form_fields:
             print(f"✅ Found {panel_id} in form_fields, adding {len(panel_config['fields'])} static fields to {panel_config['area']}")
             for static_field in panel_config['fields']:
-                static = dict(static_field)
-                static['area'] = panel_config['area']
-                static['is_static_panel'] = True
+                static = static_panel_field(panel_config, static_field)
                 mapped[static['id']] = static
     return mapped
 
+def static_panel_field(panel_config, static_field):
+    """A field of a static panel, as placed in its area"""
+    return Field(static_field, {
+        'area': panel_config['area'],
+        'is_static_panel': True
+    })
+
+# Static panel field id -> panel id
+STATIC_FIELD_PANELS = {
+    static_field['id']: panel_id
+    for panel_id, panel_config in STATIC_PANELS.items()
+    for static_field in panel_config['fields']
+}
+
+def render_field_macro():
+    """The FIELD_TEMPLATE macro"""
+    return template_registry.from_string(FIELD_TEMPLATE).module.render_field
+
+def static_panel_fragments(panel_id):
+    """The <field> markup of the fields of a static panel, by field id; rendered once per process"""
+    def render():
+        render_field = render_field_macro()
+        panel_config = STATIC_PANELS[panel_id]
+        return {
+            static_field['id']: str(render_field(static_panel_field(panel_config, static_field)))
+            for static_field in panel_config['fields']
+        }
+    return fragment_cache.static_panel(panel_id, 'mapping.TEMPLATE', (), render)
+
+def static_fragments(form_fields) -> dict:
+    """The pre-rendered static panel fields of the panels this form holds, by field id"""
+    fragments = {}
+    for panel_id in STATIC_PANELS:
+        if panel_id in form_fields:
+            fragments.update(static_panel_fragments(panel_id))
+    return fragments
+
+def render_field_fragment(field):
+    """The markup of one field; static panel fields come pre-rendered"""
+    if field.get('is_static_panel'):
+        return static_panel_fragments(STATIC_FIELD_PANELS[field['id']])[field['id']]
+    return str(render_field_macro()(field))
+
+def area_fragments(area_fields: dict) -> dict:
+    """The <field> markup of each area, from the fragment cache; only changed fields are rendered
+
+    Empty when the cache is off: TEMPLATE then renders the fields as it streams.
+    """
+    if not fragment_cache.enabled():
+        return {}
+    target = render_field_macro()
+    return {
+        area_id: fragment_cache.area_fragment(target, (), area_id, fields, render_field_fragment)
+        for area_id, fields in area_fields.items()
+    }
+
 def group_fields_by_area(mapped_fields: dict) -> dict:
     area_fields = {'area1': [], 'area2': [], 'area3': []}
     for field in mapped_fields.values():
@@ -254,25 +309,21 @@ def group_fields_by_area(mapped_fields: dict) -> dict:
     # Keep original order from area_map.json, don't sort by sortNumber
     return area_fields
 
-def main():
-    base_path = Path(resource_path("output"))
-    area_config_path = base_path / "area_data.json"
-    transformed_path = base_path / "transformed_result.json"
-    response_path = base_path / "fieldlink.json"
-    area_map_path = base_path / "area_map.json"
+def main(context=None):
+    # Inputs and outputs live in the workspace, also in the packaged build
+    base_path = Path(os.path.abspath("output"))
     
     # Load data
-    area_data = json.load(area_config_path.open(encoding="utf-8"))
-    transformed_data = json.load(transformed_path.open(encoding="utf-8"))
-    area_map = json.load(area_map_path.open(encoding="utf-8"))
+    model = model_from_context(context, base_path)
+    area_map = model.area_map
     
-    # Get form data
-    if 'originalJson' in transformed_data:
-        form_id = next(iter(transformed_data['originalJson']))
-        form_fields = transformed_data['originalJson'][form_id]
-    else:
-        form_id = next(iter(transformed_data))
-        form_fields = transformed_data[form_id]
+    # Get form data: the form being generated (the first one when run on its own)
+    form_id = form_id_from_context(context, model)
+    if form_id is None:
+        raise ValueError("No form found in transformed_result.json")
+    if form_id not in model.form_ids():
+        raise ValueError(f"Form {form_id} not found in transformed_result.json")
+    form_fields = model.fields(form_id)
     
     print(f"📊 Processing form: {form_id}")
     print(f"📊 Total fields in transformed_result.json: {len(form_fields)}")
@@ -284,35 +335,32 @@ def main():
     
     # Load field links
     field_links = []
-    if response_path.exists():
-        response_data = json.load(response_path.open(encoding="utf-8"))
-        for link in response_data.get("links", []):
+    if model.exists(FormModel.FIELDLINKS):
+        for link in model.links:
             if isinstance(link, dict):
-                field_links.append({
-                    "childFieldId": link.get("childFieldId"),
-                    "id": link.get("id"),
-                    "methodName": link.get("methodName"),
-                    "nature": link.get("nature"),
-                    "beanId": link.get("beanId"),
-                    "fatherFieldIds": link.get("fatherFieldIds", [])
-                })
+                # Share the parsed link; only fill in the attributes it lacks
+                defaults = {key: None for key in LINK_ATTRIBUTES if key not in link}
+                if "fatherFieldIds" not in link:
+                    defaults["fatherFieldIds"] = []
+                field_links.append(FieldLink(link, defaults))
     
     # Build mapping
     mapped_fields = build_field_mapping_from_area_map(area_map, form_fields)
     area_fields = group_fields_by_area(mapped_fields)
     
     # Generate XML
-    output_dir = Path(resource_path(f'C:/Users/USER/Downloads/spring-ftl/.idea/demo/{form_id}'))
+    output_dir = Path(os.path.abspath(f'.idea/demo/{form_id}'))
     output_dir.mkdir(parents=True, exist_ok=True)
     output_path = output_dir / f'{form_id}.mapping.xml'
-    template = Template(TEMPLATE)
-    xml_content = template.render({
+    template = template_registry.from_string(TEMPLATE)
+    template_registry.render_to_file(template, output_path, {
         "form_id": form_id,
         "fieldLinks": field_links,
         "area_groups": area_fields,
-        "area_titles": AREA_TITLES
-    })
-    output_path.write_text(xml_content, encoding="utf-8")
+        "area_titles": AREA_TITLES,
+        "area_fragments": area_fragments(area_fields),
+        "static_fragments": static_fragments(form_fields)
+    }, encoding="utf-8")
     
     print(f"\n✅ XML generated at: {output_path}")
     print(f"\n📊 Summary:")
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Form models
+Compact records for fields, field links, areas and forms. Each record keeps
+a reference to its immutable source attributes (usually the parsed input,
+shared by every stage) and stores only the attributes a stage adds or
+changes in a small overlay, instead of copying the whole dict.
+
+Records read like dicts (record['label'], record.get(...), 'lov' in record,
+**record) so templates and existing code can use them unchanged. They are
+read-only: derive() and with_overlay() build a new record instead.
+"""
+
+from collections.abc import Mapping
+from typing import Any, Iterator, Optional
+
+_EMPTY: Mapping = {}
+_MISSING = object()
+
+class Record(Mapping):
+    """Shared base attributes plus a per-stage overlay"""
+
+    __slots__ = ('_base', '_overlay')
+
+    def __init__(self, base: Optional[Mapping] = None, overlay: Optional[dict] = None):
+        self._base = base if base is not None else _EMPTY
+        self._overlay = overlay or None
+
+    @classmethod
+    def derive(cls, base: Mapping, **overlay) -> "Record":
+        """New record sharing `base`, with `overlay` on top"""
+        return cls(base, overlay)
+
+    def with_overlay(self, **changes) -> "Record":
+        """Copy of this record with more attributes overlaid; the base is shared"""
+        overlay = dict(self._overlay) if self._overlay else {}
+        overlay.update(changes)
+        return type(self)(self._base, overlay)
+
+    def copy(self) -> "Record":
+        """Shallow copy, like dict.copy(); only the overlay is copied"""
+        return type(self)(self._base, dict(self._overlay) if self._overlay else None)
+
+    def to_dict(self) -> dict:
+        return dict(self.items())
+
+    # === dict-style access ===
+
+    def __getitem__(self, key):
+        overlay = self._overlay
+        if overlay is not None:
+            value = overlay.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+        return self._base[key]
+
+    def get(self, key, default=None):
+        overlay = self._overlay
+        if overlay is not None:
+            value = overlay.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+        return self._base.get(key, default)
+
+    def __contains__(self, key) -> bool:
+        return key in self._base or (self._overlay is not None and key in self._overlay)
+
+    def __iter__(self) -> Iterator[str]:
+        # Same order as dict(base) updated with the overlay
+        yield from self._base
+        if self._overlay:
+            for key in self._overlay:
+                if key not in self._base:
+                    yield key
+
+    def items(self):
+        """Like dict.items(), in iteration order"""
+        if not self._overlay:
+            return self._base.items()
+        merged = dict(self._base)
+        merged.update(self._overlay)
+        return merged.items()
+
+    def __len__(self) -> int:
+        if not self._overlay:
+            return len(self._base)
+        return len(self._base) + sum(1 for key in self._overlay if key not in self._base)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+class Field(Record):
+    """A form field: parsed attributes plus area, sort and label overrides"""
+
+    __slots__ = ()
+
+class FieldLink(Record):
+    """A conditional-visibility link between fields"""
+
+    __slots__ = ()
+
+class Area(Record):
+    """An area of a form: id, sortNumber and its fields"""
+
+    __slots__ = ()
+
+class Form(Record):
+    """Everything a form template is rendered from"""
+
+    __slots__ = ()
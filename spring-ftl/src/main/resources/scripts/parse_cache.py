@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Parse cache
+Keeps the parsed form of JSON input files as pickles in a .cache directory
+next to them (output/.cache/ for the generator inputs). An entry is used only
+when the path, size, mtime and sha256 of the file all match; the least
+recently used entries are evicted when the cache grows past its limits.
+Set JSON_PARSE_CACHE=off to always parse.
+"""
+
+import gc
+import hashlib
+import os
+import pickle
+import threading
+from pathlib import Path
+
+import json_backend
+
+CACHE_DIR_NAME = ".cache"
+CACHE_FORMAT = 1
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MAX_ENTRIES = 64
+ENTRY_SUFFIX = ".pickle"
+
+class ParseCache:
+    """Pickled parse results of the files in one directory, bounded with LRU eviction"""
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES, max_entries=DEFAULT_MAX_ENTRIES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def entry_path(self, path):
+        name = hashlib.sha256(os.path.abspath(path).encode('utf-8')).hexdigest()[:32]
+        return self.cache_dir / f"{name}{ENTRY_SUFFIX}"
+
+    def load(self, path, parse=json_backend.loads):
+        """Return the parsed content of `path`, from the cache when it is still valid"""
+        stat = os.stat(path)
+        with open(path, 'rb') as f:
+            content = f.read()
+        key = {
+            'format': CACHE_FORMAT,
+            'path': os.path.abspath(path),
+            'size': stat.st_size,
+            'mtime': stat.st_mtime_ns,
+            'sha256': hashlib.sha256(content).hexdigest(),
+        }
+
+        entry_path = self.entry_path(path)
+        found, data = self._read_entry(entry_path, key)
+        if found:
+            with self._lock:
+                self.hits += 1
+            self._touch(entry_path)
+            return data
+
+        with self._lock:
+            self.misses += 1
+        data = parse(content)
+        self._write_entry(entry_path, key, data)
+        return data
+
+    def _read_entry(self, entry_path, key):
+        """Return (True, data) when the entry exists and matches the file exactly"""
+        try:
+            with open(entry_path, 'rb') as f:
+                if pickle.load(f) != key:
+                    return False, None
+                # Unpickling large containers is much faster without GC passes
+                enabled = gc.isenabled()
+                gc.disable()
+                try:
+                    return True, pickle.load(f)
+                finally:
+                    if enabled:
+                        gc.enable()
+        except FileNotFoundError:
+            return False, None
+        except Exception:
+            # Truncated or unreadable entry: drop it and parse again
+            self._remove(entry_path)
+            return False, None
+
+    def _write_entry(self, entry_path, key, data):
+        """Store an entry atomically; a cache that cannot be written is simply skipped"""
+        tmp_path = entry_path.with_name(f"{entry_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(key, f, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, entry_path)
+        except (OSError, pickle.PicklingError):
+            self._remove(tmp_path)
+            return
+        self.evict()
+
+    def _touch(self, entry_path):
+        """Mark an entry as recently used"""
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def evict(self):
+        """Remove the least recently used entries until the cache fits its limits"""
+        try:
+            entries = []
+            for entry in self.cache_dir.glob(f"*{ENTRY_SUFFIX}"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime_ns, stat.st_size, entry))
+        except OSError:
+            return
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        while entries and (total > self.max_bytes or len(entries) > self.max_entries):
+            _, size, entry = entries.pop(0)
+            self._remove(entry)
+            total -= size
+
+    def clear(self):
+        """Remove every entry"""
+        for entry in self.cache_dir.glob(f"*{ENTRY_SUFFIX}"):
+            self._remove(entry)
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+def enabled():
+    return os.environ.get('JSON_PARSE_CACHE', 'on').lower() not in ('0', 'off', 'false', 'no')
+
+def cache_for(path):
+    """The cache holding entries for the files of path's directory"""
+    cache_dir = os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIR_NAME)
+    with _caches_lock:
+        if cache_dir not in _caches:
+            _caches[cache_dir] = ParseCache(cache_dir)
+        return _caches[cache_dir]
+
+def load_json(path):
+    """Parse a JSON file, reusing the cached result when the file is unchanged"""
+    if not enabled():
+        return json_backend.load_path(path)
+    return cache_for(path).load(path)
@@ -1,8 +1,14 @@
 import json
 from pathlib import Path
-from collections import defaultdict
+from collections import Counter, defaultdict
+from typing import List, NamedTuple, Optional
 import os
-import re
+
+from form_model import FormModel, model_from_context
+from fuzzy_match import TrigramMatcher
+from label_index import LabelIndex, SubstringIndex
+from layout_engine import LayoutBatch, order
+from text_normalizer import fold_accents
 
 # === STATIC CONFIGURATIONS ===
 STATIC_PANELS = {
@@ -71,51 +77,44 @@ STATIC_PANELS = {
     }
 }
 
+def static_configs():
+    """Configuration of the static fields by (area, field id): the first definition
+    in a panel wins, a later panel of the same area overrides an earlier one"""
+    configs = {}
+    for panel in STATIC_PANELS.values():
+        configs.update({(panel["area"], field["id"]): field for field in reversed(panel["fields"])})
+    return configs
+
+# Built once per process
+STATIC_CONFIGS = static_configs()
+
 class FieldMapper:
     """Generic field mapper that can work with any form configuration"""
     
     def __init__(self, transformed_data):
         self.transformed_data = transformed_data
         self.field_mapping = {}
+        self._label_indexes = {}
         self.create_field_mapping()
     
     def normalize_text(self, text):
         """Normalize text by removing accents and special characters"""
-        if not text:
-            return ""
-        # Remove accents and convert to lowercase
-        text = text.lower()
-        text = re.sub(r'[éèêë]', 'e', text)
-        text = re.sub(r'[àâä]', 'a', text)
-        text = re.sub(r'[ïî]', 'i', text)
-        text = re.sub(r'[ôö]', 'o', text)
-        text = re.sub(r'[ùûü]', 'u', text)
-        text = re.sub(r'[ç]', 'c', text)
-        return text
+        return fold_accents(text)
     
+    def label_index(self, form_data):
+        """Label index of a form, built on first use"""
+        key = id(form_data)
+        cached = self._label_indexes.get(key)
+        # Keep the form alive with its index so the id stays unique
+        if cached is None or cached[0] is not form_data:
+            cached = (form_data, LabelIndex(form_data, self.normalize_text))
+            self._label_indexes[key] = cached
+        return cached[1]
+
     def find_field_by_label(self, search_label, form_data):
         """Find field ID by matching labels"""
-        search_label_norm = self.normalize_text(search_label)
-        
-        # First try exact match
-        for field_id, field_data in form_data.items():
-            if isinstance(field_data, dict):
-                for label_key in ['label2', 'label']:
-                    if label_key in field_data:
-                        field_label = self.normalize_text(field_data[label_key])
-                        if field_label == search_label_norm:
-                            return field_id
-        
-        # Then try partial match
-        for field_id, field_data in form_data.items():
-            if isinstance(field_data, dict):
-                for label_key in ['label2', 'label']:
-                    if label_key in field_data:
-                        field_label = self.normalize_text(field_data[label_key])
-                        if search_label_norm in field_label or field_label in search_label_norm:
-                            return field_id
-        
-        return None
+        # Exact match first, then partial match, both in field order
+        return self.label_index(form_data).find(search_label)
     
     def create_field_mapping(self):
         """Create mapping between area_data fields and form fields"""
@@ -215,49 +214,116 @@ def find_workspace_root(start_path):
 def get_script_dir():
     return Path(__file__).parent.resolve()
 
-def find_matching_field_name(field_id: str, field_label: str, area_configs: dict, label_mappings: dict) -> tuple:
-    """Find matching field name and area from area_data.json"""
+class AreaConfigIndex:
+    """Lookup tables over the area configurations, in scan order (area, then config)"""
+
+    def __init__(self, area_configs: dict):
+        self.entries = []  # (name, area_id) per config
+        self.names = {}    # name -> first (name, area_id)
+        self.configs = {}  # (area_id, name) -> first config of that name in the area
+        self.lowered = SubstringIndex()
+        self._fuzzy = None
+        for area_id, configs in area_configs.items():
+            for config in configs:
+                name = config["name"]
+                self.entries.append((name, area_id))
+                self.names.setdefault(name, (name, area_id))
+                self.configs.setdefault((area_id, name), config)
+                self.lowered.add(name.lower())
+
+    def by_name(self, name):
+        return self.names.get(name)
+
+    def by_similar_name(self, text):
+        """First config whose lowercase name contains `text` or is contained in it"""
+        position = self.lowered.first_related(text)
+        return None if position is None else self.entries[position]
+
+    def config(self, area_id, name):
+        return self.configs.get((area_id, name))
+
+    @property
+    def fuzzy(self) -> TrigramMatcher:
+        """Trigram index of the config names, built on first use"""
+        if self._fuzzy is None:
+            self._fuzzy = TrigramMatcher(name for name, _ in self.entries)
+        return self._fuzzy
+
+    def candidates(self, text, limit=3):
+        """Best scoring configs for `text` as (name, area_id, score)"""
+        return [
+            (*self.entries[match.position], round(match.score, 3))
+            for match in self.fuzzy.search(text, limit)
+        ]
+
+class FieldMatch(NamedTuple):
+    name: Optional[str]
+    area: Optional[str]
+    method: str            # label, mapping, option, similar, fuzzy or unmatched
+    score: float = 1.0
+    candidates: List[tuple] = []
+
+# Lowest trigram similarity accepted for a fuzzy match
+FUZZY_MIN_SCORE = 0.6
+
+def match_field_name(field_id: str, field_label: str, label_mappings: dict,
+                     index: AreaConfigIndex) -> FieldMatch:
+    """Find matching field name and area from area_data.json, with how it was found"""
     # First try by label
     if field_label:
         # Try direct match
-        for area_id, configs in area_configs.items():
-            for config in configs:
-                if config["name"] == field_label:
-                    return config["name"], area_id
-                
+        found = index.by_name(field_label)
+        if found:
+            return FieldMatch(*found, 'label')
+
         # Try through label mappings
         if field_label in label_mappings:
-            mapped_label = label_mappings[field_label]
-            for area_id, configs in area_configs.items():
-                for config in configs:
-                    if config["name"] == mapped_label:
-                        return config["name"], area_id
+            found = index.by_name(label_mappings[field_label])
+            if found:
+                return FieldMatch(*found, 'mapping')
     
     # Special handling for opt_ fields
     if field_id.startswith('opt_'):
         # Map common patterns
         if field_id == 'opt_libimmo':
-            return "Option sur l'immobilier", "area2"
+            return FieldMatch("Option sur l'immobilier", "area2", 'option')
         elif field_id == 'opt_libcpta':
-            return "Option compta TCN précomptes", "area2"
+            return FieldMatch("Option compta TCN précomptes", "area2", 'option')
         elif field_id == 'opt_amti':
-            return "Intérêts échus décalés", "area2"
+            return FieldMatch("Intérêts échus décalés", "area2", 'option')
         elif field_id == 'opt_cpta':
-            return "Option compta TCN précomptes", "area2"
+            return FieldMatch("Option compta TCN précomptes", "area2", 'option')
     
-    # Try to find by similar patterns
-    field_id_normalized = field_id.lower().replace('_', ' ')
-    for area_id, configs in area_configs.items():
-        for config in configs:
-            config_name_normalized = config["name"].lower()
-            # Check if the field_id contains significant parts of the config name or vice versa
-            if (field_id_normalized in config_name_normalized or 
-                config_name_normalized in field_id_normalized):
-                return config["name"], area_id
+    # Try to find by similar patterns: the field_id contains significant
+    # parts of the config name or vice versa
+    found = index.by_similar_name(field_id.lower().replace('_', ' '))
+    if found:
+        return FieldMatch(*found, 'similar')
+
+    # Finally the most similar config name, when it is close enough
+    candidates = index.candidates(field_label or field_id.replace('_', ' '))
+    if candidates and candidates[0][2] >= FUZZY_MIN_SCORE:
+        name, area, score = candidates[0]
+        return FieldMatch(name, area, 'fuzzy', score, candidates)
     
-    return None, None
+    return FieldMatch(None, None, 'unmatched', 0.0, candidates)
+
+def find_matching_field_name(field_id: str, field_label: str, area_configs: dict, label_mappings: dict,
+                             index: AreaConfigIndex = None) -> tuple:
+    """Find matching field name and area from area_data.json"""
+    if index is None:
+        index = AreaConfigIndex(area_configs)
+    match = match_field_name(field_id, field_label, label_mappings, index)
+    return match.name, match.area
 
-def generate_properties_file(transformed_data, output_path):
+def write_match_report(report, report_path):
+    """Write how each field was matched to an area config, as JSON"""
+    summary = Counter(entry["method"] for entry in report)
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump({"summary": dict(summary), "fields": report}, f, ensure_ascii=False, indent=2)
+    print("📊 Field matching: " + ", ".join(f"{count} {method}" for method, count in summary.items()))
+
+def generate_properties_file(transformed_data, output_path, report_path=None):
     """Generate the properties file with correct format and sorting"""
     # Extract form data
     form_id = next(iter(transformed_data.get("originalJson", {}).keys()))
@@ -288,6 +354,7 @@ def generate_properties_file(transformed_data, output_path):
     # Sort configurations by sort_number and column_number
     for area_id in area_configs:
         area_configs[area_id].sort(key=lambda x: (x["sort_number"], x["column_number"]))
+    config_index = AreaConfigIndex(area_configs)
     
     # Initialize result areas
     area_fields = {
@@ -296,60 +363,63 @@ def generate_properties_file(transformed_data, output_path):
         "area3": []
     }
     
+    # Form fields by every value a config name can match: their label,
+    # the label it is mapped to, and their id. The first field wins.
+    form_fields = []
+    fields_by_name = {}
+    for field_id, field_data in form_data.items():
+        if not isinstance(field_data, dict) or field_id in STATIC_PANELS:
+            continue
+        field_label = field_data.get("label2", field_data.get("label", ""))
+        form_fields.append((field_id, field_label))
+        fields_by_name.setdefault(field_label, field_id)
+        if field_label in label_mappings:
+            fields_by_name.setdefault(label_mappings[field_label], field_id)
+        fields_by_name.setdefault(field_id, field_id)
+    
+    field_labels = dict(form_fields)
+    
     # Process all fields from form_data
     processed_fields = set()
+    report = {}  # field id -> how it was matched
     
     # First, process fields from area_data.json
     for area_id, configs in area_configs.items():
         for config in configs:
             field_name = config["name"]
-            sort_number = config["sort_number"]
-            column_number = config["column_number"]
-            
-            # Try to find matching field
-            matched_field_id = None
-            
-            # Try direct match
-            for field_id, field_data in form_data.items():
-                if not isinstance(field_data, dict) or field_id in ["valeurPanel", "csoPanel"]:
-                    continue
-                    
-                field_label = field_data.get("label2", field_data.get("label", ""))
-                
-                # Check various matching conditions
-                if (field_label == field_name or
-                    (field_label in label_mappings and label_mappings[field_label] == field_name) or
-                    field_id == field_name):
-                    matched_field_id = field_id
-                    break
+            matched_field_id = fields_by_name.get(field_name)
             
             if matched_field_id:
                 area_fields[area_id].append({
                     "id": matched_field_id,
                     "label": field_name,
-                    "sort_number": sort_number,
-                    "column_number": column_number
+                    "sort_number": config["sort_number"],
+                    "column_number": config["column_number"]
                 })
                 processed_fields.add(matched_field_id)
+                report.setdefault(matched_field_id, {
+                    "field": matched_field_id, "label": field_labels[matched_field_id], "method": "area_config",
+                    "name": field_name, "area": area_id, "score": 1.0,
+                })
     
     # Process remaining fields
-    for field_id, field_data in form_data.items():
-        if not isinstance(field_data, dict) or field_id in ["valeurPanel", "csoPanel"]:
-            continue
-            
+    for field_id, field_label in form_fields:
         if field_id not in processed_fields:
-            field_label = field_data.get("label2", field_data.get("label", ""))
-            
             # Try to find matching field name and area
-            matching_name, matching_area = find_matching_field_name(field_id, field_label, area_configs, label_mappings)
+            match = match_field_name(field_id, field_label, label_mappings, config_index)
+            matching_name, matching_area = match.name, match.area
+            report[field_id] = {
+                "field": field_id, "label": field_label, "method": match.method,
+                "name": matching_name, "area": matching_area, "score": match.score,
+            }
+            if match.method in ("fuzzy", "unmatched"):
+                report[field_id]["candidates"] = [
+                    {"name": name, "area": area, "score": score} for name, area, score in match.candidates
+                ]
             
             if matching_name and matching_area:
                 # Find the configuration for this field
-                matching_config = None
-                for config in area_configs[matching_area]:
-                    if config["name"] == matching_name:
-                        matching_config = config
-                        break
+                matching_config = config_index.config(matching_area, matching_name)
                 
                 area_fields[matching_area].append({
                     "id": field_id,
@@ -375,57 +445,36 @@ def generate_properties_file(transformed_data, output_path):
             "iprap_adtvalid": "Date palier",
             "rgvlm_rllgvl": "Libelle instrument"
         },
-    "area3": [
-        "riddev", "adtchgo", "rcepla", "acetdev"
-    ]
-}
+        # Default labels
+        "area3": {field_id: field_id for field_id in ["riddev", "adtchgo", "rcepla", "acetdev"]}
+    }
 
-    # Add static panel fields
     for area_id, static_fields in static_area_fields.items():
-        if isinstance(static_fields, dict):
-            # For area2 with specific labels
-            for field_id, label in static_fields.items():
-                if field_id not in [f["id"] for f in area_fields[area_id]]:
-                    # Get configuration from STATIC_PANELS if available
-                    static_config = None
-                    for panel in STATIC_PANELS.values():
-                        if panel["area"] == area_id:
-                            for field in panel["fields"]:
-                                if field["id"] == field_id:
-                                    static_config = field
-                                    break
-                    
-                    sort_number = int(static_config["sortNumber"]) if static_config else 999
-                    column_number = int(static_config["columnNumber"]) if static_config else 1
-                    
-                    area_fields[area_id].append({
-                        "id": field_id,
-                        "label": label,
-                        "sort_number": sort_number,
-                        "column_number": column_number
-                    })
-        else:
-            # For area3 with default labels
-            for field_id in static_fields:
-                if field_id not in [f["id"] for f in area_fields[area_id]]:
-                    # Get configuration from STATIC_PANELS if available
-                    static_config = None
-                    for panel in STATIC_PANELS.values():
-                        if panel["area"] == area_id:
-                            for field in panel["fields"]:
-                                if field["id"] == field_id:
-                                    static_config = field
-                                    break
-                    
-                    sort_number = int(static_config["sortNumber"]) if static_config else 999
-                    column_number = int(static_config["columnNumber"]) if static_config else 1
-                    
-                    area_fields[area_id].append({
-                        "id": field_id,
-                        "label": field_id,
-                        "sort_number": sort_number,
-                        "column_number": column_number
-                    })
+        present = {field["id"] for field in area_fields[area_id]}
+        for field_id, label in static_fields.items():
+            if field_id not in present:
+                static_config = STATIC_CONFIGS.get((area_id, field_id))
+                sort_number = int(static_config["sortNumber"]) if static_config else 999
+                column_number = int(static_config["columnNumber"]) if static_config else 1
+                
+                area_fields[area_id].append({
+                    "id": field_id,
+                    "label": label,
+                    "sort_number": sort_number,
+                    "column_number": column_number
+                })
+                present.add(field_id)
+    
+    # Sort the fields of every area by sort_number and column_number, in one batch
+    batch = LayoutBatch()
+    rows = []
+    for area_id, fields in area_fields.items():
+        for field in fields:
+            batch.add(None, field["id"], area_id, field["sort_number"], field["column_number"])
+            rows.append(field)
+    sorted_fields = {area_id: [] for area_id in area_fields}
+    for row in order(batch, column_numbers=batch.column_numbers):
+        sorted_fields[batch.areas[row]].append(rows[row])
     
     # Generate output
     lines = ["title=\n"]
@@ -438,14 +487,8 @@ def generate_properties_file(transformed_data, output_path):
                         f"{area_id}.title=Criteres avances" if area_id == "area2" else
                         f"{area_id}.title=Criteres de consolidation")
             
-            # Sort fields by sort_number and column_number
-            sorted_fields = sorted(
-                area_fields[area_id],
-                key=lambda x: (int(x["sort_number"]), int(x["column_number"]))
-            )
-            
             # Add fields
-            for field in sorted_fields:
+            for field in sorted_fields[area_id]:
                 lines.append(f"    {field['id']}.label={field['label']}")
             
             lines.append("")
@@ -454,42 +497,52 @@ def generate_properties_file(transformed_data, output_path):
     with open(output_path, "w", encoding="ansi") as f:
         f.write("\n".join(lines))
 
-# === CHARGEMENT DES DONNÉES ===
-script_dir = get_script_dir()
-workspace_root = find_workspace_root(script_dir)
-
-if not workspace_root:
-    print("❌ Impossible de trouver le repertoire racine du workspace")
-    exit()
-
-print(f"Workspace root: {workspace_root}")
-json_path = workspace_root / "output" / "transformed_result.json"
-print(f"Looking for JSON at: {json_path}")
-
-try:
-    with open(json_path, encoding="utf-8") as f:
-        transformed_data = json.load(f)
-    print("✅ Fichier JSON charge avec succes")
-except Exception as e:
-    print(f"❌ Erreur lors du chargement du JSON: {e}")
-    exit()
-
-# === EXTRACTION ===
-if not transformed_data:
-    print("❌ Le fichier JSON est vide")
-    exit()
-
-# Extract form data and formId
-form_id = next(iter(transformed_data.get("originalJson", {}).keys())) if isinstance(transformed_data.get("originalJson"), dict) else "default"
-
-# === SAUVEGARDE ===
-output_dir = workspace_root / ".idea" / "demo" / form_id
-output_dir.mkdir(parents=True, exist_ok=True)
-output_path = output_dir / f"{form_id}BlockForm.bloc.properties"
-
-try:
-    generate_properties_file(transformed_data, output_path)
-    print(f"✅ Fichier genere avec succes: {output_path}")
-    os.startfile(output_dir)
-except Exception as e:
-    print(f"❌ Erreur lors de l'ecriture du fichier: {e}")
\ No newline at end of file
+    if report_path:
+        write_match_report([report[field_id] for field_id, _ in form_fields], report_path)
+
+def main(context=None):
+    """Generate the block properties file of the first form"""
+    # === CHARGEMENT DES DONNÉES ===
+    script_dir = get_script_dir()
+    workspace_root = find_workspace_root(script_dir)
+
+    if not workspace_root:
+        print("❌ Impossible de trouver le repertoire racine du workspace")
+        return
+
+    print(f"Workspace root: {workspace_root}")
+    model = model_from_context(context, workspace_root / "output")
+    json_path = model.path(FormModel.TRANSFORMED)
+    print(f"Looking for JSON at: {json_path}")
+
+    try:
+        # Only the first form is used; large exports are not parsed whole
+        transformed_data = model.form_document()
+        print("✅ Fichier JSON charge avec succes")
+    except Exception as e:
+        print(f"❌ Erreur lors du chargement du JSON: {e}")
+        return
+
+    # === EXTRACTION ===
+    if not transformed_data:
+        print("❌ Le fichier JSON est vide")
+        return
+
+    # Extract form data and formId
+    form_id = next(iter(transformed_data.get("originalJson", {}).keys())) if isinstance(transformed_data.get("originalJson"), dict) else "default"
+
+    # === SAUVEGARDE ===
+    output_dir = workspace_root / ".idea" / "demo" / form_id
+    output_dir.mkdir(parents=True, exist_ok=True)
+    output_path = output_dir / f"{form_id}BlockForm.bloc.properties"
+    report_path = output_dir / f"{form_id}BlockForm.match_report.json"
+
+    try:
+        generate_properties_file(transformed_data, output_path, report_path)
+        print(f"✅ Fichier genere avec succes: {output_path}")
+        os.startfile(output_dir)
+    except Exception as e:
+        print(f"❌ Erreur lors de l'ecriture du fichier: {e}")
+
+if __name__ == "__main__":
+    main()
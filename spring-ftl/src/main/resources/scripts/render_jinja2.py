@@ -2,9 +2,122 @@
 import json
 from pathlib import Path
 from typing import Dict, List, Any, Optional
-from jinja2 import Environment, FileSystemLoader, Template
-import xml.etree.ElementTree as ET
-from xml.dom import minidom
+
+import fragment_cache
+from form_model import freeze
+from layout_engine import LayoutBatch, layout, order
+from models import Field
+import template_registry
+import xml_pretty
+from xml_emitter import XmlEmitter, escape_attribute, escape_text
+
+# Static field definitions for area2 (valeurPanel); read-only, shared by every form
+STATIC_FIELDS = freeze({
+    "reiv_rceval": {
+        "nature": "fk",
+        "functionId": "FK_instrument",
+        "valueField": "acecev",
+        "fkSearchField": "acecev",
+        "displayTemplate": "{acecev}",
+        "sortNumber": "1",
+        "columnNumber": "2",
+        "readOnly": "false",
+        "hidden": "False",
+        "clearValueIfNotInStore": "true",
+        "controls": [{"id": "mandatory", "nature": "MANDATORY"}],
+        "area": "area2",
+        "label": ""
+    },
+    "reiv_ridori": {
+        "nature": "lov",
+        "lov": "IprapRidoriLovQueryServiceImpl",
+        "valueField": "value",
+        "displayTemplate": "{value} - {longLabel}",
+        "sortNumber": "2",
+        "columnNumber": "2",
+        "readOnly": "false",
+        "hidden": "False",
+        "clearValueIfNotInStore": "true",
+        "controls": [{"id": "mandatory", "nature": "MANDATORY"}],
+        "filters": [
+            {"id": "reiv_rceval", "fieldId": "reiv_rceval"},
+            {"id": "reiv_xidcev", "fieldId": "reiv_xidcev"}
+        ],
+        "area": "area2",
+        "label": ""
+    }
+})
+
+# Consolidation field definitions for area3 (csoPanel); read-only, shared by every form
+CONSOLIDATION_FIELDS = freeze({
+    "riddev": {
+        "nature": "lov",
+        "lov": "IprapRiddevLovQueryServiceImpl",
+        "valueField": "value",
+        "displayTemplate": "{value} - {longLabel}",
+        "columnNumber": "1",
+        "sortNumber": "1",
+        "readOnly": "false",
+        "hidden": "False",
+        "clearValueIfNotInStore": "true",
+        "controls": [{"id": "mandatory", "nature": "MANDATORY"}],
+        "label": ""
+    },
+    "acetdev": {
+        "nature": "lov",
+        "lov": "IprapAcetdevLovQueryServiceImpl",
+        "valueField": "value",
+        "displayTemplate": "{value} - {longLabel}",
+        "columnNumber": "1",
+        "sortNumber": "2",
+        "readOnly": "false",
+        "hidden": "False",
+        "clearValueIfNotInStore": "true",
+        "controls": [{"id": "mandatory", "nature": "MANDATORY"}],
+        "label": ""
+    }
+})
+
+# Static panel field id -> (panel id, definition)
+STATIC_PANEL_FIELDS = {
+    field_id: (panel_id, field_data)
+    for panel_id, fields in (('valeurPanel', STATIC_FIELDS), ('csoPanel', CONSOLIDATION_FIELDS))
+    for field_id, field_data in fields.items()
+}
+
+def template_field(field_id: str, field_data: Dict[str, Any], filters_map: Dict[str, List[str]]) -> Dict[str, Any]:
+    """The template data of one field"""
+    field_nature = field_data.get('nature', 'text')
+    field = {
+        'id': field_id,
+        'nature': field_nature,
+        'columnNumber': field_data.get('columnNumber', '1'),
+        'sortNumber': field_data.get('sortNumber', '1'),
+        'readOnly': field_data.get('readOnly', 'false'),
+        'hidden': field_data.get('hidden', 'false'),
+        'label': field_data.get('label2', ''),  # Use label2 as requested
+        'lov': field_data.get('lov', ''),
+        # Only include valueField if nature is "lov"
+        'valueField': field_data.get('valueField', '') if field_nature == 'lov' else '',
+        'displayTemplate': field_data.get('displayTemplate', ''),
+        'functionId': field_data.get('functionId', ''),
+        'fkSearchField': field_data.get('fkSearchField', ''),
+        'clearValueIfNotInStore': field_data.get('clearValueIfNotInStore', ''),
+        'controls': field_data.get('controls', []),
+        'filters': []
+    }
+    
+    # Add filters if they exist
+    if field_id in filters_map:
+        for filter_field in filters_map[field_id]:
+            field['filters'].append({
+                'id': filter_field,
+                'fieldId': filter_field
+            })
+    elif STATIC_PANEL_FIELDS.get(field_id, (None, None))[1] == field_data:
+        # Static panel field equal to its definition: generate_xml_directly splices its pre-rendered markup
+        field['panel'] = STATIC_PANEL_FIELDS[field_id][0]
+    return field
 
 def prepare_template_data(field_links_data: Dict[str, Any], 
                          area_fields: Dict[str, List], 
@@ -25,45 +138,22 @@ def prepare_template_data(field_links_data: Dict[str, Any],
         }
         field_links.append(field_link)
     
-    # Process areas and fields
+    # Process fields, sorted by sortNumber within their area in one batch
+    batch = LayoutBatch()
+    rows = []
+    for area_id in ['area1', 'area2', 'area3']:
+        for field_id, field_data in area_fields.get(area_id, ()):
+            field = template_field(field_id, field_data, filters_map)
+            batch.add(None, field['id'], area_id, field['sortNumber'])
+            rows.append(field)
+    sorted_fields = {'area1': [], 'area2': [], 'area3': []}
+    for row in order(batch):
+        sorted_fields[batch.areas[row]].append(rows[row])
+
+    # Process areas
     areas = []
     for area_id in ['area1', 'area2', 'area3']:
-        if area_id in area_fields and area_fields[area_id]:
-            fields = []
-            for field_id, field_data in area_fields[area_id]:
-                field_nature = field_data.get('nature', 'text')
-                field = {
-                    'id': field_id,
-                    'nature': field_nature,
-                    'columnNumber': field_data.get('columnNumber', '1'),
-                    'sortNumber': field_data.get('sortNumber', '1'),
-                    'readOnly': field_data.get('readOnly', 'false'),
-                    'hidden': field_data.get('hidden', 'false'),
-                    'label': field_data.get('label2', ''),  # Use label2 as requested
-                    'lov': field_data.get('lov', ''),
-                    # Only include valueField if nature is "lov"
-                    'valueField': field_data.get('valueField', '') if field_nature == 'lov' else '',
-                    'displayTemplate': field_data.get('displayTemplate', ''),
-                    'functionId': field_data.get('functionId', ''),
-                    'fkSearchField': field_data.get('fkSearchField', ''),
-                    'clearValueIfNotInStore': field_data.get('clearValueIfNotInStore', ''),
-                    'controls': field_data.get('controls', []),
-                    'filters': []
-                }
-                
-                # Add filters if they exist
-                if field_id in filters_map:
-                    for filter_field in filters_map[field_id]:
-                        field['filters'].append({
-                            'id': filter_field,
-                            'fieldId': filter_field
-                        })
-                
-                fields.append(field)
-            
-            # Sort fields by sortNumber
-            fields.sort(key=lambda x: int(x['sortNumber']))
-            
+        if sorted_fields[area_id]:
             # Correct sortNumber for areas: area1=1, area3=2, area2=3
             area_sort_mapping = {
                 'area1': '1',
@@ -74,7 +164,7 @@ def prepare_template_data(field_links_data: Dict[str, Any],
             area = {
                 'id': area_id,
                 'sortNumber': area_sort_mapping[area_id],
-                'fields': fields
+                'fields': sorted_fields[area_id]
             }
             areas.append(area)
     
@@ -94,171 +184,150 @@ def render_template(template_dir: Path,
     # If template exists, use Jinja2
     template_file = template_dir / template_name
     if template_file.exists():
-        env = Environment(loader=FileSystemLoader(template_dir))
-        template = env.get_template(template_name)
-        rendered_xml = template.render(**data)
+        template = template_registry.get_template(template_dir, template_name)
+        chunks = template.generate(**data)
     else:
         # Generate XML directly if template doesn't exist
+        template = None
         rendered_xml = generate_xml_directly(data)
+        chunks = [rendered_xml]
     
-    # Pretty print the XML
+    # Pretty print the XML while it is rendered, straight to the output file
     try:
-        # Parse and format the XML
-        root = ET.fromstring(rendered_xml)
-        rough_string = ET.tostring(root, encoding='utf-8')
-        reparsed = minidom.parseString(rough_string)
-        pretty_xml = reparsed.toprettyxml(indent='    ', encoding=None)
-        
-        # Remove empty lines and fix encoding declaration
-        lines = [line for line in pretty_xml.split('\n') if line.strip()]
-        if lines and lines[0].startswith('<?xml'):
-            lines[0] = '<?xml version="1.0" encoding="UTF-8" standalone="no"?>'
-        
-        formatted_xml = '\n'.join(lines)
-        
-    except ET.ParseError:
-        # If parsing fails, use the original rendered XML
-        formatted_xml = rendered_xml
-    
-    # Write to output file
-    with output_path.open('w', encoding='utf-8') as f:
-        f.write(formatted_xml)
+        xml_pretty.write_pretty(chunks, output_path)
+    except xml_pretty.ParseError:
+        # If parsing fails, write the original rendered XML
+        if template is not None:
+            template_registry.render_to_file(template, output_path, data, encoding='utf-8')
+        else:
+            with output_path.open('w', encoding='utf-8') as f:
+                f.write(rendered_xml)
+
+# Optional field attributes, in output order
+OPTIONAL_FIELD_ATTRIBUTES = ('lov', 'valueField', 'functionId', 'fkSearchField', 'displayTemplate', 'clearValueIfNotInStore')
+
+def write_field(emitter: XmlEmitter, field: Dict[str, Any]):
+    """Write the element of one field"""
+    field_prefix, child_prefix, item_prefix = emitter.prefixes(3)
+    parts = [f'{field_prefix}<field id="{escape_attribute(field["id"])}" nature="{escape_attribute(field["nature"])}"'
+             f' columnNumber="{escape_attribute(field["columnNumber"])}" sortNumber="{escape_attribute(field["sortNumber"])}"'
+             f' readOnly="{escape_attribute(field["readOnly"])}" hidden="{escape_attribute(field["hidden"])}"']
+
+    # Add optional attributes; valueField only when nature is "lov"
+    parts += [f' {name}="{escape_attribute(field[name])}"' for name in OPTIONAL_FIELD_ATTRIBUTES
+              if field.get(name) and (name != 'valueField' or field['nature'] == 'lov')]
+    parts.append('>')
+
+    # Add label
+    if field.get('label'):
+        parts.append(f"{child_prefix}<label>{escape_text(field['label'])}</label>")
+
+    # Add controls
+    if field.get('controls'):
+        parts.append(f'{child_prefix}<controls>')
+        parts += [f'{item_prefix}<control id="{escape_attribute(control["id"])}" nature="{escape_attribute(control["nature"])}" />'
+                  for control in field['controls']]
+        parts.append(f'{child_prefix}</controls>')
+
+    # Add filters
+    if field.get('filters'):
+        parts.append(f'{child_prefix}<filters>')
+        parts += [f'{item_prefix}<filter id="{escape_attribute(filter_item["id"])}" fieldId="{escape_attribute(filter_item["fieldId"])}" />'
+                  for filter_item in field['filters']]
+        parts.append(f'{child_prefix}</filters>')
+
+    parts.append(f'{field_prefix}</field>')
+    emitter.write(''.join(parts))
+
+def static_panel_fragments(panel_id: str, emitter: XmlEmitter) -> Dict[str, str]:
+    """The elements of the fields of a static panel as written by `emitter`, by field id; rendered once per process"""
+    def render():
+        fragments = {}
+        for field_id, (field_panel_id, field_data) in STATIC_PANEL_FIELDS.items():
+            if field_panel_id == panel_id:
+                fragment = XmlEmitter(indent=emitter.indent, newline=emitter.newline, depth=emitter.depth)
+                write_field(fragment, template_field(field_id, field_data, {}))
+                fragments[field_id] = fragment.getvalue()
+        return fragments
+    return fragment_cache.static_panel(panel_id, 'render_jinja2.generate_xml_directly', emitter.options, render)
 
 def generate_xml_directly(data: Dict[str, Any]) -> str:
     """Generate XML directly without template"""
-    
-    xml_lines = [
-        '<?xml version="1.0" encoding="UTF-8" standalone="no"?>',
-        f'<form xmlns:jxb="http://java.sun.com/xml/ns/jaxb" '
-        f'xmlns:xjc="http://java.sun.com/xml/ns/jaxb/xjc" '
-        f'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
-        f'id="{data["form_id"]}" '
-        f'xsi:noNamespaceSchemaLocation="http://scheme.cf.linedata.com/function.xsd" '
-        f'fatherId="" beanId="{data["bean_id"]}">',
-        '    <graphic>',
-        '        <headerVisible>false</headerVisible>',
-        '        <collapsible>false</collapsible>',
-        '        <collapsed>false</collapsed>',
-        '    </graphic>',
-        '',
-        '    <fieldLinks>'
-    ]
-    
+    emitter = XmlEmitter(indent='    ')
+    emitter.declaration()
+    emitter.start('form', [
+        ('xmlns:jxb', "http://java.sun.com/xml/ns/jaxb"),
+        ('xmlns:xjc', "http://java.sun.com/xml/ns/jaxb/xjc"),
+        ('xmlns:xsi', "http://www.w3.org/2001/XMLSchema-instance"),
+        ('id', data["form_id"]),
+        ('xsi:noNamespaceSchemaLocation', "http://scheme.cf.linedata.com/function.xsd"),
+        ('fatherId', ""),
+        ('beanId', data["bean_id"]),
+    ])
+    emitter.start('graphic')
+    emitter.element('headerVisible', 'false')
+    emitter.element('collapsible', 'false')
+    emitter.element('collapsed', 'false')
+    emitter.end('graphic')
+
     # Add field links
+    emitter.start('fieldLinks')
     for link in data['field_links']:
-        xml_lines.extend([
-            f'        <fieldLink childFieldId="{link["childFieldId"]}" '
-            f'id="{link["id"]}" methodName="{link["methodName"]}" '
-            f'nature="{link["nature"]}" disabled="{link["disabled"]}" '
-            f'beanId="{link["beanId"]}">',
-        ])
-        
+        emitter.start_line(''.join([f'<fieldLink'] + [
+            f' {name}="{escape_attribute(link[name])}"'
+            for name in ('childFieldId', 'id', 'methodName', 'nature', 'disabled', 'beanId')
+        ] + ['>']))
         for father in link['fathers']:
-            xml_lines.append(f'            <fieldLinkFather fatherFieldId="{father}" />')
-        
-        xml_lines.append('        </fieldLink>')
-    
-    xml_lines.extend([
-        '    </fieldLinks>',
-        '',
-        '    <areas>'
-    ])
-    
+            emitter.line(f'<fieldLinkFather fatherFieldId="{escape_attribute(father)}" />')
+        emitter.end('fieldLink')
+    emitter.end('fieldLinks')
+
     # Add areas
+    emitter.start('areas')
     for area in data['areas']:
-        xml_lines.extend([
-            '',
-            f'        <area id="{area["id"]}" sortNumber="{area["sortNumber"]}">',
-            '            <graphic><headerVisible>false</headerVisible></graphic>',
-            '            <fields>'
-        ])
-        
-        # Add fields
+        emitter.start('area', [('id', area["id"]), ('sortNumber', area["sortNumber"])])
+        emitter.start('graphic')
+        emitter.element('headerVisible', 'false')
+        emitter.end('graphic')
+        emitter.start('fields')
+
+        # Add fields; unchanged static panel fields are spliced in already rendered
         for field in area['fields']:
-            field_attrs = [
-                f'id="{field["id"]}"',
-                f'nature="{field["nature"]}"',
-                f'columnNumber="{field["columnNumber"]}"',
-                f'sortNumber="{field["sortNumber"]}"',
-                f'readOnly="{field["readOnly"]}"',
-                f'hidden="{field["hidden"]}"'
-            ]
-            
-            # Add optional attributes
-            if field.get('lov'):
-                field_attrs.append(f'lov="{field["lov"]}"')
-            # Only add valueField if nature is "lov"
-            if field.get('valueField') and field['nature'] == 'lov':
-                field_attrs.append(f'valueField="{field["valueField"]}"')
-            if field.get('functionId'):
-                field_attrs.append(f'functionId="{field["functionId"]}"')
-            if field.get('fkSearchField'):
-                field_attrs.append(f'fkSearchField="{field["fkSearchField"]}"')
-            if field.get('displayTemplate'):
-                field_attrs.append(f'displayTemplate="{field["displayTemplate"]}"')
-            if field.get('clearValueIfNotInStore'):
-                field_attrs.append(f'clearValueIfNotInStore="{field["clearValueIfNotInStore"]}"')
-            
-            field_line = f'                <field {" ".join(field_attrs)}>'
-            xml_lines.append(field_line)
-            
-            # Add label
-            if field.get('label'):
-                xml_lines.append(f'<label>{field["label"]}</label>')
-            
-            # Add controls
-            if field.get('controls'):
-                xml_lines.append('                    <controls>')
-                for control in field['controls']:
-                    xml_lines.append(f'                        <control id="{control["id"]}" nature="{control["nature"]}" />')
-                xml_lines.append('                    </controls>')
-            
-            # Add filters
-            if field.get('filters'):
-                xml_lines.append('                    <filters>')
-                for filter_item in field['filters']:
-                    xml_lines.append(f'                        <filter id="{filter_item["id"]}" fieldId="{filter_item["fieldId"]}" />')
-                xml_lines.append('                    </filters>')
-            
-            xml_lines.append('                </field>')
-        
-        xml_lines.extend([
-            '            </fields>',
-            '        </area>'
-        ])
-    
-    xml_lines.extend([
-        '',
-        '    </areas>',
-        '</form>'
-    ])
-    
-    return '\n'.join(xml_lines)
+            panel_id = field.get('panel')
+            if panel_id:
+                emitter.splice(static_panel_fragments(panel_id, emitter)[field['id']])
+            else:
+                write_field(emitter, field)
+
+        emitter.end('fields')
+        emitter.end('area')
+
+    emitter.end('areas')
+    emitter.end('form')
+    return emitter.getvalue()
 
 # Enhanced data_loader.py with additional functions
-import json
 from pathlib import Path
 from typing import Dict, List, Any, Tuple
 
+import json_backend
+import parse_cache
+
 def load_area_config(area_config_path: Path) -> List[Dict[str, Any]]:
     """Load area configuration from JSON file"""
-    with area_config_path.open(encoding="utf-8") as f:
-        return json.load(f)
+    return parse_cache.load_json(area_config_path)
 
 def load_json_data(fieldlink_path: Path, area_path: Path, filters_path: Path) -> Tuple[Dict[str, Any], Dict[str, Any], List[Dict[str, Any]]]:
     """Load all required JSON data files"""
     # Load field links
-    with fieldlink_path.open(encoding="utf-8") as f:
-        field_links_data = json.load(f)
+    field_links_data = parse_cache.load_json(fieldlink_path)
     
     # Load areas data
-    with area_path.open(encoding="utf-8") as f:
-        areas_data = json.load(f)
-        areas_data = areas_data.get("original_json", {}).get("aini", {})
+    areas_data = parse_cache.load_json(area_path)
+    areas_data = areas_data.get("original_json", {}).get("aini", {})
     
     # Load filters
-    with filters_path.open(encoding="utf-8") as f:
-        filters_list = json.load(f)
+    filters_list = parse_cache.load_json(filters_path)
     
     return field_links_data, areas_data, filters_list
 
@@ -308,21 +377,23 @@ def organize_fields_by_area(field_to_area: Dict[str, Dict[str, Any]],
     area_fields = {"area1": [], "area2": [], "area3": []}
     
     # Process fields from field_to_area
+    batch = LayoutBatch()
     for field_name, field_info in field_to_area.items():
-        area_id = field_info['area_id']
         field_id = field_name_to_id.get(field_name)
-        
         if field_id and field_id in areas_data:
-            field_data = areas_data[field_id].copy()
-            # Only multiply sortNumber by 10 for area1
-            if area_id == 'area1':
-                field_data['sortNumber'] = str(int(field_info['sort_number']) * 10)
-            else:
-                field_data['sortNumber'] = field_info['sort_number']
-            field_data['columnNumber'] = field_info['column_number']
+            batch.add(None, field_id, field_info['area_id'], field_info['sort_number'], field_info['column_number'])
+
+    # Only multiply sortNumber by 10 for area1
+    placed = layout(batch, 'scaled')
+    for row, field_id in enumerate(batch.field_ids):
+        # The source attributes are shared; only the placement is stored on the field
+        field_data = Field(areas_data[field_id], {
+            'sortNumber': placed.sort_numbers[row],
+            'columnNumber': placed.column_numbers[row],
             # Set readOnly to false by default
-            field_data['readOnly'] = "false"
-            area_fields[area_id].append((field_id, field_data))
+            'readOnly': "false",
+        })
+        area_fields[placed.areas[row]].append((field_id, field_data))
     
     # Add static fields for area2 and area3
     static_fields = get_static_fields()
@@ -337,73 +408,12 @@ def organize_fields_by_area(field_to_area: Dict[str, Dict[str, Any]],
     return area_fields
 
 def get_static_fields() -> Dict[str, Dict[str, Any]]:
-    """Get static field definitions for area2"""
-    return {
-        "reiv_rceval": {
-            "nature": "fk",
-            "functionId": "FK_instrument",
-            "valueField": "acecev",
-            "fkSearchField": "acecev",
-            "displayTemplate": "{acecev}",
-            "sortNumber": "1",
-            "columnNumber": "2",
-            "readOnly": "false",
-            "hidden": "False",
-            "clearValueIfNotInStore": "true",
-            "controls": [{"id": "mandatory", "nature": "MANDATORY"}],
-            "area": "area2",
-            "label": ""
-        },
-        "reiv_ridori": {
-            "nature": "lov",
-            "lov": "IprapRidoriLovQueryServiceImpl",
-            "valueField": "value",
-            "displayTemplate": "{value} - {longLabel}",
-            "sortNumber": "2",
-            "columnNumber": "2",
-            "readOnly": "false",
-            "hidden": "False",
-            "clearValueIfNotInStore": "true",
-            "controls": [{"id": "mandatory", "nature": "MANDATORY"}],
-            "filters": [
-                {"id": "reiv_rceval", "fieldId": "reiv_rceval"},
-                {"id": "reiv_xidcev", "fieldId": "reiv_xidcev"}
-            ],
-            "area": "area2",
-            "label": ""
-        }
-    }
+    """Get static field definitions for area2 (shared, read-only)"""
+    return STATIC_FIELDS
 
 def get_consolidation_fields() -> Dict[str, Dict[str, Any]]:
-    """Get consolidation field definitions for area3"""
-    return {
-        "riddev": {
-            "nature": "lov",
-            "lov": "IprapRiddevLovQueryServiceImpl",
-            "valueField": "value",
-            "displayTemplate": "{value} - {longLabel}",
-            "columnNumber": "1",
-            "sortNumber": "1",
-            "readOnly": "false",
-            "hidden": "False",
-            "clearValueIfNotInStore": "true",
-            "controls": [{"id": "mandatory", "nature": "MANDATORY"}],
-            "label": ""
-        },
-        "acetdev": {
-            "nature": "lov",
-            "lov": "IprapAcetdevLovQueryServiceImpl",
-            "valueField": "value",
-            "displayTemplate": "{value} - {longLabel}",
-            "columnNumber": "1",
-            "sortNumber": "2",
-            "readOnly": "false",
-            "hidden": "False",
-            "clearValueIfNotInStore": "true",
-            "controls": [{"id": "mandatory", "nature": "MANDATORY"}],
-            "label": ""
-        }
-    }
+    """Get consolidation field definitions for area3 (shared, read-only)"""
+    return CONSOLIDATION_FIELDS
 
 def validate_json_files(fieldlink_path: Path, area_path: Path, filters_path: Path, area_config_path: Path) -> bool:
     """Validate that all required JSON files exist and are readable"""
@@ -415,9 +425,8 @@ def validate_json_files(fieldlink_path: Path, area_path: Path, filters_path: Pat
             return False
         
         try:
-            with file_path.open(encoding="utf-8") as f:
-                json.load(f)
-        except json.JSONDecodeError as e:
+            parse_cache.load_json(file_path)
+        except json_backend.JSONDecodeError as e:
             print(f"❌ Invalid JSON in file {file_path}: {e}")
             return False
         except Exception as e:
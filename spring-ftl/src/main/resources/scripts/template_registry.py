@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Template registry
+One process-wide source of Jinja2 templates. Environments are shared between
+generators that use the same options, so a template (a file or an inline
+template string) is compiled at most once per process. The compiled code is
+kept in a FileSystemBytecodeCache under output/.cache/templates, so later runs
+load it instead of compiling again. render_to_file() streams a template into a
+file instead of building the whole document as one string first.
+Set TEMPLATE_BYTECODE_CACHE=off to compile in memory only, or to a directory
+to keep the bytecode cache there.
+
+For the packaged build, `python template_registry.py --compile DIR` compiles
+every template file and every inline template of the generators into Python
+modules (Environment.compile_templates). main.spec bundles them, and the
+frozen app loads them through a ModuleLoader without compiling anything.
+"""
+
+import argparse
+import hashlib
+import importlib
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+from jinja2 import (BaseLoader, ChoiceLoader, Environment, FileSystemBytecodeCache, FileSystemLoader, ModuleLoader,
+                    TemplateNotFound, select_autoescape)
+
+DEFAULT_CACHE_DIR = os.path.join("output", ".cache", "templates")
+STRING_PREFIX = "string:"
+STREAM_BUFFER_SIZE = 1 << 16
+COMPILED_DIR_NAME = "compiled_templates"
+
+# Template files precompiled for the packaged build
+SCRIPTS_DIR = Path(__file__).resolve().parent
+TEMPLATE_DIRS = (SCRIPTS_DIR / "templates", SCRIPTS_DIR.parent / "templates")
+
+# Inline templates of the generators, as (module, attribute)
+INLINE_TEMPLATES = (
+    ('mapping', 'TEMPLATE'),
+    ('mapping', 'FIELD_TEMPLATE'),
+    ('combine_with_temp', 'TEMPLATE'),
+    ('lov_impl_', 'TEMPLATE'),
+    ('screenfinal', 'template_content'),
+    ('Interface', 'JAVA_TEMPLATE'),
+    ('FormService', 'JAVA_TEMPLATE'),
+    ('FunctionService', 'JAVA_TEMPLATE'),
+    ('GridService', 'JAVA_TEMPLATE'),
+)
+
+# Environment options the generators use; every template is precompiled for each
+OPTION_SETS = (
+    {},
+    {'trim_blocks': True, 'lstrip_blocks': True},   # filters
+    {'autoescape': ('html', 'xml')},                 # template_renderer
+)
+
+class CompileStats(NamedTuple):
+    compiled: int       # templates compiled from source
+    cached: int         # templates loaded from the bytecode cache
+    seconds: float      # time spent compiling
+
+    def __sub__(self, other):
+        return CompileStats(self.compiled - other.compiled, self.cached - other.cached, self.seconds - other.seconds)
+
+_stats_lock = threading.Lock()
+_stats = CompileStats(0, 0, 0.0)
+
+def _count(compiled=0, cached=0, seconds=0.0):
+    global _stats
+    with _stats_lock:
+        _stats = CompileStats(_stats.compiled + compiled, _stats.cached + cached, _stats.seconds + seconds)
+
+def compile_stats() -> CompileStats:
+    """Totals for this process; subtract an earlier snapshot to measure a stage"""
+    return _stats
+
+class _BytecodeCache(FileSystemBytecodeCache):
+    """Bytecode cache that counts its hits and creates its directory on first write"""
+
+    def load_bytecode(self, bucket):
+        super().load_bytecode(bucket)
+        if bucket.code is not None:
+            _count(cached=1)
+
+    def dump_bytecode(self, bucket):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            super().dump_bytecode(bucket)
+        except OSError:
+            pass  # a cache that cannot be written is simply skipped
+
+class _Environment(Environment):
+    """Environment that times template compilation"""
+
+    def compile(self, source, name=None, filename=None, raw=False, defer_init=False):
+        started = time.perf_counter()
+        try:
+            return super().compile(source, name, filename, raw, defer_init)
+        finally:
+            _count(compiled=1, seconds=time.perf_counter() - started)
+
+# Inline template sources, keyed by their registered name
+_strings = {}
+
+def _register(source):
+    """Name under which an inline template is loaded"""
+    name = STRING_PREFIX + hashlib.sha1(source.encode('utf-8')).hexdigest()
+    _strings.setdefault(name, source)
+    return name
+
+class _RegistryLoader(BaseLoader):
+    """Registered template strings, then the files of the template directories"""
+
+    def __init__(self, template_dirs=()):
+        self.files = FileSystemLoader([str(path) for path in template_dirs]) if template_dirs else None
+
+    def get_source(self, environment, template):
+        if template in _strings:
+            return _strings[template], None, lambda: True
+        if self.files is None:
+            raise TemplateNotFound(template)
+        return self.files.get_source(environment, template)
+
+    def list_templates(self):
+        files = self.files.list_templates() if self.files is not None else []
+        return sorted(set(_strings) | set(files))
+
+def enabled():
+    return os.environ.get('TEMPLATE_BYTECODE_CACHE', 'on').lower() not in ('0', 'off', 'false', 'no')
+
+def cache_dir():
+    """Directory of the bytecode cache"""
+    setting = os.environ.get('TEMPLATE_BYTECODE_CACHE', 'on')
+    if setting.lower() in ('1', 'on', 'true', 'yes'):
+        return os.path.abspath(DEFAULT_CACHE_DIR)
+    return os.path.abspath(setting)
+
+_environments = {}
+_environments_lock = threading.Lock()
+
+def _options_key(options):
+    return tuple(sorted((name, tuple(value) if isinstance(value, list) else value) for name, value in options.items()))
+
+def _options_digest(options):
+    # Options change the generated code, so each set has its own cache files and modules
+    return hashlib.sha1(repr(_options_key(options)).encode('utf-8')).hexdigest()[:12]
+
+def _settings(options):
+    settings = dict(options)
+    if isinstance(settings.get('autoescape'), (tuple, list)):
+        settings['autoescape'] = select_autoescape(list(settings['autoescape']))
+    return settings
+
+def compiled_dir():
+    """Precompiled template modules bundled into the frozen app, or None"""
+    if getattr(sys, 'frozen', False) and hasattr(sys, '_MEIPASS'):
+        path = os.path.join(sys._MEIPASS, COMPILED_DIR_NAME)
+        if os.path.isdir(path):
+            return path
+    return None
+
+def environment(template_dir=None, **options) -> Environment:
+    """The shared environment for a template directory and Environment options
+
+    autoescape may be given as a tuple of file extensions, for select_autoescape.
+    """
+    key = (str(Path(template_dir).resolve()) if template_dir is not None else None, _options_key(options))
+    with _environments_lock:
+        if key not in _environments:
+            settings = _settings(options)
+            digest = _options_digest(options)
+            if enabled():
+                settings['bytecode_cache'] = _BytecodeCache(cache_dir(), f"__jinja2_{digest}_%s.cache")
+            loader = _RegistryLoader([key[0]] if key[0] is not None else ())
+            compiled = compiled_dir()
+            if compiled is not None and os.path.isdir(os.path.join(compiled, digest)):
+                # Precompiled modules first; anything not precompiled is still compiled on demand
+                loader = ChoiceLoader([ModuleLoader(os.path.join(compiled, digest)), loader])
+            _environments[key] = _Environment(loader=loader, **settings)
+        return _environments[key]
+
+def get_template(template_dir, name, **options):
+    """A template file of template_dir"""
+    return environment(template_dir, **options).get_template(name)
+
+def from_string(source, **options):
+    """An inline template, compiled once per process and kept in the bytecode cache"""
+    return environment(None, **options).get_template(_register(source))
+
+def render_to_file(template, path, *args, encoding='utf-8', **kwargs):
+    """Render a template straight into a file, chunk by chunk
+
+    Writes the same bytes as Path.write_text(template.render(...)). The output
+    goes to a temporary file that replaces `path` at the end, so a failed render
+    leaves the previous file in place.
+    """
+    path = Path(path)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp_path, 'w', encoding=encoding, buffering=STREAM_BUFFER_SIZE) as f:
+            template.stream(*args, **kwargs).dump(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def compile_templates(target, template_dirs=TEMPLATE_DIRS, log_function=None):
+    """Compile the template files and the generators' inline templates into Python modules
+
+    Writes one directory of modules per option set in OPTION_SETS, named like
+    the bytecode cache files of that set.
+    """
+    for module_name, attribute in INLINE_TEMPLATES:
+        _register(getattr(importlib.import_module(module_name), attribute))
+    for options in OPTION_SETS:
+        env = _Environment(loader=_RegistryLoader(template_dirs), **_settings(options))
+        env.compile_templates(os.path.join(target, _options_digest(options)), zip=None,
+                              log_function=log_function, ignore_errors=False)
+
+def main():
+    """Command line entry point of the build step"""
+    parser = argparse.ArgumentParser(description="Precompile the Jinja2 templates into Python modules")
+    parser.add_argument('--compile', metavar='DIR', required=True, help="directory to write the modules to")
+    parser.add_argument('--templates', metavar='DIR', action='append',
+                        help="template directory (repeatable; default: the repository's template directories)")
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(SCRIPTS_DIR))
+    template_dirs = args.templates or [path for path in TEMPLATE_DIRS if path.is_dir()]
+    compile_templates(args.compile, template_dirs)
+    modules = sum(len(files) for _, _, files in os.walk(args.compile))
+    print(f"✅ {modules} template modules written to {args.compile}")
+
+if __name__ == "__main__":
+    main()
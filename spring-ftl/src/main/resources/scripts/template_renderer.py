@@ -1,6 +1,7 @@
 from pathlib import Path
 from typing import Dict, List, Any, Tuple
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+import template_registry
 
 def prepare_template_data(field_links_data: Dict[str, Any], 
                         area_fields: Dict[str, List[Tuple[str, Dict[str, Any]]]], 
@@ -66,13 +67,7 @@ def prepare_template_data(field_links_data: Dict[str, Any],
 
 def render_template(template_dir: Path, template_name: str, data: Dict[str, Any], output_path: Path) -> None:
     """Render template with data and write to output file"""
-    env = Environment(
-        loader=FileSystemLoader(template_dir),
-        autoescape=select_autoescape(['html', 'xml'])
-    )
-    
-    template = env.get_template(template_name)
-    output = template.render(**data)
+    template = template_registry.get_template(template_dir, template_name, autoescape=('html', 'xml'))
     
-    # Write output with proper encoding
-    output_path.write_text(output, encoding='cp1252') 
\ No newline at end of file
+    # Stream the output to the file with proper encoding
+    template_registry.render_to_file(template, output_path, data, encoding='cp1252') 
\ No newline at end of file
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Text normalizer
+Label normalization shared by the generators. Each normalization is a
+str.translate table (precomputed for Latin text, filled on first use for any
+other character) behind an LRU cache keyed by the input string, so the
+labels that every stage normalizes again and again are only converted once.
+
+normalize_label  - lowercase, accents and symbols removed, whitespace
+                   collapsed (mapping.py)
+fold_accents     - lowercase, French accents folded (properties_ftl.py)
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+
+CACHE_SIZE = 1 << 16
+PRECOMPUTED = range(0x250)  # Basic Latin to Latin Extended-B
+
+_KEPT = re.compile(r'[ -~\w\s]')
+
+class TranslationTable(dict):
+    """str.translate table computed per character on first use"""
+
+    def __init__(self, convert, precompute=PRECOMPUTED):
+        super().__init__()
+        self.convert = convert
+        for code_point in precompute:
+            self[code_point]
+
+    def __missing__(self, code_point):
+        value = self.convert(chr(code_point)) or None  # None deletes the character
+        self[code_point] = value
+        return value
+
+def _label_char(char):
+    """Decompose, drop combining marks and anything but ASCII, letters, digits and spaces"""
+    return ''.join(
+        part for part in unicodedata.normalize('NFD', char)
+        if unicodedata.category(part) != 'Mn' and _KEPT.match(part)
+    )
+
+_ACCENTS = {'e': 'éèêë', 'a': 'àâä', 'i': 'ïî', 'o': 'ôö', 'u': 'ùûü', 'c': 'ç'}
+
+LABEL_TABLE = TranslationTable(_label_char)
+ACCENT_TABLE = str.maketrans({accent: plain for plain, accents in _ACCENTS.items() for accent in accents})
+
+@lru_cache(maxsize=CACHE_SIZE)
+def normalize_label(text):
+    """Lowercase label without accents, symbols or repeated whitespace"""
+    if not text:
+        return ""
+    # Lowercasing needs the whole string (final sigma), the rest is per character
+    return ' '.join(text.lower().translate(LABEL_TABLE).split())
+
+@lru_cache(maxsize=CACHE_SIZE)
+def fold_accents(text):
+    """Lowercase label with French accents replaced by the plain letter"""
+    if not text:
+        return ""
+    return text.lower().translate(ACCENT_TABLE)
+
+def cache_info():
+    """Hit/miss counts of both caches"""
+    return {'normalize_label': normalize_label.cache_info(), 'fold_accents': fold_accents.cache_info()}
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+XML emitter
+Shared writer for the generators that build XML by hand. Lines are
+buffered and joined once per chunk before being written to a text stream
+(an io.StringIO by default, or an open file), with one escaping for every
+generator through precomputed translation tables. Lines are joined by
+newlines without a trailing one, like the '\\n'.join(lines) the generators
+used, and can be indented per nesting level.
+
+start()/empty()/element() format and escape every attribute. Per-field and
+per-link lines are hot: the generators format those with f-strings, escape
+only the values that come from the data, and write them with line() and
+start_line(), or a whole element at once with prefixes() and write().
+"""
+
+import io
+import re
+from typing import Sequence, Tuple, Union
+
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8" standalone="no"?>'
+
+ATTRIBUTE_ESCAPES = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;'})
+TEXT_ESCAPES = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;'})
+
+# Most values need no escaping; a search is much cheaper than a translate
+_ATTRIBUTE_SPECIAL = re.compile('[&<>"]').search
+_TEXT_SPECIAL = re.compile('[&<>]').search
+
+Attributes = Sequence[Tuple[str, object]]
+
+def escape_attribute(value) -> str:
+    """An attribute value, escaped for double quotes ('' for None)"""
+    if value.__class__ is not str:
+        if value is None:
+            return ""
+        value = str(value)
+    return value.translate(ATTRIBUTE_ESCAPES) if _ATTRIBUTE_SPECIAL(value) else value
+
+def escape_text(value) -> str:
+    """Element text, escaped ('' for None)"""
+    if value.__class__ is not str:
+        if value is None:
+            return ""
+        value = str(value)
+    return value.translate(TEXT_ESCAPES) if _TEXT_SPECIAL(value) else value
+
+def format_attributes(attributes: Attributes) -> str:
+    """Attributes as written in a start tag, each one preceded by a space"""
+    return ''.join([f' {name}="{escape_attribute(value)}"' for name, value in attributes])
+
+class XmlEmitter:
+    """Writes XML lines to a text stream"""
+
+    # Lines held before they are joined and written to the stream
+    FLUSH_LINES = 1024
+
+    def __init__(self, out=None, indent: Union[str, None] = None, newline: str = '\n', depth: int = 0):
+        self.out = io.StringIO() if out is None else out
+        self.indent = indent or ''
+        self.newline = newline
+        self._lines = []
+        self._skip = len(newline)   # the first line is written without its newline
+        self._prefixes = []         # newline and indentation, by depth
+        self.depth = depth
+        self._prefix = self._prefix_at(depth)
+
+    def _prefix_at(self, depth):
+        prefixes = self._prefixes
+        while len(prefixes) <= depth:
+            prefixes.append(self.newline + self.indent * len(prefixes))
+        return prefixes[depth]
+
+    def line(self, text: str):
+        """Write a line of raw XML at the current depth"""
+        lines = self._lines
+        lines.append(self._prefix + text)
+        if len(lines) >= self.FLUSH_LINES:
+            self.flush()
+
+    def prefixes(self, count: int) -> list:
+        """The newline and indentation starting a line at the current depth and the `count` - 1 levels below"""
+        self._prefix_at(self.depth + count - 1)
+        return self._prefixes[self.depth:self.depth + count]
+
+    def write(self, text: str):
+        """Write whole lines of raw XML, each one already starting with its prefix"""
+        lines = self._lines
+        lines.append(text)
+        if len(lines) >= self.FLUSH_LINES:
+            self.flush()
+
+    def flush(self):
+        """Join the buffered lines and write them to the stream"""
+        if self._lines:
+            chunk = ''.join(self._lines)
+            self._lines.clear()
+            if self._skip:
+                chunk, self._skip = chunk[self._skip:], 0
+            self.out.write(chunk)
+
+    def splice(self, fragment: str):
+        """Write lines rendered by an emitter with the same options at the current depth"""
+        self.line(fragment[len(self.indent) * self.depth:] if self.indent else fragment)
+
+    @property
+    def options(self) -> tuple:
+        """What a fragment rendered for this emitter depends on"""
+        return self.indent, self.newline, self.depth
+
+    def declaration(self, header: str = XML_HEADER):
+        self.line(header)
+
+    def start(self, tag: str, attributes: Attributes = ()):
+        """Open an element; its content goes one level deeper"""
+        self.start_line(f"<{tag}{format_attributes(attributes)}>")
+
+    def start_line(self, text: str):
+        """Open an element from its start tag, already formatted; its content goes one level deeper"""
+        self.line(text)
+        depth = self.depth = self.depth + 1
+        prefixes = self._prefixes
+        self._prefix = prefixes[depth] if depth < len(prefixes) else self._prefix_at(depth)
+
+    def end(self, tag: str):
+        """Close an element; closing the outermost one writes everything to the stream"""
+        depth = self.depth = self.depth - 1
+        prefix = self._prefix = self._prefixes[depth]
+        lines = self._lines
+        lines.append(f"{prefix}</{tag}>")
+        if not depth or len(lines) >= self.FLUSH_LINES:
+            self.flush()
+
+    def empty(self, tag: str, attributes: Attributes = ()):
+        """An element without content"""
+        self.line(f"<{tag}{format_attributes(attributes)} />")
+
+    def element(self, tag: str, text, attributes: Attributes = ()):
+        """An element holding only text, on one line"""
+        self.line(f"<{tag}{format_attributes(attributes)}>{escape_text(text)}</{tag}>")
+
+    def getvalue(self) -> str:
+        """The XML written so far, when writing to an io.StringIO"""
+        self.flush()
+        return self.out.getvalue()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Streaming XML pretty-printer
+Reformats XML in one pass over SAX events and writes the result as it goes.
+The output is the same as the previous ElementTree + minidom round trip
+(ET.fromstring, ET.tostring, minidom toprettyxml with a 4-space indent, blank
+lines dropped, our own XML header):
+- comments, processing instructions and unused namespace declarations are
+  dropped;
+- namespaces are declared on the root element with ElementTree's prefixes;
+- an element holding only text stays on one line.
+Memory is bounded by the largest text node. While the root's namespace
+declarations are still being collected, the body goes to a temporary file;
+at the end it is copied after the root start tag.
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import xml.etree.ElementTree as ET
+import xml.sax
+from pathlib import Path
+from xml.sax.handler import ContentHandler, feature_namespaces
+
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8" standalone="no"?>'
+INDENT = '    '
+FEED_SIZE = 1 << 16
+COPY_SIZE = 1 << 16
+
+ParseError = xml.sax.SAXParseException
+
+def _escape(text):
+    """minidom's escaping of text and attribute values"""
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace("\"", "&quot;").replace(">", "&gt;")
+
+def _reparsed_text(text):
+    # ET writes carriage returns in text as they are; parsing again turns them into newlines
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+class _LineWriter:
+    """Writes text to a file without its blank lines, joined by newlines"""
+
+    def __init__(self, f):
+        self.f = f
+        self.partial = []
+        self.started = False
+
+    def write(self, text):
+        lines = text.split('\n')
+        if len(lines) == 1:
+            self.partial.append(text)
+            return
+        self._line(''.join(self.partial) + lines[0])
+        for line in lines[1:-1]:
+            self._line(line)
+        self.partial = [lines[-1]]
+
+    def _line(self, line):
+        if line.strip():
+            if self.started:
+                self.f.write('\n')
+            self.f.write(line)
+            self.started = True
+
+    def close(self):
+        self._line(''.join(self.partial))
+        self.partial = []
+
+class _PrettyHandler(ContentHandler):
+    """SAX handler writing the indented body; the root start tag is built at the end"""
+
+    def __init__(self, body):
+        super().__init__()
+        self.write = body.write
+        self.namespaces = {}    # uri -> prefix, assigned on first use like ET.tostring
+        self.tags = []          # qualified names of the open elements
+        self.text = []          # character data since the last tag
+        self.open = False       # the innermost start tag still waits for '>' or '/>'
+        self.root_tag = None
+        self.root_attributes = ''
+
+    def qualify(self, name):
+        uri, local = name
+        if uri is None:
+            return local
+        prefix = self.namespaces.get(uri)
+        if prefix is None:
+            prefix = ET._namespace_map.get(uri)  # the table ET.tostring uses
+            if prefix is None:
+                prefix = f"ns{len(self.namespaces)}"
+            if prefix != "xml":
+                self.namespaces[uri] = prefix
+        return f"{prefix}:{local}"
+
+    def root_start(self):
+        """The root start tag, with the namespaces used anywhere in the document"""
+        declarations = ''.join(f' xmlns:{prefix}="{_escape(uri)}"'
+                               for uri, prefix in sorted(self.namespaces.items(), key=lambda item: item[1]))
+        return f"<{self.root_tag}{declarations}{self.root_attributes}"
+
+    def _flush_text(self, depth):
+        """Write pending character data as a text node at `depth`"""
+        text = ''.join(self.text)
+        self.text = []
+        if text:
+            self.write(_escape(f"{INDENT * depth}{_reparsed_text(text)}\n"))
+
+    def startElementNS(self, name, qname, attrs):
+        depth = len(self.tags)
+        if self.open:
+            self.write(">\n")
+            self.open = False
+        if depth:
+            self._flush_text(depth)
+        else:
+            self.text = []
+
+        tag = self.qualify(name)
+        attributes = ''.join(f' {self.qualify(key)}="{_escape(value)}"' for key, value in attrs.items())
+        if depth:
+            self.write(f"{INDENT * depth}<{tag}{attributes}")
+        else:
+            self.root_tag, self.root_attributes = tag, attributes
+        self.tags.append(tag)
+        self.open = True
+
+    def characters(self, content):
+        if self.tags:
+            self.text.append(content)
+
+    def endElementNS(self, name, qname):
+        tag = self.tags.pop()
+        depth = len(self.tags)
+        if self.open:
+            # No child elements: a single text node stays on the tag's line
+            text = ''.join(self.text)
+            self.text = []
+            self.write(f">{_escape(_reparsed_text(text))}</{tag}>\n" if text else "/>\n")
+            self.open = False
+        else:
+            self._flush_text(depth + 1)
+            self.write(f"{INDENT * depth}</{tag}>\n")
+
+def _feed(parser, chunks):
+    batch, size = [], 0
+    for chunk in chunks:
+        batch.append(chunk)
+        size += len(chunk)
+        if size >= FEED_SIZE:
+            parser.feed(''.join(batch))
+            batch, size = [], 0
+    parser.feed(''.join(batch))
+    parser.close()
+
+def write_pretty(chunks, output_path):
+    """Pretty-print the XML text given as string chunks into output_path
+
+    Raises ParseError when the text is not well-formed XML; output_path is
+    then left untouched.
+    """
+    output_path = Path(output_path)
+    with tempfile.TemporaryFile('w+', encoding='utf-8', newline='') as body:
+        handler = _PrettyHandler(body)
+        parser = xml.sax.make_parser()
+        parser.setFeature(feature_namespaces, True)
+        parser.setContentHandler(handler)
+        _feed(parser, chunks)
+
+        body.seek(0)
+        tmp_path = output_path.with_name(f"{output_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                lines = _LineWriter(f)
+                lines.write(XML_HEADER + '\n')
+                lines.write(handler.root_start())
+                for block in iter(lambda: body.read(COPY_SIZE), ''):
+                    lines.write(block)
+                lines.close()
+            os.replace(tmp_path, output_path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
@@ -0,0 +1,27 @@
+"""
+Test setup
+The generator scripts import each other as top-level modules, so their
+directory goes on sys.path. Run with: python -m pytest spring-ftl/src/test/python
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+SCRIPTS_DIR = Path(__file__).resolve().parents[2] / "main" / "resources" / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """Empty working directory with an output/ folder, FORM_ID unset"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv('FORM_ID', raising=False)
+    (tmp_path / "output").mkdir()
+    return tmp_path
+
+def write_forms(output_dir, forms):
+    """Write transformed_result.json holding `forms` ({form id: fields})"""
+    with open(Path(output_dir) / "transformed_result.json", 'w', encoding='utf-8') as f:
+        json.dump({"originalJson": forms, "labelMappings": [], "areaConfigs": []}, f)
@@ -0,0 +1,68 @@
+"""Label renames and form resolution of combine_with_temp.py"""
+
+import json
+from types import SimpleNamespace
+
+import combine_with_temp
+from combine_with_temp import LabelGraph
+from conftest import write_forms
+
+FIELDS = {
+    'dateDebut': {'label': "Date de début"},
+    'devise': {'label2': "Devise"},
+}
+
+def test_direct_label():
+    graph = LabelGraph(FIELDS, [])
+    assert graph.field_id("Date de début") == 'dateDebut'
+    assert graph.field_id("Devise") == 'devise'
+    assert graph.field_id("Montant") is None
+    assert graph.cycles == []
+
+def test_two_hop_rename():
+    # "Date d'effet" was renamed from "Date initiale", itself renamed from the field's label
+    mappings = [{'ancien': "Date initiale", 'nouveau': "Date d'effet"},
+                {'ancien': "Date de début", 'nouveau': "Date initiale"}]
+    graph = LabelGraph(FIELDS, mappings)
+    assert graph.field_id("Date initiale") == 'dateDebut'
+    assert graph.field_id("Date d'effet") == 'dateDebut'
+    assert graph.cycles == []
+
+def test_fewest_renames_win():
+    mappings = [{'ancien': "Étape", 'nouveau': "Monnaie"},
+                {'ancien': "Devise", 'nouveau': "Étape"},
+                {'ancien': "Date de début", 'nouveau': "Monnaie"}]
+    assert LabelGraph(FIELDS, mappings).field_id("Monnaie") == 'dateDebut'
+
+def test_cycle_detected_and_ignored():
+    mappings = [{'ancien': "A", 'nouveau': "B"},
+                {'ancien': "B", 'nouveau': "C"},
+                {'ancien': "C", 'nouveau': "A"},
+                {'ancien': "Devise", 'nouveau': "C"}]
+    graph = LabelGraph(FIELDS, mappings)
+    assert len(graph.cycles) == 1
+    cycle = graph.cycles[0]
+    assert cycle[0] == cycle[-1] and set(cycle) == {"A", "B", "C"}
+    # Renames inside the cycle still resolve to the field reached from it
+    assert graph.field_id("A") == 'devise'
+    assert graph.field_id("B") == 'devise'
+
+def test_cycle_without_field():
+    graph = LabelGraph(FIELDS, [{'ancien': "A", 'nouveau': "B"}, {'ancien': "B", 'nouveau': "A"}])
+    assert len(graph.cycles) == 1
+    assert graph.field_id("A") is None
+
+def test_form_from_context(workspace):
+    write_forms(workspace / "output", {
+        'aini': {'ainiField': {'id': 'ainiField', 'label': "Date", 'nature': 'date'}},
+        'bini': {'biniField': {'id': 'biniField', 'label': "Date", 'nature': 'date'}},
+    })
+    for name, value in (("fieldlink.json", []), ("parsed_result.json", []),
+                        ("area_data.json", [{'fields': [{'name': "Date", 'area': 'area1', 'sort_number': '1', 'columnNumber': '1'}]}])):
+        (workspace / "output" / name).write_text(json.dumps(value), encoding="utf-8")
+
+    combine_with_temp.main(SimpleNamespace(form_id='bini', model=None))
+
+    xml = (workspace / ".idea" / "demo" / "bini" / "biniBlockForm.block.xml").read_text(encoding="utf-8")
+    assert 'id="biniField"' in xml and 'ainiField' not in xml
+    assert 'id="bini"' in xml
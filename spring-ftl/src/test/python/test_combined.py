@@ -0,0 +1,57 @@
+"""Form id resolution and field links of combined.py"""
+
+import re
+from types import SimpleNamespace
+
+import combined
+from conftest import write_forms
+from form_model import load_form_model
+
+FORMS = {
+    "aini": {"optcrm": {"nature": "string", "label": "CRM"}},
+    "bini": {"xceopt": {"nature": "lov", "label": "Option"}},
+}
+
+def links(count):
+    return {"links": [
+        {"childFieldId": f"field{i}", "id": f"link{i}", "methodName": f"isField{i}Visible",
+         "fatherFieldIds": [f"field{i + 1}"]}
+        for i in range(count)
+    ]}
+
+def test_resolve_prefers_the_context_form(workspace, monkeypatch):
+    write_forms(workspace / "output", FORMS)
+    monkeypatch.setenv('FORM_ID', "aini")
+    generation = combined.GenerationContext.resolve(load_form_model(), SimpleNamespace(form_id="bini"))
+    assert generation.form_id == "bini"
+
+def test_resolve_reads_form_id(workspace, monkeypatch):
+    write_forms(workspace / "output", FORMS)
+    monkeypatch.setenv('FORM_ID', "bini")
+    assert combined.GenerationContext.resolve(load_form_model()).form_id == "bini"
+
+def test_resolve_falls_back_to_the_first_form(workspace):
+    write_forms(workspace / "output", {"bini": FORMS["bini"], "aini": FORMS["aini"]})
+    assert combined.GenerationContext.resolve(load_form_model()).form_id == "bini"
+    assert combined.GenerationContext.resolve().form_id == "bini"
+
+def test_resolve_without_data_uses_the_default(workspace):
+    assert combined.GenerationContext.resolve().form_id == "aini"
+
+def test_bean_ids_follow_the_form():
+    generation = combined.GenerationContext("bini")
+    assert generation.form_bean_id == "biniFormService"
+    assert generation.fieldlink_bean_id == "biniFieldLinkServiceFieldLinkService"
+
+def test_fieldlinks_resolve_the_form_once(workspace, monkeypatch):
+    write_forms(workspace / "output", {"bini": FORMS["bini"], "aini": FORMS["aini"]})
+    calls = []
+    resolve = combined.get_form_id_from_environment
+    monkeypatch.setattr(combined, 'get_form_id_from_environment',
+                        lambda model=None: calls.append(model) or resolve(model))
+
+    xml = combined.generate_fieldlinks_xml(links(50))
+
+    assert len(calls) == 1
+    bean_ids = re.findall(r'beanId="([^"]*)"', xml)
+    assert bean_ids == ["biniFieldLinkServiceFieldLinkService"] * 50
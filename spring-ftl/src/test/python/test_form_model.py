@@ -0,0 +1,30 @@
+"""Read-only containers of form_model.py"""
+
+import pickle
+
+import pytest
+
+from form_model import FrozenDict, FrozenList, freeze
+
+def test_read_only():
+    frozen = freeze({'field': {'controls': [{'id': 'mandatory'}]}})
+    assert isinstance(frozen, dict) and isinstance(frozen['field']['controls'], list)
+    with pytest.raises(TypeError):
+        frozen['other'] = {}
+    with pytest.raises(TypeError):
+        frozen['field']['controls'].append({})
+
+def test_equal_values_hash_equal():
+    first = freeze({'x': [1, {'y': 2}], 'z': 'a'})
+    second = freeze({'z': 'a', 'x': [1, {'y': 2}]})
+    assert first is not second and first == second
+    assert hash(first) == hash(second)
+    assert len({first, second}) == 1
+    assert {first: 1}.get(second) == 1
+    assert freeze({'x': [1]}) != freeze({'x': [2]})
+
+def test_pickle_keeps_value_and_hash():
+    frozen = freeze({'x': [1, 2]})
+    copy = pickle.loads(pickle.dumps(frozen))
+    assert type(copy) is FrozenDict and type(copy['x']) is FrozenList
+    assert copy == frozen and hash(copy) == hash(frozen)
@@ -0,0 +1,77 @@
+"""Field and area fragments of fragment_cache.py"""
+
+import pytest
+
+import combined
+import fragment_cache
+from form_model import freeze
+from models import Field
+
+FIELDS = {f"field{i}": {'id': f"field{i}", 'nature': 'lov' if i % 3 == 0 else 'string', 'label': f"Libellé {i}", 'lov': f"Lov{i}"}
+          for i in range(30)}
+PLACEMENT = {field_id: {'area': f"area{i % 3 + 1}", 'sortNumber': str(i), 'columnNumber': '1'}
+             for i, field_id in enumerate(FIELDS)}
+
+@pytest.fixture
+def cache():
+    fragment_cache.fields.clear()
+    fragment_cache.areas.clear()
+    fragment_cache.enable()
+    yield fragment_cache
+    fragment_cache.disable()
+    fragment_cache.fields.clear()
+    fragment_cache.areas.clear()
+
+def render(placement):
+    return combined.generate_xml(placement, FIELDS, {}, 'bench', combined.GenerationContext('bench'))
+
+def test_disabled_by_default():
+    assert not fragment_cache.enabled()
+    render(PLACEMENT)
+    assert fragment_cache.fields.size == fragment_cache.areas.size == 0
+
+def test_cached_output_matches_uncached(cache):
+    fragment_cache.disable()
+    expected = render(PLACEMENT)
+    fragment_cache.enable()
+    assert render(PLACEMENT) == expected
+
+    moved = dict(PLACEMENT, field3=dict(PLACEMENT['field3'], sortNumber='99'))
+    before = fragment_cache.fragment_stats()
+    output = render(moved)
+    stats = fragment_cache.fragment_stats() - before
+    fragment_cache.disable()
+    assert output == render(moved)
+    assert stats.area_hits == 2
+    assert stats.field_misses == 1
+
+def test_bounded_by_bytes():
+    cache = fragment_cache.FragmentCache(max_bytes=1000)
+    for i in range(50):
+        cache.get(i, lambda i=i: f"<field id=\"{i}\" />" * 5)
+    assert 0 < cache.size <= 1000
+    assert cache.get(49, lambda: "rendered again") != "rendered again"
+    assert cache.get(0, lambda: "rendered again") == "rendered again"
+
+def test_attribute_key_compares_attributes():
+    base = {'nature': 'lov', 'filters': [{'id': 'a'}]}
+    assert fragment_cache.attribute_key(Field(base, {'sortNumber': '1'})) == \
+        fragment_cache.attribute_key(Field(dict(base), {'sortNumber': '1'}))
+    assert fragment_cache.attribute_key(Field(base, {'sortNumber': '1'})) != \
+        fragment_cache.attribute_key(Field(base, {'sortNumber': '2'}))
+
+def test_refrozen_fields_hit_the_cache(cache):
+    # A --watch re-parse or a new snapshot freezes equal attributes into new objects
+    def parse():
+        return freeze({field_id: dict(field, opts=[1, 2], panel={'id': 'p'}) for field_id, field in FIELDS.items()})
+
+    first, second = parse(), parse()
+    assert first == second and first['field0']['opts'] is not second['field0']['opts']
+    key = fragment_cache.attribute_key(first['field0'])
+    assert {key: 1}.get(fragment_cache.attribute_key(second['field0'])) == 1
+
+    combined.generate_xml(PLACEMENT, first, {}, 'bench', combined.GenerationContext('bench'))
+    before = fragment_cache.fragment_stats()
+    combined.generate_xml(PLACEMENT, second, {}, 'bench', combined.GenerationContext('bench'))
+    stats = fragment_cache.fragment_stats() - before
+    assert stats.area_hits == 3 and stats.area_misses == 0
@@ -0,0 +1,50 @@
+"""Trigram similarity of fuzzy_match.py"""
+
+import random
+
+import pytest
+
+from fuzzy_match import TrigramMatcher, trigrams
+from text_normalizer import normalize_label
+
+WORDS = ["date", "debut", "fin", "compte", "societe", "devise", "operation", "credit", "echeance", "taux",
+         "montant", "reference", "agence", "option", "interets", "echus"]
+
+def dice(first, second):
+    """Dice coefficient of the trigram sets of two labels, computed directly"""
+    first, second = trigrams(normalize_label(first)), trigrams(normalize_label(second))
+    return 2 * len(first & second) / (len(first) + len(second))
+
+def scan(labels, text, limit, min_score):
+    """Best labels by scoring every one, best first and earliest on ties"""
+    scored = [(dice(text, label), -position) for position, label in enumerate(labels)]
+    scored = sorted((item for item in scored if item[0] >= min_score), reverse=True)[:limit]
+    return [(labels[-negated], score, -negated) for score, negated in scored]
+
+def test_trigrams():
+    assert trigrams("ab cd") == {" ab", "ab ", " cd", "cd "}
+    assert trigrams("") == frozenset()
+
+def test_dice_scores():
+    matcher = TrigramMatcher(["Date de début", "Date de fin", "Devise"])
+    exact, = matcher.search("DATE DE DEBUT", limit=1)
+    assert (exact.value, exact.score, exact.position) == ("Date de début", 1.0, 0)
+    # " da", "dat", "ate", "te " shared with 9 and 10 trigrams
+    matches = matcher.search("Date", limit=3)
+    assert [match.value for match in matches] == ["Date de fin", "Date de début"]
+    assert matches[0].score == pytest.approx(2 * 4 / (4 + 9))
+    assert matches[1].score == pytest.approx(2 * 4 / (4 + 10))
+    assert matcher.best("zzz") is None
+
+@pytest.mark.parametrize('min_score', [0.3, 0.6, 0.8])
+def test_same_results_as_scoring_every_label(min_score):
+    rng = random.Random(17)
+    labels = [" ".join(rng.sample(WORDS, rng.randint(1, 4))) for _ in range(400)]
+    matcher = TrigramMatcher(labels)
+    queries = [" ".join(rng.sample(WORDS, rng.randint(1, 3))) for _ in range(60)]
+    queries += [label[:-2] for label in rng.sample(labels, 50)]
+    for query in queries:
+        found = [(match.value, match.score, match.position) for match in matcher.search(query, 3, min_score)]
+        expected = scan(labels, query, 3, min_score)
+        assert [(value, position) for value, _, position in found] == [(value, position) for value, _, position in expected]
+        assert [score for _, score, _ in found] == pytest.approx([score for _, score, _ in expected])
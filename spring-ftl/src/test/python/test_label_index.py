@@ -0,0 +1,89 @@
+"""Label lookups of label_index.py and FieldMapper.find_field_by_label"""
+
+import random
+import re
+
+import pytest
+
+from label_index import SubstringIndex
+from properties_ftl import FieldMapper
+
+def previous_normalize(text):
+    """FieldMapper.normalize_text before text_normalizer"""
+    if not text:
+        return ""
+    text = text.lower()
+    text = re.sub(r'[éèêë]', 'e', text)
+    text = re.sub(r'[àâä]', 'a', text)
+    text = re.sub(r'[ïî]', 'i', text)
+    text = re.sub(r'[ôö]', 'o', text)
+    text = re.sub(r'[ùûü]', 'u', text)
+    text = re.sub(r'[ç]', 'c', text)
+    return text
+
+def previous_find(search_label, form_data):
+    """FieldMapper.find_field_by_label before the label index: two scans over every field"""
+    search = previous_normalize(search_label)
+    labels = [(field_id, previous_normalize(field_data[key]))
+              for field_id, field_data in form_data.items() if isinstance(field_data, dict)
+              for key in ('label2', 'label') if key in field_data]
+    for field_id, label in labels:
+        if label == search:
+            return field_id
+    for field_id, label in labels:
+        if search in label or label in search:
+            return field_id
+    return None
+
+FORM = {
+    'dateDebut': {'label': "Date de début"},
+    'dateFin': {'label': "Date de fin", 'label2': "Échéance"},
+    'devise': {'label': "Devise"},
+    'societe': {'label': "Société émettrice"},
+    'flag': "not a field",
+}
+
+@pytest.mark.parametrize('search, field_id', [
+    ("Date de fin", 'dateFin'),             # exact
+    ("DATE DE DEBUT", 'dateDebut'),         # exact once normalized
+    ("echeance", 'dateFin'),                # label2, accents folded
+    ("Societe", 'societe'),                 # part of a label
+    ("Date", 'dateDebut'),                  # part of several labels: the first one
+    ("Devise de règlement", 'devise'),      # contains a label
+    ("Montant", None),
+])
+def test_find_field_by_label(search, field_id):
+    mapper = FieldMapper({})
+    assert mapper.find_field_by_label(search, FORM) == field_id
+    assert previous_find(search, FORM) == field_id
+
+def test_substring_index():
+    index = SubstringIndex()
+    for text in ("abcdef", "cde", "xy", "cde"):
+        index.add(text)
+    assert index.first_equal("cde") == 1
+    assert index.first_containing("cd") == 0
+    assert index.first_containing("bcde") == 0
+    assert index.first_containing("zz") is None
+    assert index.first_contained_in("--xy--") == 2
+    assert index.first_related("cdef") == 0
+    assert index.first_related("q") is None
+
+def test_same_results_as_linear_scan():
+    rng = random.Random(12)
+    words = ["Date", "début", "fin", "Compte", "Société", "Devise", "Opération", "Crédit", "Échéance", "Taux"]
+    form_data = {}
+    for i in range(300):
+        label = " ".join(rng.sample(words, rng.randint(2, 4))) + f" {i}"
+        form_data[f"field{i}"] = {'label': label, **({'label2': label.upper()} if i % 3 == 0 else {})}
+    labels = [field['label'] for field in form_data.values()]
+    queries = ["", "e", "zz"]
+    for _ in range(100):
+        label = rng.choice(labels)
+        start = rng.randrange(len(label) - 3)
+        queries += [label, label[start:start + rng.randint(1, 8)], f"Libellé {label} (ancien)",
+                    " ".join(rng.sample(words, 3)), f"absent{rng.random()}"]
+
+    mapper = FieldMapper({})
+    assert [mapper.find_field_by_label(query, form_data) for query in queries] == \
+           [previous_find(query, form_data) for query in queries]
@@ -0,0 +1,74 @@
+"""Layout policies and ordering of layout_engine.py"""
+
+import pytest
+
+import layout_engine
+from layout_engine import LayoutBatch, layout, order
+
+@pytest.fixture(params=['python', 'numpy'], autouse=True)
+def backend(request, monkeypatch):
+    """Every test runs on plain lists and, when it is installed, on NumPy"""
+    if request.param == 'numpy':
+        if layout_engine.np is None:
+            pytest.skip("NumPy is not installed")
+    else:
+        monkeypatch.setattr(layout_engine, 'np', None)
+    return request.param
+
+def create_batch(rows):
+    batch = LayoutBatch()
+    for row in rows:
+        batch.add(*row)
+    return batch
+
+def test_counter():
+    batch = create_batch([
+        ('a', 'f1', 'area1', '5'),
+        ('a', 'f2', 'area2', '7'),
+        ('b', 'f3', 'area1', 'x'),   # not a number: starts from 1
+        ('a', 'f4', 'area1', '99'),
+        ('b', 'f5', 'area1', '3'),
+        ('a', 'f6', 'area1', '1'),
+    ])
+    placed = layout(batch, 'counter')
+    # Per form, the first area1 field keeps its number and each next one gets +10
+    assert placed.sort_numbers == ['5', '7', '1', '15', '11', '25']
+    assert placed.areas == batch.areas
+
+def test_scaled():
+    batch = create_batch([(None, 'f1', 'area1', '3', 2), (None, 'f2', 'area3', '4', 1), (None, 'f3', 'area1', '12', 1)])
+    placed = layout(batch, 'scaled')
+    assert placed.sort_numbers == ['30', '4', '120']
+    assert placed.column_numbers == [2, 1, 1]
+
+def test_next_free():
+    batch = create_batch([
+        ('a', 'f1', 'area2', '4', 1, True),
+        ('a', 'f2', 'area3', None, 1, False),
+        ('b', 'f3', 'area2', None, 1, False),
+        ('a', 'f4', 'area2', None, 1, False),
+    ])
+    placed = layout(batch, 'next_free', start={'a': 40})
+    # Unmapped fields go to area1 from the form's start (10 by default) in steps of 10
+    assert placed.areas == ['area2', 'area1', 'area1', 'area1']
+    assert placed.sort_numbers == ['4', 40, 10, 50]
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        layout(LayoutBatch(), 'alphabetical')
+
+def test_order():
+    batch = create_batch([
+        ('a', 'f1', 'area2', '2', 1),
+        ('a', 'f2', 'area1', '10', 1),
+        ('b', 'f3', 'area1', '1', 1),
+        ('a', 'f4', 'area1', '9', 2),
+        ('a', 'f5', 'area1', '9', 1),
+        ('a', 'f6', 'area2', '2', 1),
+    ])
+    # By form, then area, then int(sortNumber), stably
+    assert [batch.field_ids[row] for row in order(batch)] == ['f4', 'f5', 'f2', 'f1', 'f6', 'f3']
+    # Then by int(columnNumber)
+    assert [batch.field_ids[row] for row in order(batch, column_numbers=batch.column_numbers)] == \
+           ['f5', 'f4', 'f2', 'f1', 'f6', 'f3']
+    assert order(LayoutBatch()) == []
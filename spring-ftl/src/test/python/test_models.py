@@ -0,0 +1,22 @@
+"""Records of models.py"""
+
+import pytest
+
+from models import Field
+
+def test_field_overlays_the_shared_base():
+    base = {'nature': 'lov', 'label': "Option"}
+    field = Field(base, {'label': "Renamed", 'area': 'area2'})
+    assert dict(field) == {'nature': 'lov', 'label': "Renamed", 'area': 'area2'}
+    assert base == {'nature': 'lov', 'label': "Option"}
+
+def test_field_is_read_only():
+    field = Field({'nature': 'lov'})
+    with pytest.raises(TypeError):
+        field['nature'] = 'string'
+
+def test_with_overlay_leaves_the_record_unchanged():
+    field = Field({'nature': 'lov'}, {'area': 'area1'})
+    moved = field.with_overlay(area='area3')
+    assert field['area'] == 'area1'
+    assert moved['area'] == 'area3'
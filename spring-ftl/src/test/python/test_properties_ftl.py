@@ -0,0 +1,169 @@
+"""Field matching of properties_ftl.py"""
+
+import codecs
+import json
+import random
+
+import pytest
+
+import properties_ftl
+from properties_ftl import AreaConfigIndex, generate_properties_file, match_field_name
+
+WORDS = ["Date", "début", "fin", "Compte", "Société", "Devise", "Opération", "Crédit", "Échéance", "Taux"]
+
+def previous_find_matching_field_name(field_id, field_label, area_configs, label_mappings):
+    """find_matching_field_name before AreaConfigIndex: nested scans of the configs"""
+    if field_label:
+        for area_id, configs in area_configs.items():
+            for config in configs:
+                if config["name"] == field_label:
+                    return config["name"], area_id
+        if field_label in label_mappings:
+            mapped_label = label_mappings[field_label]
+            for area_id, configs in area_configs.items():
+                for config in configs:
+                    if config["name"] == mapped_label:
+                        return config["name"], area_id
+    options = {'opt_libimmo': "Option sur l'immobilier", 'opt_libcpta': "Option compta TCN précomptes",
+               'opt_amti': "Intérêts échus décalés", 'opt_cpta': "Option compta TCN précomptes"}
+    if field_id in options:
+        return options[field_id], "area2"
+    field_id_normalized = field_id.lower().replace('_', ' ')
+    for area_id, configs in area_configs.items():
+        for config in configs:
+            config_name_normalized = config["name"].lower()
+            if field_id_normalized in config_name_normalized or config_name_normalized in field_id_normalized:
+                return config["name"], area_id
+    return None, None
+
+def previous_config_matches(area_configs, form_data, label_mappings):
+    """The first pass of generate_properties_file before the hash join: field id of each config"""
+    matches = []
+    for area_id, configs in area_configs.items():
+        for config in configs:
+            for field_id, field_data in form_data.items():
+                if not isinstance(field_data, dict) or field_id in ["valeurPanel", "csoPanel"]:
+                    continue
+                field_label = field_data.get("label2", field_data.get("label", ""))
+                if (field_label == config["name"] or
+                        (field_label in label_mappings and label_mappings[field_label] == config["name"]) or
+                        field_id == config["name"]):
+                    matches.append((area_id, config["name"], field_id))
+                    break
+    return matches
+
+def create_inputs(rng, field_count=120, config_count=60):
+    names = [" ".join(rng.sample(WORDS, rng.randint(1, 3))) for _ in range(config_count)]
+    area_configs = [{'area': area, 'fields': [{'name': name, 'sort_number': str(i), 'columnNumber': str(i % 2 + 1)}
+                                              for i, name in enumerate(names) if i % 3 == n]}
+                    for n, area in enumerate(["Critères de lancement", "Critères avancés", "Consolidation"])]
+    label_mappings = [{'ancien': f"Ancien {i}", 'nouveau': rng.choice(names)} for i in range(10)]
+    form_data = {'valeurPanel': {'label': names[0]}, 'flag': "not a field"}
+    for i in range(field_count):
+        kind = i % 6
+        label = (rng.choice(names) if kind == 0 else f"Ancien {i % 12}" if kind == 1 else
+                 " ".join(rng.sample(WORDS, 2)) if kind == 2 else "")
+        field_id = (rng.choice(names) if kind == 3 else rng.choice(WORDS).lower() if kind == 4 else
+                    rng.choice(['opt_libimmo', 'opt_amti', 'opt_cpta', f"opt_other{i}"]) if kind == 5 else f"field{i}")
+        form_data[field_id] = {'label2': label} if i % 4 == 0 else {'label': label}
+    return {'originalJson': {'aini': form_data}, 'labelMappings': label_mappings, 'areaConfigs': area_configs}
+
+def config_lists(transformed):
+    """area_configs as generate_properties_file builds them"""
+    area_configs = {}
+    for area_config in transformed["areaConfigs"]:
+        name = area_config["area"].lower()
+        area_id = "area1" if "lancement" in name else "area2" if "avancés" in name else "area3"
+        area_configs.setdefault(area_id, []).extend(
+            {"name": field["name"], "sort_number": int(field["sort_number"]), "column_number": int(field["columnNumber"])}
+            for field in area_config["fields"])
+    for configs in area_configs.values():
+        configs.sort(key=lambda x: (x["sort_number"], x["column_number"]))
+    return area_configs
+
+@pytest.fixture
+def ansi(monkeypatch):
+    """The properties file is written in the Windows "ansi" code page; use cp1252 where it is not defined"""
+    try:
+        codecs.lookup('ansi')
+    except LookupError:
+        monkeypatch.setattr(properties_ftl, 'open', lambda *args, encoding=None, **kwargs: open(
+            *args, encoding='cp1252' if encoding == 'ansi' else encoding, **kwargs), raising=False)
+
+@pytest.mark.parametrize('seed', range(5))
+def test_area_config_index_matches_nested_scan(seed):
+    transformed = create_inputs(random.Random(seed))
+    area_configs = config_lists(transformed)
+    label_mappings = {item["ancien"]: item["nouveau"] for item in transformed["labelMappings"]}
+    index = AreaConfigIndex(area_configs)
+
+    for field_id, field_data in transformed["originalJson"]["aini"].items():
+        if not isinstance(field_data, dict):
+            continue
+        label = field_data.get("label2", field_data.get("label", ""))
+        expected = previous_find_matching_field_name(field_id, label, area_configs, label_mappings)
+        match = match_field_name(field_id, label, label_mappings, index)
+        if expected == (None, None):
+            # Only the fuzzy fallback added since may still find a config
+            assert match.method in ('fuzzy', 'unmatched')
+        else:
+            assert (match.name, match.area) == expected
+
+@pytest.mark.parametrize('seed', range(5))
+def test_config_join_matches_nested_scan(seed, tmp_path, ansi):
+    transformed = create_inputs(random.Random(seed))
+    form_data = transformed["originalJson"]["aini"]
+    label_mappings = {item["ancien"]: item["nouveau"] for item in transformed["labelMappings"]}
+    expected = {}
+    for area_id, name, field_id in previous_config_matches(config_lists(transformed), form_data, label_mappings):
+        expected.setdefault(field_id, (name, area_id))
+
+    generate_properties_file(transformed, tmp_path / "form.properties", tmp_path / "report.json")
+    report = json.loads((tmp_path / "report.json").read_text(encoding="utf-8"))
+    matched = {entry["field"]: (entry["name"], entry["area"]) for entry in report["fields"]
+               if entry["method"] == "area_config"}
+    assert matched == expected
+
+def test_fuzzy_match_above_min_score():
+    assert properties_ftl.FUZZY_MIN_SCORE == 0.6
+    # "Date" shares its 4 trigrams with the 9 of "Date de fin": 8 / 13 = 0.615
+    index = AreaConfigIndex({'area2': [{'name': "Date de fin"}]})
+    match = match_field_name('zz', "Date", {}, index)
+    assert (match.name, match.area, match.method) == ("Date de fin", 'area2', 'fuzzy')
+    assert match.score == 0.615
+    assert match.candidates == [("Date de fin", 'area2', 0.615)]
+
+def test_unmatched_below_min_score():
+    # ... and with the 10 of "Date de début": 8 / 14 = 0.571
+    index = AreaConfigIndex({'area2': [{'name': "Date de début"}]})
+    match = match_field_name('zz', "Date", {}, index)
+    assert (match.name, match.area, match.method, match.score) == (None, None, 'unmatched', 0.0)
+    assert match.candidates == [("Date de début", 'area2', 0.571)]
+
+def test_match_report(tmp_path, ansi):
+    transformed = {
+        'originalJson': {'aini': {
+            'devise': {'label': "Devise"},
+            'dateFin': {'label': "Date"},
+            'dateDebut': {'label2': "Ancienne date"},
+            'zz': {'label': "Montant"},
+        }},
+        'labelMappings': [{'ancien': "Ancienne date", 'nouveau': "Date d'effet"}],
+        'areaConfigs': [{'area': "Critères avancés", 'fields': [
+            {'name': "Devise", 'sort_number': '1', 'columnNumber': '1'},
+            {'name': "Date de fin", 'sort_number': '2', 'columnNumber': '1'},
+        ]}],
+    }
+    generate_properties_file(transformed, tmp_path / "form.properties", tmp_path / "report.json")
+    report = json.loads((tmp_path / "report.json").read_text(encoding="utf-8"))
+
+    assert report["summary"] == {'area_config': 1, 'fuzzy': 1, 'unmatched': 2}
+    fields = {entry["field"]: entry for entry in report["fields"]}
+    assert list(fields) == ['devise', 'dateFin', 'dateDebut', 'zz']
+    assert fields['devise'] == {'field': 'devise', 'label': "Devise", 'method': 'area_config',
+                                'name': "Devise", 'area': 'area2', 'score': 1.0}
+    assert fields['dateFin'] == {'field': 'dateFin', 'label': "Date", 'method': 'fuzzy', 'name': "Date de fin",
+                                 'area': 'area2', 'score': 0.615,
+                                 'candidates': [{'name': "Date de fin", 'area': 'area2', 'score': 0.615}]}
+    assert fields['zz']['method'] == 'unmatched' and fields['zz']['name'] is None
+    assert "dateFin.label=Date de fin" in (tmp_path / "form.properties").read_text(encoding="cp1252")
@@ -0,0 +1,32 @@
+"""Static panel fields of render_jinja2.py"""
+
+import pytest
+
+import render_jinja2
+
+def test_definitions_read_only():
+    static_fields = render_jinja2.get_static_fields()
+    with pytest.raises(TypeError):
+        static_fields['reiv_rceval'] = {}
+    with pytest.raises(TypeError):
+        static_fields['reiv_rceval']['nature'] = 'string'
+    with pytest.raises(TypeError):
+        render_jinja2.get_consolidation_fields()['riddev']['controls'].append({'id': 'x', 'nature': 'X'})
+
+def test_spliced_when_equal_to_definition():
+    definition = render_jinja2.get_static_fields()['reiv_rceval']
+    assert render_jinja2.template_field('reiv_rceval', definition, {})['panel'] == 'valeurPanel'
+    # A copy with the same values is still the static panel field
+    assert render_jinja2.template_field('reiv_rceval', dict(definition), {})['panel'] == 'valeurPanel'
+
+    changed = dict(definition, sortNumber='9')
+    assert 'panel' not in render_jinja2.template_field('reiv_rceval', changed, {})
+
+def test_spliced_output_matches_rendered():
+    area_fields = {'area2': list(render_jinja2.get_static_fields().items()),
+                   'area3': list(render_jinja2.get_consolidation_fields().items())}
+    data = render_jinja2.prepare_template_data({}, area_fields, {})
+    rendered = {'areas': [dict(area, fields=[dict(field, panel=None) for field in area['fields']])
+                          for area in data['areas']]}
+    assert all(field['panel'] for area in data['areas'] for field in area['fields'])
+    assert render_jinja2.generate_xml_directly(data) == render_jinja2.generate_xml_directly(dict(data, **rendered))
@@ -0,0 +1,59 @@
+"""text_normalizer against the regex implementations it replaced"""
+
+import random
+import re
+import unicodedata
+
+import pytest
+
+import text_normalizer
+
+WORDS = ["Date", "début", "fin", "Compte", "Société", "Devise", "Opération", "Crédit", "Échéance",
+         "Taux", "Montant", "Référence", "N°", "Agence", "Intérêts", "échus", "décalés", "Côté",
+         "Façade", "Reçu", "Noël", "Ambiguë", "Maïs", "Où", "Ça", "L'immobilier", "l’option",
+         "TCN", "(précomptes)", "€", "ŒUVRE", "ÇA", "naïve", "Ångström", "Straße", "ﬁn", "Σίσυφος"]
+SEPARATORS = [" ", " ", " ", "  ", " - ", "\t", " / ", ": ", " "]
+EDGE_CASES = ["", " ", "\t\n", "  Échéance  ", "ŒUVRE", "Straße", "ﬁn", "l’option", "N° 1 €", "Σίσυφος", "ÀÉÎÕÜ"]
+
+def mapping_normalize_text(text):
+    """mapping.normalize_text before text_normalizer"""
+    if not text:
+        return ""
+    text = unicodedata.normalize('NFD', text.lower())
+    text = ''.join(c for c in text if unicodedata.category(c) != 'Mn')
+    text = re.sub(r'[^ -~\w\s]', '', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text
+
+def properties_normalize_text(text):
+    """FieldMapper.normalize_text before text_normalizer"""
+    if not text:
+        return ""
+    text = text.lower()
+    text = re.sub(r'[éèêë]', 'e', text)
+    text = re.sub(r'[àâä]', 'a', text)
+    text = re.sub(r'[ïî]', 'i', text)
+    text = re.sub(r'[ôö]', 'o', text)
+    text = re.sub(r'[ùûü]', 'u', text)
+    text = re.sub(r'[ç]', 'c', text)
+    return text
+
+@pytest.fixture(scope='module')
+def labels():
+    rng = random.Random(14)
+    labels = []
+    for _ in range(3000):
+        words = rng.sample(WORDS, rng.randint(1, 5))
+        labels.append(words[0] + ''.join(rng.choice(SEPARATORS) + word for word in words[1:]))
+    return labels + EDGE_CASES
+
+@pytest.mark.parametrize('previous, current', [
+    (mapping_normalize_text, text_normalizer.normalize_label),
+    (properties_normalize_text, text_normalizer.fold_accents),
+], ids=['normalize_label', 'fold_accents'])
+def test_same_results_as_the_previous_implementation(labels, previous, current):
+    current.cache_clear()
+    expected = [previous(label) for label in labels]
+    assert [current(label) for label in labels] == expected
+    # Cached results are the same as the first ones
+    assert [current(label) for label in labels] == expected
@@ -0,0 +1,274 @@
+"""xml_emitter.py and the generators written on it, against the f-string generators they replaced"""
+
+import io
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape
+
+import pytest
+
+import combined
+import fieldlinks
+import xml_pretty
+from render_jinja2 import generate_xml_directly
+from xml_emitter import XmlEmitter, escape_attribute, escape_text
+
+GENERATION = combined.GenerationContext('bench')
+FIELD_COUNT = 300
+SPECIAL = "R&D <1> \"quoted\" l'état"
+
+# === the generators before xml_emitter ===
+
+def previous_escape_attr(value):
+    """combined.escape_attr before xml_emitter"""
+    if value is None:
+        return ""
+    return str(value).replace('"', '&quot;').replace('<', '&lt;').replace('>', '&gt;')
+
+def previous_field_xml(field_id, field_data):
+    """combined.generate_field_xml before xml_emitter"""
+    nature = field_data.get('nature', 'string')
+    lines = [f'<field id="{previous_escape_attr(field_id)}"', f' nature="{previous_escape_attr(nature)}"']
+    for attr_name in combined.OPTIONAL_FIELD_ATTRIBUTES:
+        if attr_name in field_data:
+            lines.append(f' {attr_name}="{previous_escape_attr(field_data[attr_name])}"')
+    if nature == 'lov' and 'lov' in field_data:
+        lines.append(f' lov="{previous_escape_attr(field_data["lov"])}"')
+        for attr_name in ('valueField', 'displayTemplate'):
+            if attr_name in field_data:
+                lines.append(f' {attr_name}="{previous_escape_attr(field_data[attr_name])}"')
+    lines.append(' />')
+    return ''.join(lines)
+
+def previous_fieldlinks_xml(fieldlinks_data, generation):
+    """combined.generate_fieldlinks_xml before xml_emitter"""
+    if not fieldlinks_data or 'links' not in fieldlinks_data:
+        return '<fieldLinks />'
+    lines = ['<fieldLinks>']
+    for link in fieldlinks_data['links']:
+        lines.append('<fieldLink')
+        lines.append(f' childFieldId="{previous_escape_attr(link.get("childFieldId", ""))}"')
+        lines.append(f' id="{previous_escape_attr(link.get("id", ""))}"')
+        lines.append(f' methodName="{previous_escape_attr(link.get("methodName", ""))}"')
+        lines.append(f' nature="{previous_escape_attr(link.get("nature", "CONDITIONNALHIDDEN"))}"')
+        lines.append(f' disabled="{previous_escape_attr(link.get("disabled", "false"))}"')
+        lines.append(f' beanId="{generation.fieldlink_bean_id}">')
+        for father_id in link.get('fatherFieldIds', []):
+            lines.append(f'<fieldLinkFather fatherFieldId="{previous_escape_attr(father_id)}" />')
+        lines.append('</fieldLink>')
+    lines.append('</fieldLinks>')
+    return '\n'.join(lines)
+
+def previous_combined_xml(area_map, form_fields, fieldlinks_data, generation):
+    """combined.generate_xml before xml_emitter"""
+    area_fields = combined.group_fields_by_area(combined.build_field_mapping_from_area_map(area_map, form_fields))
+    lines = [
+        xml_pretty.XML_HEADER,
+        f'<form xmlns:jxb="http://java.sun.com/xml/ns/jaxb" xmlns:xjc="http://java.sun.com/xml/ns/jaxb/xjc" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" id="{generation.form_id}BlockForm" xsi:noNamespaceSchemaLocation="http://scheme.cf.linedata.com/function.xsd" fatherId="LotIntervallePortefeuille" beanId="{generation.form_bean_id}">',
+        '<graphic>', '<headerVisible>false</headerVisible>', '<collapsible>false</collapsible>',
+        '<collapsed>false</collapsed>', '</graphic>',
+        previous_fieldlinks_xml(fieldlinks_data, generation),
+        '<areas>',
+    ]
+    for area_id in ['area1', 'area2', 'area3']:
+        if not area_fields.get(area_id):
+            continue
+        sort_number = '1' if area_id == 'area1' else '3' if area_id == 'area2' else '2'
+        lines.append(f'<area id="{area_id}" sortNumber="{sort_number}">')
+        if area_id == 'area1':
+            lines.extend(['<graphic>', '<headerVisible>false</headerVisible>', '</graphic>'])
+        lines.append('<fields>')
+        lines.extend(previous_field_xml(field['id'], field) for field in area_fields[area_id])
+        lines.extend(['</fields>', '</area>'])
+    lines.extend(['</areas>', '</form>'])
+    return '\n'.join(lines)
+
+def previous_xml_directly(data):
+    """render_jinja2.generate_xml_directly before xml_emitter"""
+    lines = [
+        xml_pretty.XML_HEADER,
+        f'<form xmlns:jxb="http://java.sun.com/xml/ns/jaxb" xmlns:xjc="http://java.sun.com/xml/ns/jaxb/xjc" '
+        f'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" id="{data["form_id"]}" '
+        f'xsi:noNamespaceSchemaLocation="http://scheme.cf.linedata.com/function.xsd" fatherId="" beanId="{data["bean_id"]}">',
+        '    <graphic>', '        <headerVisible>false</headerVisible>', '        <collapsible>false</collapsible>',
+        '        <collapsed>false</collapsed>', '    </graphic>', '', '    <fieldLinks>',
+    ]
+    for link in data['field_links']:
+        lines.append(f'        <fieldLink childFieldId="{link["childFieldId"]}" id="{link["id"]}" methodName="{link["methodName"]}" '
+                     f'nature="{link["nature"]}" disabled="{link["disabled"]}" beanId="{link["beanId"]}">')
+        lines.extend(f'            <fieldLinkFather fatherFieldId="{father}" />' for father in link['fathers'])
+        lines.append('        </fieldLink>')
+    lines.extend(['    </fieldLinks>', '', '    <areas>'])
+    for area in data['areas']:
+        lines.extend(['', f'        <area id="{area["id"]}" sortNumber="{area["sortNumber"]}">',
+                      '            <graphic><headerVisible>false</headerVisible></graphic>', '            <fields>'])
+        for field in area['fields']:
+            attrs = [f'{name}="{field[name]}"' for name in ('id', 'nature', 'columnNumber', 'sortNumber', 'readOnly', 'hidden')]
+            attrs.extend(f'{name}="{field[name]}"' for name in ('lov', 'valueField', 'functionId', 'fkSearchField', 'displayTemplate', 'clearValueIfNotInStore')
+                         if field.get(name) and (name != 'valueField' or field['nature'] == 'lov'))
+            lines.append(f'                <field {" ".join(attrs)}>')
+            if field.get('label'):
+                lines.append(f'<label>{field["label"]}</label>')
+            if field.get('controls'):
+                lines.append('                    <controls>')
+                lines.extend(f'                        <control id="{c["id"]}" nature="{c["nature"]}" />' for c in field['controls'])
+                lines.append('                    </controls>')
+            if field.get('filters'):
+                lines.append('                    <filters>')
+                lines.extend(f'                        <filter id="{f["id"]}" fieldId="{f["fieldId"]}" />' for f in field['filters'])
+                lines.append('                    </filters>')
+            lines.append('                </field>')
+        lines.extend(['            </fields>', '        </area>'])
+    lines.extend(['', '    </areas>', '</form>'])
+    return '\n'.join(lines)
+
+def previous_fieldlinks_file(field_links, fonction_name):
+    """The body of fieldlinks.main before xml_emitter"""
+    def escape_attr(value):
+        return escape(str(value), {'"': "&quot;", "'": "&apos;"})
+
+    lines = ['<fieldLinks>']
+    for link in field_links:
+        child_id = escape_attr(link.get("childFieldId", ""))
+        disabled = str(link.get("disabled", "false")).lower()
+        lines.append(f'  <fieldLink childFieldId="{child_id}" id="link_{child_id}"')
+        lines.append(f'             methodName="is{child_id}Visible" nature="{link.get("nature", "CONDITIONNALHIDDEN")}" disabled="{disabled}"')
+        lines.append(f'             beanId="{fonction_name}FieldLinkService">')
+        lines.extend(f'    <fieldLinkFather fatherFieldId="{escape_attr(father)}" />' for father in link.get("fatherFieldIds", []))
+        lines.append('  </fieldLink>')
+    lines.append('</fieldLinks>')
+    return '\n'.join(lines)
+
+# === inputs ===
+
+def combined_inputs(label):
+    """combined.generate_xml inputs: area map, form fields and field links"""
+    form_fields = {f"field{i}": {
+        'id': f"field{i}", 'nature': 'lov' if i % 3 == 0 else 'string', 'label': label(i), 'maxLength': '30',
+        'lov': f"Lov{i}QueryServiceImpl", 'valueField': 'value', 'displayTemplate': '{value} - {longLabel}',
+    } for i in range(FIELD_COUNT)}
+    area_map = {f"field{i}": {'area': f"area{i % 3 + 1}", 'sortNumber': str(i), 'columnNumber': str(i % 2 + 1)}
+                for i in range(0, FIELD_COUNT, 2)}
+    fieldlinks_data = {'links': [{
+        'childFieldId': f"field{i}", 'id': f"link_field{i}", 'methodName': f"isField{i}Visible",
+        'fatherFieldIds': [f"field{i + 1}", f"field{i + 2}"],
+    } for i in range(0, FIELD_COUNT, 10)]}
+    return area_map, form_fields, fieldlinks_data
+
+def direct_data(label):
+    """generate_xml_directly data for one form"""
+    fields = [{
+        'id': f"field{i}", 'nature': 'lov' if i % 3 == 0 else 'string', 'columnNumber': '1',
+        'sortNumber': str(i), 'readOnly': 'false', 'hidden': 'false',
+        'lov': f"Lov{i}QueryServiceImpl" if i % 3 == 0 else '', 'valueField': 'value',
+        'displayTemplate': '{value} - {longLabel}', 'clearValueIfNotInStore': 'true',
+        'label': label(i) if i % 2 else '',
+        'controls': [{'id': 'mandatory', 'nature': 'MANDATORY'}] if i % 4 == 0 else [],
+        'filters': [{'id': f"field{i - 1}", 'fieldId': f"field{i - 1}"}] if i % 5 == 0 else [],
+    } for i in range(FIELD_COUNT)]
+    return {
+        'form_id': 'benchBlockForm',
+        'bean_id': 'benchFormService',
+        'field_links': [{
+            'childFieldId': f"field{i}", 'id': f"link_field{i}", 'methodName': f"isField{i}Visible",
+            'nature': 'CONDITIONNALHIDDEN', 'disabled': 'false', 'beanId': 'benchFieldLinkService',
+            'fathers': [f"field{i + 1}"],
+        } for i in range(0, FIELD_COUNT, 10)],
+        'areas': [{'id': f"area{n + 1}", 'sortNumber': str(n + 1), 'fields': fields[n::3]} for n in range(3)],
+    }
+
+def field_links(child):
+    """fieldlink.json entries"""
+    return [{'childFieldId': child(i), 'disabled': i % 2 == 0, 'fatherFieldIds': [f"field{i + 1}"]}
+            for i in range(FIELD_COUNT // 10)]
+
+def fieldlinks_file(links):
+    out = io.StringIO()
+    fieldlinks.write_fieldlinks(out, links, 'MyFunction')
+    return out.getvalue()
+
+def pretty(xml, tmp_path):
+    """The document as render_jinja2.render_template writes it"""
+    path = tmp_path / "form.xml"
+    xml_pretty.write_pretty([xml], path)
+    return path.read_bytes()
+
+# === tests ===
+
+def test_combined_same_as_previous():
+    inputs = combined_inputs(lambda i: f"Libellé n°{i} — état")
+    assert combined.generate_xml(*inputs, 'bench', GENERATION) == previous_combined_xml(*inputs, GENERATION)
+
+def test_directly_same_as_previous(tmp_path):
+    data = direct_data(lambda i: f"Libellé n°{i} — état")
+    # Only the whitespace between elements changed; compare the written files
+    assert pretty(generate_xml_directly(data), tmp_path) == pretty(previous_xml_directly(data), tmp_path)
+
+def test_fieldlinks_same_as_previous():
+    links = field_links(lambda i: f"field{i}")
+    assert fieldlinks_file(links) == previous_fieldlinks_file(links, 'MyFunction')
+
+def test_special_characters_escaped():
+    area_map, form_fields, fieldlinks_data = combined_inputs(lambda i: SPECIAL)
+    fieldlinks_data['links'][0]['childFieldId'] = SPECIAL
+    data = direct_data(lambda i: SPECIAL)
+    data['field_links'][0]['methodName'] = SPECIAL
+    documents = [
+        combined.generate_xml(area_map, form_fields, fieldlinks_data, 'bench', GENERATION),
+        generate_xml_directly(data),
+        fieldlinks_file(field_links(lambda i: SPECIAL)),
+    ]
+    for xml in documents:
+        root = ET.fromstring(xml.encode('utf-8'))
+        assert any(SPECIAL in value for element in root.iter() for value in [*element.attrib.values(), element.text or ''])
+
+def test_escaping():
+    assert escape_attribute('R&D <1> "x"') == 'R&amp;D &lt;1&gt; &quot;x&quot;'
+    assert escape_attribute(None) == ''
+    assert escape_attribute(True) == 'True'
+    assert escape_text('a < "b"') == 'a &lt; "b"'
+
+def write(emitter):
+    emitter.declaration()
+    emitter.start('form', [('id', 'f&1')])
+    emitter.element('label', 'a<b')
+    emitter.start_line('<fields>')
+    for i in range(3000):
+        emitter.line(f'<field id="{i}" />')
+    emitter.end('fields')
+    emitter.empty('graphic', [('visible', 'false')])
+    emitter.end('form')
+
+def test_stream_matches_getvalue():
+    expected = XmlEmitter(indent='  ')
+    write(expected)
+
+    out = io.StringIO()
+    emitter = XmlEmitter(out, indent='  ')
+    write(emitter)
+    # Closing the outermost element writes everything to the stream
+    assert out.getvalue() == expected.getvalue()
+    assert out.getvalue().startswith('<?xml')
+    assert '\n  <label>a&lt;b</label>\n  <fields>\n    <field id="0" />' in out.getvalue()
+    assert out.getvalue().endswith('\n  <graphic visible="false" />\n</form>')
+
+@pytest.mark.parametrize('write_line', [
+    lambda emitter, i: emitter.empty('field', [('id', i)]),
+    lambda emitter, i: emitter.element('label', i),
+    lambda emitter, i: emitter.line(f'<field id="{i}" />'),
+], ids=['empty', 'element', 'line'])
+def test_buffer_bounded(write_line):
+    out = io.StringIO()
+    emitter = XmlEmitter(out)
+    emitter.start('fields')
+    for i in range(XmlEmitter.FLUSH_LINES * 3):
+        write_line(emitter, i)
+        assert len(emitter._lines) < XmlEmitter.FLUSH_LINES
+    assert out.tell() > 0
+
+def test_write_at_prefixes():
+    emitter = XmlEmitter(indent='  ')
+    emitter.start('fields')
+    field, child = emitter.prefixes(2)
+    emitter.write(f'{field}<field>{child}<label>x</label>{field}</field>')
+    emitter.end('fields')
+    assert emitter.getvalue() == '<fields>\n  <field>\n    <label>x</label>\n  </field>\n</fields>'